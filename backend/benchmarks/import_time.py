@@ -0,0 +1,126 @@
+"""
+冷启动导入耗时检查
+
+在全新的子进程中以 python -X importtime 分别测量：
+- import backend.main（只应加载 FastAPI，不创建应用）
+- import backend.main 并调用 create_app()（worker 开始处理请求前的全部导入）
+
+每项运行多次取中位数，输出墙钟耗时（含 create_app 注册路由等非导入耗时）
+和累计导入耗时最高的本项目模块，并检查：
+- 墙钟耗时超过 --budget-ms / --app-budget-ms 预算
+- 启动阶段加载了只应在首次使用时才加载的模块（--deferred，默认 aiosmtplib、httpx）
+
+任一检查不通过时以非零状态退出。
+
+用法:
+    python -m backend.benchmarks.import_time
+    python -m backend.benchmarks.import_time --budget-ms 400 --app-budget-ms 1200 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFERRED_MODULES = ("aiosmtplib", "httpx")
+# 墙钟耗时预算（毫秒），tests/test_import_time.py 使用同一预算
+BUDGETS_MS = {"import": 500, "create_app": 1500}
+
+SCENARIOS = {
+    "import": "import backend.main",
+    "create_app": "import backend.main; backend.main.create_app()",
+}
+
+
+def measure(code: str) -> tuple[float, dict[str, tuple[int, int]]]:
+    """运行一次，返回墙钟耗时（毫秒）和 模块 -> (自身耗时 us, 累计耗时 us)"""
+    timed = (
+        "import time; _started = time.perf_counter()\n"
+        f"{code}\n"
+        "print((time.perf_counter() - _started) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timed],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def report(name: str, code: str, runs: int, top: int) -> tuple[float, set[str]]:
+    """返回墙钟耗时中位数（毫秒）和加载的模块名"""
+    walls = []
+    modules = {}
+    for _ in range(runs):
+        wall, modules = measure(code)
+        walls.append(wall)
+    total = statistics.median(walls)
+    print(f"\n{name}: {total:.0f} ms（{runs} 次中位数，共加载 {len(modules)} 个模块）")
+    ours = sorted(
+        (
+            (cumulative, module)
+            for module, (_, cumulative) in modules.items()
+            if module.startswith("backend")
+        ),
+        reverse=True,
+    )
+    for cumulative, module in ours[:top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {module}")
+    return total, set(modules)
+
+
+def main(args: argparse.Namespace) -> int:
+    failures = []
+    budgets = {"import": args.budget_ms, "create_app": args.app_budget_ms}
+    for name, code in SCENARIOS.items():
+        total, loaded = report(name, code, args.runs, args.top)
+        if total > budgets[name]:
+            failures.append(f"{name} 耗时 {total:.0f} ms，超过预算 {budgets[name]} ms")
+        for module in args.deferred:
+            if module in loaded:
+                failures.append(f"{name} 阶段加载了应延迟加载的模块 {module}")
+
+    if failures:
+        print("\n未通过:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\n导入耗时在预算以内")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="冷启动导入耗时检查")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="显示的本项目模块数")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=BUDGETS_MS["import"],
+        help="import backend.main 的预算",
+    )
+    parser.add_argument(
+        "--app-budget-ms",
+        type=float,
+        default=BUDGETS_MS["create_app"],
+        help="导入并创建应用的预算",
+    )
+    parser.add_argument(
+        "--deferred",
+        nargs="*",
+        default=list(DEFERRED_MODULES),
+        help="启动阶段不应加载的模块",
+    )
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,289 @@
+"""
+索引检查：按应用实际发出的语句指纹报告缺失和未使用的索引
+
+语句来源：
+- 默认按 query_plans.CASES 在进程内调用各列表接口并记录发出的语句
+- --query-stats 读取线上 GET /admin/queries?limit=500 保存的 JSON，
+  指纹中的 ? 以字面量代替后执行 EXPLAIN（估算结果，与实际参数下的计划可能不同）
+
+对每条语句执行 EXPLAIN 后汇总，报告三类问题：
+- 模型中声明但数据库中不存在的索引（例如数据库由旧版 init.sql 创建）
+- 查询按某些列过滤却走了全表扫描，给出建议的索引列（等值列在前，范围列在后）
+- 数据库中存在但没有任何语句使用的索引；外键列唯一的索引会注明，InnoDB 要求保留。
+  只统计分析到的语句涉及的表，后台任务（发件箱、验证码清理等）的语句需通过 --query-stats 提供
+
+存在缺失索引或回放的接口用例被跳过时以非零状态退出。
+
+用法:
+    python -m backend.benchmarks.index_check
+    python -m backend.benchmarks.index_check --query-stats query_stats.json --no-replay
+    python -m backend.benchmarks.index_check --database-url sqlite+aiosqlite:///./seed.db
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import SQLModel
+
+from ..database import create_database_engine, database_url
+from .query_plans import capture_plans, explain
+
+_QUOTE = r"[`\"]?"
+_OPERATOR = r"(=|>=|<=|<>|!=|>|<|IN\b|LIKE\b|BETWEEN\b)"
+_LIMIT = re.compile(r"\bLIMIT\s+\?(?:\s*,\s*\?)?", re.IGNORECASE)
+_OFFSET = re.compile(r"\bOFFSET\s+\?", re.IGNORECASE)
+
+
+def _literal_statement(key: str) -> str:
+    """将指纹还原为可执行 EXPLAIN 的语句"""
+    statement = _LIMIT.sub("LIMIT 20", key)
+    statement = _OFFSET.sub("OFFSET 0", statement)
+    return statement.replace("(?+)", "('1')").replace("?", "'1'")
+
+
+def _filter_columns(key: str, table: str) -> tuple[list[str], list[str], list[str]]:
+    """从语句中找出该表用于过滤的列：(等值列, 范围列, 模糊匹配列)"""
+    column = rf"{_QUOTE}{re.escape(table)}{_QUOTE}\.{_QUOTE}(\w+){_QUOTE}"
+    equality, ranges, likes = [], [], []
+    matches = [
+        (match.start(), match[1], match[2].upper())
+        for match in re.finditer(rf"{column}\s*{_OPERATOR}", key, re.IGNORECASE)
+    ]
+    # 连接条件中被驱动表的列可能写在等号右侧
+    matches += [
+        (match.start(), match[1], "=")
+        for match in re.finditer(rf"=\s*{column}", key, re.IGNORECASE)
+    ]
+    for _, name, operator in sorted(matches):
+        if operator in ("=", "IN"):
+            target = equality
+        elif operator == "LIKE":
+            target = likes
+        else:
+            target = ranges
+        if name not in target:
+            target.append(name)
+    ranges = [name for name in ranges if name not in equality]
+    return equality, ranges, likes
+
+
+def _inspect_indexes(sync_conn) -> dict:
+    """数据库中每个表的索引、唯一约束、主键和外键列"""
+    inspector = inspect(sync_conn)
+    tables = {}
+    for table in inspector.get_table_names():
+        indexes = [
+            {
+                "name": index["name"],
+                "columns": index["column_names"],
+                "unique": bool(index["unique"]),
+            }
+            for index in inspector.get_indexes(table)
+        ]
+        for constraint in inspector.get_unique_constraints(table):
+            indexes.append(
+                {
+                    "name": constraint["name"],
+                    "columns": constraint["column_names"],
+                    "unique": True,
+                }
+            )
+        primary_key = inspector.get_pk_constraint(table)["constrained_columns"]
+        if primary_key:
+            indexes.append({"name": "PRIMARY", "columns": primary_key, "unique": True})
+        foreign_keys = [
+            column
+            for foreign_key in inspector.get_foreign_keys(table)
+            for column in foreign_key["constrained_columns"]
+        ]
+        tables[table] = {"indexes": indexes, "foreign_keys": foreign_keys}
+    return tables
+
+
+def _covered(columns: list[str], indexes: list[dict]) -> bool:
+    """是否已有以这些列为前缀的索引"""
+    return any(index["columns"][: len(columns)] == columns for index in indexes)
+
+
+def missing_declared(tables: dict) -> list[dict]:
+    """模型中声明但数据库中没有等价索引（按列比较，不比较名称）"""
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = tables.get(table.name, {}).get("indexes", [])
+        for index in table.indexes:
+            columns = [column.name for column in index.columns]
+            if not _covered(columns, existing):
+                missing.append(
+                    {"table": table.name, "name": index.name, "columns": columns}
+                )
+    return missing
+
+
+def missing_for_queries(statements: dict, tables: dict) -> list[dict]:
+    """按过滤列走了全表扫描的语句，按建议索引聚合"""
+    suggestions: dict[tuple, dict] = {}
+    for key, info in statements.items():
+        for entry in info["plan"]["plan"]:
+            table = entry["table"]
+            if not entry["full_scan"] or table not in tables:
+                continue
+            equality, ranges, likes = _filter_columns(key, table)
+            columns = equality + ranges[:1]
+            if not columns:
+                # 未过滤的分页/计数查询，或只有模糊匹配（前缀通配符无法使用 B-tree 索引）
+                if likes:
+                    info.setdefault("notes", []).append(
+                        f"{table}: 模糊匹配 {', '.join(likes)} 只能全表扫描"
+                    )
+                continue
+            if _covered(columns, tables[table]["indexes"]):
+                # 已有合适索引，优化器仍选择全表扫描（数据量小或选择性差）
+                continue
+            suggestion = suggestions.setdefault(
+                (table, tuple(columns)),
+                {"table": table, "columns": columns, "count": 0, "statements": []},
+            )
+            suggestion["count"] += info["count"]
+            suggestion["statements"].append(key)
+    return sorted(suggestions.values(), key=lambda row: row["count"], reverse=True)
+
+
+def unused_indexes(statements: dict, tables: dict) -> list[dict]:
+    """没有被任何语句使用的非唯一索引（只统计分析到的语句涉及的表）"""
+    entries = [entry for info in statements.values() for entry in info["plan"]["plan"]]
+    used = {(entry["table"], entry["key"]) for entry in entries if entry["key"]}
+    touched = {entry["table"] for entry in entries}
+    unused = []
+    for table, info in tables.items():
+        if table not in touched:
+            continue
+        for index in info["indexes"]:
+            if index["unique"] or (table, index["name"]) in used:
+                continue
+            leading = index["columns"][0]
+            # InnoDB 要求外键列上有索引，若没有其他以该列开头的索引则不能删除
+            required = leading in info["foreign_keys"] and not any(
+                other is not index and other["columns"][0] == leading
+                for other in info["indexes"]
+            )
+            unused.append(
+                {
+                    "table": table,
+                    "name": index["name"],
+                    "columns": index["columns"],
+                    "foreign_key": required,
+                }
+            )
+    return unused
+
+
+async def collect_statements(args: argparse.Namespace, engine) -> dict:
+    """指纹 -> {plan, count, sources}"""
+    statements: dict[str, dict] = {}
+    if not args.no_replay:
+        results, skipped = await capture_plans(args.database_url or database_url)
+        if skipped:
+            # 缺少的用例会让未使用索引的结论失真
+            raise SystemExit(f"{len(skipped)} 个接口用例被跳过，检查不完整")
+        for case, plans in results.items():
+            for key, plan in plans.items():
+                info = statements.setdefault(
+                    key, {"plan": plan, "count": 0, "sources": []}
+                )
+                info["count"] += 1
+                info["sources"].append(case)
+    if args.query_stats:
+        rows = json.loads(Path(args.query_stats).read_text(encoding="utf-8"))
+        for row in rows:
+            key = row["fingerprint"]
+            if not key.upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            if key not in statements:
+                try:
+                    plan = await explain(engine, _literal_statement(key), ())
+                except SQLAlchemyError as e:
+                    print(f"  无法 EXPLAIN：{e.__class__.__name__}\n    {key}")
+                    continue
+                statements[key] = {"plan": plan, "count": 0, "sources": []}
+            statements[key]["count"] += row.get("count", 1)
+            statements[key]["sources"].append("query-stats")
+    return statements
+
+
+def print_report(report: dict) -> None:
+    print(f"\n共分析 {report['statements']} 条语句")
+
+    print("\n模型中声明但数据库中缺失的索引:")
+    for row in report["missing_declared"]:
+        print(f"  {row['table']}.{row['name']} ({', '.join(row['columns'])})")
+    if not report["missing_declared"]:
+        print("  无")
+
+    print("\n查询缺少索引（全表扫描）:")
+    for row in report["missing_for_queries"]:
+        print(
+            f"  {row['table']} ({', '.join(row['columns'])})  "
+            f"涉及 {len(row['statements'])} 条语句，执行 {row['count']} 次"
+        )
+        for key in row["statements"][:3]:
+            print(f"      {key[:160]}")
+    if not report["missing_for_queries"]:
+        print("  无")
+
+    print("\n未被使用的索引:")
+    for row in report["unused"]:
+        note = "  (外键必需)" if row["foreign_key"] else ""
+        print(f"  {row['table']}.{row['name']} ({', '.join(row['columns'])}){note}")
+    if not report["unused"]:
+        print("  无")
+
+    if report["notes"]:
+        print("\n说明:")
+        for note in sorted(set(report["notes"])):
+            print(f"  {note}")
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine = create_database_engine(args.database_url or database_url)
+    try:
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(_inspect_indexes)
+        statements = await collect_statements(args, engine)
+    finally:
+        await engine.dispose()
+
+    report = {
+        "statements": len(statements),
+        "missing_declared": missing_declared(tables),
+        "missing_for_queries": missing_for_queries(statements, tables),
+        "unused": unused_indexes(statements, tables),
+        "notes": [
+            note for info in statements.values() for note in info.get("notes", [])
+        ],
+    }
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"\n结果已保存到 {args.output}")
+    return 1 if report["missing_declared"] or report["missing_for_queries"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按语句指纹检查缺失和未使用的索引")
+    parser.add_argument("--database-url", help="默认使用 config.yaml 中的数据库")
+    parser.add_argument(
+        "--query-stats", help="GET /admin/queries 返回的 JSON，作为额外的语句来源"
+    )
+    parser.add_argument(
+        "--no-replay", action="store_true", help="不回放 query_plans 中的接口用例"
+    )
+    parser.add_argument("--output", help="将报告保存为 JSON")
+    sys.exit(asyncio.run(main(parser.parse_args())))
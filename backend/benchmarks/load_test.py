@@ -0,0 +1,447 @@
+"""
+午餐高峰压测
+
+启动一个使用本地数据库替身（默认 SQLite 临时文件）的 uvicorn 进程，写入商家、菜品和用户，
+然后按午餐高峰的请求比例并发压测，输出各路由的吞吐量与 p50/p95/p99 延迟，并保存为 JSON 以便在提交之间对比。
+
+请求组合（按权重随机选择）:
+- browse:   浏览商家菜品     GET  /item/store/{store_id}
+- order:    下单             POST /order/
+- poll:     查看我的订单     GET  /order/my
+- approve:  商家查看待审核订单并逐个同意  GET /order/store/my, PUT /order/{order_id}
+
+令牌直接在本进程中签发，不经过登录接口（登录受限流和 bcrypt 影响，见 password_hashing 基准）。
+压测进程与服务进程运行在同一台机器上，结果只适合同一环境下前后对比。
+
+用法:
+    python -m backend.benchmarks.load_test --duration 30 --concurrency 32 --output load.json
+    python -m backend.benchmarks.load_test --compare load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import yaml
+from sqlalchemy import insert
+
+from ..config import get_config
+from ..database import create_database_engine
+from ..migrations import apply_migrations
+from ..models import Item, Store, StoreState, User, UserType, utcnow
+from ..security import create_access_token, get_password_hash
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SEED_PASSWORD = "loadtest123"
+
+SCENARIO_WEIGHTS = {"browse": 50, "order": 20, "poll": 20, "approve": 10}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _write_config(workdir: Path, database_url: str) -> Path:
+    """基于当前配置生成压测用配置：替换数据库、关闭限流"""
+    config = dict(get_config())
+    database = dict(config.get("database", {}))
+    database["url"] = database_url
+    database["replicas"] = []
+    if database_url.startswith("sqlite"):
+        # 同一请求可能同时持有读写两个会话，连接数不能为 1
+        database["pool_size"] = 5
+        database["max_overflow"] = 5
+    config["database"] = database
+    config["rate_limit"] = {**config.get("rate_limit", {}), "enabled": False}
+    path = workdir / "config.yaml"
+    path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+    return path
+
+
+async def seed(
+    database_url: str, vendors: int, customers: int, items_per_store: int
+) -> dict:
+    """批量写入商家、菜品和用户，返回压测所需的 ID"""
+    # SQLite 的 WAL 模式由 create_database_engine 开启，写入数据库文件后持续生效
+    engine = create_database_engine(database_url)
+    hashed_password = get_password_hash(SEED_PASSWORD)
+    now = utcnow()
+    await apply_migrations(engine)
+    async with engine.begin() as conn:
+        user_rows = [
+            {
+                "username": f"vendor{i}",
+                "email": f"vendor{i}@loadtest.example.com",
+                "hashed_password": hashed_password,
+                "user_type": UserType.VENDOR,
+                "create_time": now,
+            }
+            for i in range(vendors)
+        ] + [
+            {
+                "username": f"customer{i}",
+                "email": f"customer{i}@loadtest.example.com",
+                "hashed_password": hashed_password,
+                "user_type": UserType.CUSTOMER,
+                "create_time": now,
+            }
+            for i in range(customers)
+        ]
+        await conn.execute(insert(User), user_rows)
+        users = (
+            await conn.execute(
+                User.__table__.select().where(
+                    User.__table__.c.email.like("%@loadtest.example.com")
+                )
+            )
+        ).mappings()
+        vendor_ids, customer_ids = [], []
+        for row in users:
+            target = vendor_ids if row["user_type"] == UserType.VENDOR else customer_ids
+            target.append(row["id"])
+
+        await conn.execute(
+            insert(Store),
+            [
+                {
+                    "name": f"档口{i}",
+                    "address": f"一食堂 {i} 号窗口",
+                    "phone": f"1380000{i:04d}",
+                    "state": StoreState.APPROVED,
+                    "publish_time": now,
+                    "review_time": now,
+                    "owner_id": owner_id,
+                }
+                for i, owner_id in enumerate(vendor_ids)
+            ],
+        )
+        stores = (
+            await conn.execute(
+                Store.__table__.select().where(
+                    Store.__table__.c.owner_id.in_(vendor_ids)
+                )
+            )
+        ).mappings()
+        store_by_owner = {row["owner_id"]: row["id"] for row in stores}
+
+        await conn.execute(
+            insert(Item),
+            [
+                {
+                    "name": f"菜品{store_id}-{j}",
+                    "price": round(random.uniform(5, 30), 1),
+                    "quantity": 10**7,
+                    "store_id": store_id,
+                }
+                for store_id in store_by_owner.values()
+                for j in range(items_per_store)
+            ],
+        )
+        item_rows = (
+            await conn.execute(
+                Item.__table__.select().where(
+                    Item.__table__.c.store_id.in_(list(store_by_owner.values()))
+                )
+            )
+        ).mappings()
+        items_by_store: dict[int, list[int]] = defaultdict(list)
+        for row in item_rows:
+            items_by_store[row["store_id"]].append(row["id"])
+    await engine.dispose()
+    return {
+        "vendors": [(user_id, store_by_owner[user_id]) for user_id in vendor_ids],
+        "customers": customer_ids,
+        "items_by_store": dict(items_by_store),
+    }
+
+
+def _auth(user_id: int) -> dict[str, str]:
+    token = create_access_token(user_id, timedelta(hours=12))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(
+        self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append(time.perf_counter() - started)
+        self.statuses[route][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            ordered = sorted(self.latencies[route])
+            routes[route] = {
+                "requests": len(ordered),
+                "errors": self.errors[route],
+                "rps": len(ordered) / elapsed,
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "p99_ms": _percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+                "statuses": {str(k): v for k, v in self.statuses[route].items()},
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "total_rps": total / elapsed,
+            "routes": routes,
+        }
+
+
+async def _virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    data: dict,
+    deadline: float,
+    rng: random.Random,
+) -> None:
+    scenarios = list(SCENARIO_WEIGHTS)
+    weights = list(SCENARIO_WEIGHTS.values())
+    store_ids = list(data["items_by_store"])
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        if scenario == "browse":
+            store_id = rng.choice(store_ids)
+            await recorder.request(
+                client,
+                "GET /item/store/{store_id}",
+                "GET",
+                f"/item/store/{store_id}",
+                params={"limit": 20},
+            )
+        elif scenario == "order":
+            store_id = rng.choice(store_ids)
+            items = rng.sample(data["items_by_store"][store_id], rng.randint(1, 3))
+            payload = {
+                "store_id": store_id,
+                "items": [
+                    {"item_id": item_id, "quantity": rng.randint(1, 2)}
+                    for item_id in items
+                ],
+            }
+            await recorder.request(
+                client,
+                "POST /order/",
+                "POST",
+                "/order/",
+                json=payload,
+                headers=data["customer_auth"][rng.randrange(len(data["customers"]))],
+            )
+        elif scenario == "poll":
+            await recorder.request(
+                client,
+                "GET /order/my",
+                "GET",
+                "/order/my",
+                params={"limit": 10},
+                headers=data["customer_auth"][rng.randrange(len(data["customers"]))],
+            )
+        else:
+            headers = data["vendor_auth"][rng.randrange(len(data["vendors"]))]
+            response = await recorder.request(
+                client,
+                "GET /order/store/my",
+                "GET",
+                "/order/store/my",
+                params={"state": "pending", "limit": 5},
+                headers=headers,
+            )
+            if response is None or response.status_code != 200:
+                continue
+            for order in response.json()["records"]:
+                await recorder.request(
+                    client,
+                    "PUT /order/{order_id}",
+                    "PUT",
+                    f"/order/{order['id']}",
+                    json={"state": "approved"},
+                    headers=headers,
+                )
+
+
+async def _wait_until_ready(base_url: str, server: subprocess.Popen) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(300):
+            if server.poll() is not None:
+                raise RuntimeError("服务进程启动失败")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("等待服务启动超时")
+
+
+def _start_server(port: int, config_path: Path) -> subprocess.Popen:
+    """在子进程中启动服务（不等待其就绪）"""
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "ORDER_SYSTEM_CONFIG": str(config_path)},
+    )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory(prefix="order-load-") as workdir:
+        database_url = args.database_url or (
+            f"sqlite+aiosqlite:///{Path(workdir) / 'load_test.db'}"
+        )
+        config_path = _write_config(Path(workdir), database_url)
+        print(f"写入测试数据: {args.vendors} 个商家, {args.customers} 个用户 ...")
+        data = await seed(
+            database_url, args.vendors, args.customers, args.items_per_store
+        )
+        data["customer_auth"] = [_auth(user_id) for user_id in data["customers"]]
+        data["vendor_auth"] = [_auth(user_id) for user_id, _ in data["vendors"]]
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = _start_server(port, config_path)
+        try:
+            await _wait_until_ready(base_url, server)
+            print(f"压测 {args.duration}s，并发 {args.concurrency} ...")
+            recorder = Recorder()
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(
+                base_url=base_url, limits=limits, timeout=30
+            ) as client:
+                started = time.perf_counter()
+                deadline = started + args.duration
+                await asyncio.gather(
+                    *[
+                        _virtual_user(
+                            client,
+                            recorder,
+                            data,
+                            deadline,
+                            random.Random(args.seed + i),
+                        )
+                        for i in range(args.concurrency)
+                    ]
+                )
+                elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result = recorder.summary(elapsed)
+    result["meta"] = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "database": database_url.split(":", 1)[0],
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "vendors": args.vendors,
+        "customers": args.customers,
+        "items_per_store": args.items_per_store,
+        "scenario_weights": SCENARIO_WEIGHTS,
+    }
+    return result
+
+
+def print_report(result: dict, baseline: dict | None = None) -> None:
+    print(
+        f"\n{'route':<28}{'reqs':>8}{'err':>6}{'rps':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        + (f"{'Δp95':>10}" if baseline else "")
+    )
+    for route, stats in result["routes"].items():
+        line = (
+            f"{route:<28}{stats['requests']:>8}{stats['errors']:>6}"
+            f"{stats['rps']:>9.1f}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous and previous["p95_ms"]:
+            change = (stats["p95_ms"] / previous["p95_ms"] - 1) * 100
+            line += f"{change:>+9.1f}%"
+        print(line)
+    print(f"\n总吞吐量: {result['total_rps']:.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="午餐高峰压测")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--vendors", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--items-per-store", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--database-url", help="默认使用临时 SQLite 文件；也可指向空的 MySQL 测试库"
+    )
+    parser.add_argument("--output", help="结果写入该 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比 p95")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+    print_report(result, baseline)
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到 {args.output}")
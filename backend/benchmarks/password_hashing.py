@@ -0,0 +1,93 @@
+"""
+密码哈希基准测试
+
+对比“在事件循环内直接计算 bcrypt”和“在线程池中计算”两种方式：
+- 登录吞吐量（每秒完成的密码校验次数）
+- 同一事件循环上其他协程的调度延迟（模拟其他路由受到的影响）
+
+用法:
+    python -m backend.benchmarks.password_hashing --logins 64 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from ..security import (
+    BCRYPT_ROUNDS,
+    HASH_WORKERS,
+    pwd_context,
+    verify_password_async,
+)
+
+PROBE_INTERVAL = 0.001
+
+
+async def _probe(samples: list[float], stop: asyncio.Event) -> None:
+    """每隔 1ms 唤醒一次，记录实际延迟（即其他请求的额外等待时间）"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _inline_verify(password: str, hashed: str) -> None:
+    pwd_context.verify(password, hashed)
+
+
+async def _pooled_verify(password: str, hashed: str) -> None:
+    await verify_password_async(password, hashed)
+
+
+async def _run(verify, logins: int, concurrency: int, hashed: str) -> dict:
+    samples: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(samples, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            await verify("benchmark-password", hashed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    samples.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "loop_delay_p50_ms": statistics.median(samples) * 1000 if samples else 0.0,
+        "loop_delay_p99_ms": samples[int(len(samples) * 0.99) - 1] * 1000
+        if samples
+        else 0.0,
+        "loop_delay_max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+
+async def main(logins: int, concurrency: int) -> None:
+    hashed = pwd_context.hash("benchmark-password")
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, hash workers={HASH_WORKERS}")
+    print(f"logins={logins}, concurrency={concurrency}\n")
+    print(
+        f"{'mode':<10}{'logins/s':>12}{'loop p50 ms':>14}"
+        f"{'loop p99 ms':>14}{'loop max ms':>14}"
+    )
+    for name, verify in (("inline", _inline_verify), ("pooled", _pooled_verify)):
+        result = await _run(verify, logins, concurrency, hashed)
+        print(
+            f"{name:<10}{result['logins_per_second']:>12.1f}"
+            f"{result['loop_delay_p50_ms']:>14.2f}"
+            f"{result['loop_delay_p99_ms']:>14.2f}"
+            f"{result['loop_delay_max_ms']:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="密码哈希吞吐量与事件循环延迟基准")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
@@ -0,0 +1,359 @@
+"""
+列表接口执行计划检查
+
+在进程内按典型筛选条件调用各列表接口（不经过网络），记录接口实际发出的 SELECT 语句及参数，
+再对已写入数据的数据库执行 EXPLAIN（MySQL）或 EXPLAIN QUERY PLAN（SQLite），
+记录每个表的访问方式、使用的索引和预估行数。
+
+保存为基线后再次运行并对比，出现以下变化时视为回归并以非零状态退出：
+- 原本走索引的表变为全表扫描
+- 新出现 filesort（SQLite 为 USE TEMP B-TREE）或临时表
+
+有用例被跳过（缺少对应角色的账号或接口未返回 200）时同样以非零状态退出，
+检查没有覆盖全部接口不能算通过。数据库需要先写入数据（见 seed_data.py，会同时建好管理员账号）。
+
+用法:
+    python -m backend.benchmarks.query_plans --save plans.json
+    python -m backend.benchmarks.query_plans --baseline plans.json
+    python -m backend.benchmarks.query_plans --database-url sqlite+aiosqlite:///./seed.db
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..database import async_session_factory, create_database_engine, database_url
+from ..main import app
+from ..models import Order, Store, StoreState, User, UserType
+from ..security import create_access_token
+from ..utils.query_stats import fingerprint
+
+# (用例名, 角色, 路径, 查询参数)；参数中的 {占位符} 由数据库中的样例数据填充
+CASES = [
+    ("list_orders", "admin", "/order/", {}),
+    ("list_orders.state", "admin", "/order/", {"state": "pending"}),
+    ("list_orders.user_name", "admin", "/order/", {"user_name": "{user_name}"}),
+    ("list_orders.store_name", "admin", "/order/", {"store_name": "{store_name}"}),
+    ("list_orders.store_id", "admin", "/order/", {"store_id": "{store_id}"}),
+    ("list_orders.vendor", "vendor", "/order/", {}),
+    ("list_orders.vendor_state", "vendor", "/order/", {"state": "pending"}),
+    ("get_my_orders", "customer", "/order/my", {}),
+    ("get_my_orders.state", "customer", "/order/my", {"state": "completed"}),
+    ("get_my_store_orders", "vendor", "/order/store/my", {}),
+    ("get_my_store_orders.state", "vendor", "/order/store/my", {"state": "pending"}),
+    ("list_comments", None, "/comment/", {}),
+    ("list_comments.store_id", None, "/comment/", {"store_id": "{store_id}"}),
+    ("list_comments.user_name", None, "/comment/", {"user_name": "{user_name}"}),
+    ("list_comments.store_name", None, "/comment/", {"store_name": "{store_name}"}),
+    ("list_comments.content", None, "/comment/", {"content": "好吃"}),
+    ("list_store_comments", None, "/comment/store/{store_id}", {}),
+    ("get_my_comments", "customer", "/comment/my", {}),
+    ("list_pending_comments", "admin", "/comment/admin/pending", {}),
+    ("list_items", "admin", "/item/", {}),
+    ("list_items.store_id", "admin", "/item/", {"store_id": "{store_id}"}),
+    ("list_items.item_name", "admin", "/item/", {"item_name": "菜品"}),
+    ("list_items.price", "admin", "/item/", {"min_price": 10, "max_price": 20}),
+    ("list_items.in_stock", "admin", "/item/", {"in_stock": "true"}),
+    ("list_store_items", None, "/item/store/{store_id}", {}),
+    ("list_stores", None, "/store/", {}),
+    ("list_stores.state", None, "/store/", {"state": "approved"}),
+    ("list_stores.name", None, "/store/", {"name": "{store_name}"}),
+    ("list_stores.owner_name", None, "/store/", {"owner_name": "{vendor_name}"}),
+    ("list_pending_stores", "admin", "/store/admin/pending", {}),
+    ("list_users", "admin", "/user/", {}),
+    ("list_users.user_type", "admin", "/user/", {"user_type": "vendor"}),
+    ("list_users.search", "admin", "/user/", {"search": "{user_name}"}),
+]
+
+PAGE_SIZE = 20
+
+_SQLITE_ACCESS = re.compile(
+    r"^(?P<op>SCAN|SEARCH) (?P<table>\S+)(?: AS \S+)?"
+    r"(?: USING (?:COVERING )?(?:INDEX (?P<index>\S+)|(?P<pk>INTEGER PRIMARY KEY|PRIMARY KEY)))?"
+)
+
+
+class StatementCapture:
+    """记录引擎上执行的 SELECT 语句（语句文本与参数）"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.active = False
+        self.statements: list[tuple[str, object]] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def start(self) -> None:
+        self.statements = []
+        self.active = True
+
+    def stop(self) -> list[tuple[str, object]]:
+        self.active = False
+        return self.statements
+
+
+async def explain(engine: AsyncEngine, statement: str, parameters) -> dict:
+    """执行 EXPLAIN 并归一化为 {table, access, key, rows} 列表及 filesort/临时表标记"""
+    dialect = engine.dialect.name
+    entries = []
+    filesort = temporary = False
+    async with engine.connect() as conn:
+        if dialect == "mysql":
+            result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            for row in result.mappings():
+                extra = row.get("Extra") or ""
+                filesort |= "Using filesort" in extra
+                temporary |= "Using temporary" in extra
+                entries.append(
+                    {
+                        "table": row.get("table"),
+                        "access": row.get("type"),
+                        "key": row.get("key"),
+                        "rows": row.get("rows"),
+                        "full_scan": row.get("type") == "ALL",
+                    }
+                )
+        elif dialect == "sqlite":
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            for row in result:
+                detail = row[-1]
+                if detail.startswith("USE TEMP B-TREE"):
+                    filesort = True
+                    continue
+                match = _SQLITE_ACCESS.match(detail)
+                if match is None:
+                    continue
+                key = match["index"] or match["pk"]
+                access = (
+                    match["op"].lower() if key or match["op"] == "SEARCH" else "ALL"
+                )
+                entries.append(
+                    {
+                        "table": match["table"],
+                        "access": access,
+                        "key": key,
+                        "rows": None,
+                        "full_scan": access == "ALL",
+                    }
+                )
+        else:
+            raise ValueError(f"不支持的数据库: {dialect}")
+    return {"plan": entries, "filesort": filesort, "temporary": temporary}
+
+
+async def _sample_context(engine: AsyncEngine) -> dict:
+    """从数据库中挑选各角色的账号和筛选条件使用的样例值"""
+    users = User.__table__  # type: ignore[attr-defined]
+    stores = Store.__table__  # type: ignore[attr-defined]
+    orders = Order.__table__  # type: ignore[attr-defined]
+    async with engine.connect() as conn:
+        admin_id = (
+            await conn.execute(
+                select(users.c.id).where(users.c.user_type == UserType.ADMIN).limit(1)
+            )
+        ).scalar()
+        store = (
+            (
+                await conn.execute(
+                    select(stores.c.id, stores.c.name, stores.c.owner_id)
+                    .where(stores.c.state == StoreState.APPROVED)
+                    .limit(1)
+                )
+            )
+            .mappings()
+            .first()
+        )
+        customer_id = (
+            await conn.execute(select(orders.c.user_id).limit(1))
+        ).scalar() or (
+            await conn.execute(
+                select(users.c.id)
+                .where(users.c.user_type == UserType.CUSTOMER)
+                .limit(1)
+            )
+        ).scalar()
+        names = dict(
+            (
+                await conn.execute(
+                    select(users.c.id, users.c.username).where(
+                        users.c.id.in_(
+                            [
+                                customer_id or 0,
+                                store["owner_id"] if store else 0,
+                            ]
+                        )
+                    )
+                )
+            ).all()
+        )
+        order_count = (
+            await conn.execute(select(func.count()).select_from(orders))
+        ).scalar()
+
+    def auth(user_id):
+        if user_id is None:
+            return None
+        token = create_access_token(user_id, timedelta(hours=1))
+        return {"Authorization": f"Bearer {token}"}
+
+    return {
+        "headers": {
+            "admin": auth(admin_id),
+            "vendor": auth(store["owner_id"] if store else None),
+            "customer": auth(customer_id),
+        },
+        "values": {
+            "store_id": store["id"] if store else 0,
+            "store_name": store["name"] if store else "",
+            "vendor_name": names.get(store["owner_id"], "") if store else "",
+            "user_name": names.get(customer_id, ""),
+        },
+        "order_count": order_count,
+    }
+
+
+def _fill(value, values: dict):
+    return value.format(**values) if isinstance(value, str) else value
+
+
+async def capture_plans(database_url: str) -> tuple[dict, list[str]]:
+    """返回 (用例名 -> 执行计划, 被跳过的用例及原因)"""
+    engine = create_database_engine(database_url)
+    async_session_factory.configure(bind=engine)
+    capture = StatementCapture(engine)
+    context = await _sample_context(engine)
+    print(f"数据库: {engine.dialect.name}，订单数: {context['order_count']}")
+
+    results = {}
+    skipped = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://plans"
+    ) as client:
+        for name, role, path, params in CASES:
+            headers = {}
+            if role is not None:
+                headers = context["headers"][role]
+                if headers is None:
+                    skipped.append(f"{name}：数据库中没有 {role} 账号")
+                    print(f"  跳过 {skipped[-1]}")
+                    continue
+            query = {
+                key: _fill(value, context["values"]) for key, value in params.items()
+            }
+            query.setdefault("limit", PAGE_SIZE)
+            capture.start()
+            response = await client.get(
+                _fill(path, context["values"]), params=query, headers=headers
+            )
+            statements = capture.stop()
+            if response.status_code != 200:
+                skipped.append(f"{name}：接口返回 {response.status_code}")
+                print(f"  跳过 {skipped[-1]}")
+                continue
+
+            plans = {}
+            for statement, parameters in statements:
+                key = fingerprint(statement)
+                if key not in plans:
+                    plans[key] = await explain(engine, statement, parameters)
+            results[name] = plans
+    await engine.dispose()
+    return results, skipped
+
+
+def _summary(plan: dict) -> str:
+    parts = [
+        f"{entry['table']}:{entry['access']}"
+        + (f"({entry['key']})" if entry["key"] else "")
+        for entry in plan["plan"]
+    ]
+    if plan["filesort"]:
+        parts.append("filesort")
+    if plan["temporary"]:
+        parts.append("temporary")
+    return " ".join(parts)
+
+
+def print_report(results: dict) -> None:
+    for name, plans in results.items():
+        flagged = [
+            plan
+            for plan in plans.values()
+            if plan["filesort"]
+            or plan["temporary"]
+            or any(entry["full_scan"] for entry in plan["plan"])
+        ]
+        status = f"{len(flagged)} 条全表扫描/排序" if flagged else "ok"
+        print(f"{name:<32}{len(plans):>3} 条语句  {status}")
+        for plan in flagged:
+            print(f"    {_summary(plan)}")
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """与基线相比变差的执行计划"""
+    regressions = []
+    for name, plans in results.items():
+        for key, plan in plans.items():
+            previous = baseline.get(name, {}).get(key)
+            if previous is None:
+                continue
+            scanned_before = {
+                entry["table"] for entry in previous["plan"] if entry["full_scan"]
+            }
+            for entry in plan["plan"]:
+                if entry["full_scan"] and entry["table"] not in scanned_before:
+                    regressions.append(
+                        f"{name}: {entry['table']} 变为全表扫描\n    {key}"
+                    )
+            for flag in ("filesort", "temporary"):
+                if plan[flag] and not previous[flag]:
+                    regressions.append(f"{name}: 新增 {flag}\n    {key}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    results, skipped = await capture_plans(args.database_url or database_url)
+    print()
+    print_report(results)
+    if skipped:
+        # 不完整的结果不能作为基线，也不能判定为通过
+        print(f"\n{len(skipped)} 个用例被跳过，检查不完整:")
+        for line in skipped:
+            print(f"  {line}")
+        return 1
+    if args.save:
+        Path(args.save).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"\n基线已保存到 {args.save}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline)
+        if regressions:
+            print("\n执行计划回归:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n执行计划与基线一致或更优")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="列表接口执行计划检查")
+    parser.add_argument("--database-url", help="默认使用 config.yaml 中的数据库")
+    parser.add_argument("--save", help="将执行计划保存为基线 JSON")
+    parser.add_argument("--baseline", help="与基线 JSON 对比")
+    sys.exit(asyncio.run(main(parser.parse_args())))
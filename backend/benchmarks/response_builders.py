@@ -0,0 +1,350 @@
+"""
+响应构建与校验微基准
+
+覆盖列表接口中占用 CPU 最多的几段代码：
+- OrderResponse.model_validate（含订单项与嵌套菜品）
+- populate_*_response（使用内存中的会话替身，session.get 直接返回对象，不计数据库耗时）
+- PageResponse 泛型响应的校验与序列化（与 FastAPI 处理 response_model 的步骤一致：导出、重新校验、输出 JSON）
+
+每个用例输出每条记录的耗时、峰值内存和分配的内存块数（tracemalloc 统计调用结束时新增且仍存活的块，
+即构建出的响应对象的规模；临时对象只体现在峰值内存中）。
+使用 --save 保存基线，之后用 --baseline 对比，任一指标超过容差即以非零状态退出。
+
+用法:
+    python -m backend.benchmarks.response_builders --save response_builders.json
+    python -m backend.benchmarks.response_builders --baseline response_builders.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from ..models import (
+    Comment,
+    CommentState,
+    Item,
+    Order,
+    OrderItem,
+    OrderState,
+    Store,
+    StoreState,
+    User,
+    UserType,
+)
+from ..routers.comment import populate_comment_response
+from ..routers.item import populate_item_response
+from ..routers.order import populate_order_response
+from ..routers.store import populate_store_response
+from ..schemas import (
+    CommentResponse,
+    ItemResponse,
+    OrderResponse,
+    PageResponse,
+    StoreResponse,
+)
+
+PAGE_SIZES = (10, 100, 1000)
+ORDER_LINES = (1, 5, 20)
+MIN_SECONDS = 0.2  # 每个用例至少运行的时长，耗时取多轮平均
+# 分配次数等确定性指标的容差下限，避免小数值的抖动被判为回归
+MIN_ABSOLUTE_SLACK = 1.0
+
+
+class StubSession:
+    """只实现 get 的会话替身，按 (模型, 主键) 返回预先构造的对象"""
+
+    def __init__(self, objects: list):
+        self._objects = {(type(obj), obj.id): obj for obj in objects}
+
+    async def get(self, model, ident):
+        return self._objects.get((model, ident))
+
+
+class Dataset:
+    """与真实数据形状一致的一组对象：10 个商家、每家 20 个菜品、200 个用户"""
+
+    def __init__(self, stores: int = 10, items_per_store: int = 20, users: int = 200):
+        now = datetime(2025, 1, 1, 11, 30)
+        self.users = [
+            User(
+                id=i + 1,
+                username=f"user{i}",
+                email=f"user{i}@example.com",
+                hashed_password="x",
+                user_type=UserType.CUSTOMER,
+                create_time=now,
+            )
+            for i in range(users)
+        ]
+        self.stores = [
+            Store(
+                id=i + 1,
+                name=f"档口{i}",
+                address=f"一食堂 {i} 号窗口",
+                phone="13800000000",
+                state=StoreState.APPROVED,
+                publish_time=now,
+                owner_id=self.users[i].id,
+            )
+            for i in range(stores)
+        ]
+        self.items = [
+            Item(
+                id=store.id * 1000 + j,
+                name=f"菜品{store.id}-{j}",
+                description="招牌菜",
+                price=12.5,
+                quantity=100,
+                store_id=store.id,
+            )
+            for store in self.stores
+            for j in range(items_per_store)
+        ]
+        self.now = now
+        self.session = StubSession(self.users + self.stores + self.items)
+
+    def orders(self, count: int, lines: int) -> list[Order]:
+        orders = []
+        line_id = 1
+        for i in range(count):
+            store = self.stores[i % len(self.stores)]
+            menu = [item for item in self.items if item.store_id == store.id]
+            order_items = []
+            for j in range(lines):
+                item = menu[j % len(menu)]
+                order_items.append(
+                    OrderItem(
+                        id=line_id,
+                        quantity=1 + j % 3,
+                        item_price=item.price,
+                        order_id=i + 1,
+                        item_id=item.id,
+                        item=item,
+                    )
+                )
+                line_id += 1
+            orders.append(
+                Order(
+                    id=i + 1,
+                    create_time=self.now,
+                    state=OrderState.PENDING,
+                    user_id=self.users[i % len(self.users)].id,
+                    store_id=store.id,
+                    items=order_items,
+                )
+            )
+        return orders
+
+    def comments(self, count: int) -> list[Comment]:
+        return [
+            Comment(
+                id=i + 1,
+                content="味道不错，出餐很快",
+                publish_time=self.now,
+                state=CommentState.APPROVED,
+                user_id=self.users[i % len(self.users)].id,
+                store_id=self.stores[i % len(self.stores)].id,
+            )
+            for i in range(count)
+        ]
+
+    def item_page(self, count: int) -> list[Item]:
+        return [self.items[i % len(self.items)] for i in range(count)]
+
+    def store_page(self, count: int) -> list[Store]:
+        return [self.stores[i % len(self.stores)] for i in range(count)]
+
+
+async def _populate_all(populate, records, session) -> list:
+    # 与路由中的写法一致：每条记录一个协程，asyncio.gather 并发执行
+    return await asyncio.gather(*[populate(record, session) for record in records])
+
+
+def _page_round_trip(response_type, records: list) -> bytes:
+    """模拟 FastAPI 对 response_model 的处理：导出为字典、重新校验、序列化为 JSON"""
+    page = PageResponse[response_type](
+        records=records, total=len(records), current=1, size=len(records)
+    )
+    content = page.model_dump(by_alias=True)
+    return PageResponse[response_type].model_validate(content).model_dump_json()
+
+
+def _build_cases(data: Dataset) -> list[tuple[str, int, object]]:
+    """(用例名, 记录数, 无参可调用对象)；异步用例返回协程"""
+    session = data.session
+    cases = []
+    for size in PAGE_SIZES:
+        for lines in ORDER_LINES:
+            orders = data.orders(size, lines)
+            suffix = f"[{size}x{lines}]"
+            cases.append(
+                (
+                    f"order.model_validate{suffix}",
+                    size,
+                    lambda orders=orders: [
+                        OrderResponse.model_validate(order) for order in orders
+                    ],
+                )
+            )
+            cases.append(
+                (
+                    f"populate_order_response{suffix}",
+                    size,
+                    lambda orders=orders: _populate_all(
+                        populate_order_response, orders, session
+                    ),
+                )
+            )
+            responses = asyncio.run(
+                _populate_all(populate_order_response, orders, session)
+            )
+            cases.append(
+                (
+                    f"PageResponse[OrderResponse]{suffix}",
+                    size,
+                    lambda responses=responses: _page_round_trip(
+                        OrderResponse, responses
+                    ),
+                )
+            )
+
+        for name, populate, records, response_type in (
+            ("item", populate_item_response, data.item_page(size), ItemResponse),
+            ("store", populate_store_response, data.store_page(size), StoreResponse),
+            (
+                "comment",
+                populate_comment_response,
+                data.comments(size),
+                CommentResponse,
+            ),
+        ):
+            cases.append(
+                (
+                    f"populate_{name}_response[{size}]",
+                    size,
+                    lambda populate=populate, records=records: _populate_all(
+                        populate, records, session
+                    ),
+                )
+            )
+            responses = asyncio.run(_populate_all(populate, records, session))
+            cases.append(
+                (
+                    f"PageResponse[{response_type.__name__}][{size}]",
+                    size,
+                    lambda response_type=response_type, responses=responses: (
+                        _page_round_trip(response_type, responses)
+                    ),
+                )
+            )
+    return cases
+
+
+def _call(loop: asyncio.AbstractEventLoop, func):
+    result = func()
+    if asyncio.iscoroutine(result):
+        result = loop.run_until_complete(result)
+    return result
+
+
+def measure(loop: asyncio.AbstractEventLoop, func, records: int) -> dict:
+    # 预热（pydantic 泛型类型构建、缓存等）
+    _call(loop, func)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_traced = tracemalloc.get_traced_memory()[0]
+    result = _call(loop, func)
+    peak = tracemalloc.get_traced_memory()[1] - start_traced
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(
+        max(0, stat.count_diff) for stat in after.compare_to(before, "filename")
+    )
+    del result
+
+    rounds = 0
+    started = time.perf_counter()
+    while True:
+        _call(loop, func)
+        rounds += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_SECONDS:
+            break
+    return {
+        "records": records,
+        "us_per_record": elapsed / rounds / records * 1e6,
+        "peak_bytes_per_record": peak / records,
+        "blocks_per_record": blocks / records,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """返回超出容差的指标说明"""
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("us_per_record", "peak_bytes_per_record", "blocks_per_record"):
+            limit = max(
+                previous[metric] * (1 + tolerance),
+                previous[metric] + MIN_ABSOLUTE_SLACK,
+            )
+            if stats[metric] > limit:
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]:.2f} -> {stats[metric]:.2f}"
+                )
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    data = Dataset()
+    loop = asyncio.new_event_loop()
+    results = {}
+    print(f"{'case':<42}{'us/record':>12}{'peak B/rec':>12}{'blocks/rec':>12}")
+    try:
+        for name, records, func in _build_cases(data):
+            if args.filter and args.filter not in name:
+                continue
+            stats = results[name] = measure(loop, func, records)
+            print(
+                f"{name:<42}{stats['us_per_record']:>12.2f}"
+                f"{stats['peak_bytes_per_record']:>12.0f}"
+                f"{stats['blocks_per_record']:>12.1f}"
+            )
+    finally:
+        loop.close()
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n基线已保存到 {args.save}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n超出容差 {args.tolerance:.0%} 的指标:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n所有指标均在基线容差 {args.tolerance:.0%} 以内")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="响应构建与校验微基准")
+    parser.add_argument("--filter", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--save", help="将结果保存为基线 JSON")
+    parser.add_argument("--baseline", help="与基线 JSON 对比")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="允许的回归比例（默认 0.2）"
+    )
+    sys.exit(main(parser.parse_args()))
@@ -1,15 +1,19 @@
 """配置文件管理模块"""
 
-import yaml
+import os
 from pathlib import Path
 from typing import Any
 
-# 配置文件路径
-CONFIG_FILE = Path(__file__).parent / "config.yaml"
+# 配置文件路径，可通过环境变量 ORDER_SYSTEM_CONFIG 指定其他文件（如压测、本地调试）
+CONFIG_FILE = Path(
+    os.environ.get("ORDER_SYSTEM_CONFIG") or Path(__file__).parent / "config.yaml"
+)
 
 
 def load_config() -> dict[str, Any]:
     """加载配置文件"""
+    import yaml
+
     if not CONFIG_FILE.exists():
         raise FileNotFoundError(f"配置文件不存在: {CONFIG_FILE}")
 
@@ -1,10 +1,33 @@
+from collections import deque
 from contextlib import asynccontextmanager
-from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import create_async_engine
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import Select, event, make_url, text
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from fastapi import FastAPI
+import asyncio
+import itertools
+import logging
+import os
+import tempfile
+import time
 import urllib.parse
+import weakref
 
 from .config import get_config
+from .migrations import apply_migrations, check_schema_version
+from .utils.loop_lag import start_loop_lag_monitor, stop_loop_lag_monitor
+from .utils.metrics import Counter, Gauge
+from .utils.query_stats import install_query_hooks, start_query_log, stop_query_log
 
 # 从配置文件读取数据库配置
 config = get_config()
@@ -16,33 +39,473 @@ DB_HOST = db_config["host"]
 DB_PORT = db_config["port"]
 DB_NAME = db_config["name"]
 
-# 仅对密码进行转义
-escaped_password = urllib.parse.quote_plus(DB_PASS)
+# 连接池配置
+DB_POOL_SIZE = db_config.get("pool_size", 10)
+DB_MAX_OVERFLOW = db_config.get("max_overflow", 10)
+DB_POOL_TIMEOUT = db_config.get("pool_timeout", 10)
+DB_POOL_RECYCLE = db_config.get("pool_recycle", 1800)
+DB_POOL_PRE_PING = db_config.get("pool_pre_ping", True)
+DB_ECHO = db_config.get("echo", False)
 
-# 使用 f-string 安全地构建连接字符串
-mysql_url = (
-    f"mysql+asyncmy://{DB_USER}:{escaped_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
+# 从库配置：只读会话的查询发往延迟在阈值内的从库，写入后短时间内该用户的读请求仍走主库
+DB_REPLICAS = db_config.get("replicas") or []
+REPLICA_MAX_LAG_SECONDS = db_config.get("replica_max_lag_seconds", 5)
+REPLICA_CHECK_INTERVAL = db_config.get("replica_check_interval_seconds", 5)
+READ_YOUR_WRITES_SECONDS = db_config.get("read_your_writes_seconds", 10)
+
+# SQLite 连接参数（仅在使用 sqlite+aiosqlite 时生效）
+sqlite_config = db_config.get("sqlite", {})
+SQLITE_JOURNAL_MODE = sqlite_config.get("journal_mode", "wal")
+SQLITE_SYNCHRONOUS = sqlite_config.get("synchronous", "normal")
+SQLITE_BUSY_TIMEOUT_MS = sqlite_config.get("busy_timeout_ms", 5000)
+SQLITE_FOREIGN_KEYS = sqlite_config.get("foreign_keys", True)
+
+logger = logging.getLogger(__name__)
+
+
+def _build_mysql_url(settings: dict) -> str:
+    """按配置构建 MySQL 连接字符串，未填写的字段沿用主库配置"""
+    user = settings.get("user", DB_USER)
+    # 仅对密码进行转义
+    password = urllib.parse.quote_plus(settings.get("password", DB_PASS))
+    host = settings.get("host", DB_HOST)
+    port = settings.get("port", DB_PORT)
+    name = settings.get("name", DB_NAME)
+    return f"mysql+asyncmy://{user}:{password}@{host}:{port}/{name}"
 
-print(f"构建的URL: {mysql_url}")
+
+# 连接字符串优先级：环境变量 ORDER_SYSTEM_DATABASE_URL > 配置 url > 按各字段构建的 MySQL 连接
+database_url = (
+    os.environ.get("ORDER_SYSTEM_DATABASE_URL")
+    or db_config.get("url")
+    or _build_mysql_url(db_config)
+)
 
 engine = None
 
 
+@dataclass
+class WriteMarker:
+    """写后读一致标记：客户端带来的最近写入时刻，以及本请求中写入提交的时刻
+
+    标记随客户端传递（Cookie 或 X-Last-Write 头），多进程、多实例部署时
+    下一个请求无论落在哪个 worker 上都能据此走主库。
+    """
+
+    client_last_write: float | None = None
+    wrote_at: float | None = None
+
+    def recently_wrote(self) -> bool:
+        if self.wrote_at is not None:
+            return True
+        return (
+            self.client_last_write is not None
+            and time.time() - self.client_last_write < READ_YOUR_WRITES_SECONDS
+        )
+
+
+# 由 ReadYourWritesMiddleware 按请求设置
+write_marker: ContextVar[WriteMarker | None] = ContextVar("write_marker", default=None)
+
+
+@dataclass
+class Replica:
+    name: str
+    url: str
+    engine: AsyncEngine | None = None
+    lag: float | None = None  # 复制延迟（秒），None 表示不可用
+    checked_at: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= REPLICA_MAX_LAG_SECONDS
+
+
+replicas: list[Replica] = []
+_replica_cycle = itertools.count()
+_replica_monitor: asyncio.Task | None = None
+
+
+def _choose_replica() -> Replica | None:
+    """轮询选择一个健康的从库；客户端刚写入过数据时返回 None（走主库）"""
+    marker = write_marker.get()
+    if marker is not None and marker.recently_wrote():
+        return None
+    healthy = [replica for replica in replicas if replica.healthy]
+    if not healthy:
+        return None
+    return healthy[next(_replica_cycle) % len(healthy)]
+
+
+class RoutingSession(Session):
+    """读写分离会话：只读会话中的 SELECT 发往从库，其余语句发往主库"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.info.get("read_only")
+            and not self._flushing
+            and isinstance(clause, Select)
+        ):
+            # 每个会话只选择一次，同一请求中的计数查询和分页查询读到同一个从库
+            if "replica" not in self.info:
+                self.info["replica"] = _choose_replica()
+            replica = self.info["replica"]
+            if replica is not None and replica.engine is not None:
+                return replica.engine.sync_engine
+        if engine is None:
+            return super().get_bind(mapper, clause=clause, **kw)
+        return engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    if session.info.pop("wrote", False):
+        marker = write_marker.get()
+        if marker is not None:
+            marker.wrote_at = time.time()
+
+
+# 全局会话工厂，引擎创建后在 lifespan 中绑定
+async_session_factory = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
+)
+
+
+class PoolMetrics:
+    """连接获取耗时统计（含池内无空闲连接时新建连接的时间）"""
+
+    def __init__(self, sample_size: int = 2048):
+        self._recent_waits: deque[float] = deque(maxlen=sample_size)
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent_waits.clear()
+
+    def record(self, wait: float, timed_out: bool) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent_waits.append(wait)
+        if timed_out:
+            self.timeouts += 1
+
+    def percentile(self, percent: float) -> float:
+        if not self._recent_waits:
+            return 0.0
+        ordered = sorted(self._recent_waits)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录每次获取连接等待时间的连接池"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_metrics.record(time.perf_counter() - start, timed_out)
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def _remove_sqlite_files(path: str) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA foreign_keys={'ON' if SQLITE_FOREIGN_KEYS else 'OFF'}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.close()
+
+
+def create_database_engine(url: str, instrumented: bool = False) -> AsyncEngine:
+    """按连接字符串创建引擎
+
+    - MySQL 等使用连接池配置；instrumented 为 True 时统计获取连接的等待时间
+    - SQLite 文件库在每个连接上设置 WAL、busy_timeout 等 PRAGMA
+    - SQLite 内存库（sqlite+aiosqlite:// 或 :memory:）改用该引擎独占的临时文件库，
+      与文件库一样使用连接池（各会话的事务互不交错），引擎释放或进程退出后删除文件
+    """
+    parsed = make_url(url)
+    temp_path = None
+    if parsed.get_backend_name() == "sqlite" and _is_sqlite_memory(parsed):
+        fd, temp_path = tempfile.mkstemp(prefix="ordersystem-", suffix=".db")
+        os.close(fd)
+        parsed = parsed.set(database=temp_path, query={})
+    options: dict = {
+        "echo": DB_ECHO,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if instrumented:
+        options["poolclass"] = InstrumentedQueuePool
+    new_engine = create_async_engine(parsed, **options)
+    if parsed.get_backend_name() == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    if temp_path is not None:
+        weakref.finalize(new_engine.sync_engine, _remove_sqlite_files, temp_path)
+    return new_engine
+
+
+async def init_engine() -> AsyncEngine:
+    """创建主库引擎、绑定会话工厂并检查表结构版本（服务启动和独立脚本共用）
+
+    表结构由 python -m backend.migrate 显式迁移，这里只读取 schema_version；
+    SQLite 内存库（临时文件库）每次启动都是空库，直接执行全部迁移。
+    """
+    global engine
+    engine = create_database_engine(database_url, instrumented=True)
+    install_query_hooks(engine)
+    async_session_factory.configure(bind=engine)
+    parsed = make_url(database_url)
+    if parsed.get_backend_name() == "sqlite" and _is_sqlite_memory(parsed):
+        await apply_migrations(engine)
+    version = await check_schema_version(engine)
+    logger.info("数据库结构版本: %s", version)
+    return engine
+
+
+async def dispose_engine() -> None:
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
 async def get_engine():
     if engine is None:
         raise Exception("数据库引擎未初始化")
     return engine
 
 
+def _collect_pool_connections() -> dict:
+    if engine is None:
+        return {}
+    stats = get_pool_stats()
+    return {
+        ("in_use",): stats["checked_out"],
+        ("idle",): stats["checked_in"],
+        ("overflow",): stats["overflow"],
+    }
+
+
+Gauge(
+    "db_pool_connections",
+    "主库连接池连接数（in_use/idle/overflow）",
+    ("state",),
+    collect=_collect_pool_connections,
+)
+Gauge(
+    "db_pool_max_connections",
+    "主库连接池允许的最大连接数（pool_size + max_overflow）",
+    collect=lambda: {(): DB_POOL_SIZE + DB_MAX_OVERFLOW},
+)
+Counter(
+    "db_pool_checkouts_total",
+    "获取连接的次数",
+    collect=lambda: {(): pool_metrics.checkouts},
+)
+Counter(
+    "db_pool_checkout_timeouts_total",
+    "获取连接超时的次数",
+    collect=lambda: {(): pool_metrics.timeouts},
+)
+Counter(
+    "db_pool_checkout_wait_seconds_total",
+    "获取连接的累计等待时间",
+    collect=lambda: {(): pool_metrics.total_wait},
+)
+Gauge(
+    "db_replica_lag_seconds",
+    "从库复制延迟（不可用时为 -1）",
+    ("replica",),
+    collect=lambda: {
+        (replica.name,): -1 if replica.lag is None else replica.lag
+        for replica in replicas
+    },
+)
+
+
+async def _measure_replica_lag(replica: Replica) -> float | None:
+    """查询从库复制延迟；非 MySQL 从库（如本地 SQLite 替身）只检查连通性"""
+    assert replica.engine is not None
+    async with replica.engine.connect() as conn:
+        if replica.engine.dialect.name != "mysql":
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+        try:
+            result = await conn.execute(text("SHOW REPLICA STATUS"))
+            lag_column = "Seconds_Behind_Source"
+        except DBAPIError:
+            # MySQL 8.0.22 之前的版本
+            result = await conn.execute(text("SHOW SLAVE STATUS"))
+            lag_column = "Seconds_Behind_Master"
+        row = result.mappings().first()
+        if row is None:
+            return 0.0
+        lag = row.get(lag_column)
+        # 复制线程停止时延迟为 NULL，视为不可用
+        return None if lag is None else float(lag)
+
+
+async def check_replicas() -> None:
+    for replica in replicas:
+        try:
+            replica.lag = await _measure_replica_lag(replica)
+        except (SQLAlchemyError, OSError) as exc:
+            if replica.lag is not None:
+                logger.warning("从库 %s 不可用: %s", replica.name, exc)
+            replica.lag = None
+        replica.checked_at = time.time()
+
+
+async def _monitor_replicas() -> None:
+    while True:
+        await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+        await check_replicas()
+
+
+async def start_replicas() -> None:
+    global _replica_monitor
+    for settings in DB_REPLICAS:
+        url = settings.get("url") or _build_mysql_url(settings)
+        name = make_url(url).render_as_string(hide_password=True)
+        replica = Replica(name=name, url=url)
+        replica.engine = create_database_engine(url)
+        install_query_hooks(replica.engine)
+        replicas.append(replica)
+    if replicas:
+        await check_replicas()
+        _replica_monitor = asyncio.create_task(_monitor_replicas())
+
+
+async def stop_replicas() -> None:
+    global _replica_monitor
+    if _replica_monitor is not None:
+        _replica_monitor.cancel()
+        await asyncio.gather(_replica_monitor, return_exceptions=True)
+        _replica_monitor = None
+    for replica in replicas:
+        if replica.engine is not None:
+            await replica.engine.dispose()
+    replicas.clear()
+
+
+def get_replica_stats() -> list[dict]:
+    return [
+        {
+            "name": replica.name,
+            "healthy": replica.healthy,
+            "lag_seconds": replica.lag,
+            "checked_at": replica.checked_at,
+        }
+        for replica in replicas
+    ]
+
+
+def get_pool_stats() -> dict:
+    """连接池当前使用情况和获取连接的等待时间（毫秒）"""
+    if engine is None:
+        raise Exception("数据库引擎未初始化")
+    pool = engine.pool
+    stats = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "checked_out": 0,
+        "checked_in": 0,
+        "overflow": 0,
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(0, pool.overflow()),
+        )
+    stats.update(
+        checkouts=pool_metrics.checkouts,
+        timeouts=pool_metrics.timeouts,
+        wait_avg_ms=(
+            pool_metrics.total_wait / pool_metrics.checkouts * 1000
+            if pool_metrics.checkouts
+            else 0.0
+        ),
+        wait_p50_ms=pool_metrics.percentile(50) * 1000,
+        wait_p99_ms=pool_metrics.percentile(99) * 1000,
+        wait_max_ms=pool_metrics.max_wait * 1000,
+    )
+    return stats
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global engine
-    engine = create_async_engine(mysql_url, echo=True, pool_pre_ping=True)
-    if engine is None:
-        raise Exception("无法创建数据库引擎")
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
-    # SQLModel.metadata.create_all(engine.sync_engine)
+    # 后台子系统只在服务启动时用到，独立脚本导入本模块时不加载
+    from .utils.outbox import start_outbox_workers, stop_outbox_workers
+    from .utils.principal_changes import principal_changes
+    from .utils.token_revocation import revocation_list
+    from .utils.verification import get_verification_store
+    from .utils.warmup import install_drain_handler, set_ready, warm_up
+
+    start_query_log()
+    start_loop_lag_monitor()
+    engine = await init_engine()
+    logger.info(
+        "数据库: %s", make_url(database_url).render_as_string(hide_password=True)
+    )
+    start_outbox_workers(engine)
+    get_verification_store().start(engine)
+    await revocation_list.start(engine)
+    await principal_changes.start(engine)
+    await start_replicas()
+    await warm_up(
+        app, [engine] + [replica.engine for replica in replicas if replica.engine]
+    )
+    set_ready(True)
+    install_drain_handler()
     yield
-    await engine.dispose()
+    # 先标记为未就绪，负载均衡据此停止分配新请求
+    set_ready(False)
+    await stop_replicas()
+    await principal_changes.stop()
+    await revocation_list.stop()
+    await get_verification_store().stop()
+    await stop_outbox_workers()
+    await dispose_engine()
+    await stop_loop_lag_monitor()
+    stop_query_log()
@@ -1,91 +1,248 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime
 from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 import jwt
-from .database import get_engine
-from .models import User, UserType
+from .config import get_config
+from .database import async_session_factory
+from .models import Store, StoreState, User, UserType
 from .security import SECRET_KEY, ALGORITHM
+from .utils.cache import TTLCache
+from .utils.principal_changes import principal_changes
+from .utils.token_revocation import revocation_list
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login/token")
 
+# 认证缓存配置
+auth_cache_config = get_config().get("auth_cache", {})
+AUTH_CACHE_MAX_SIZE = auth_cache_config.get("max_size", 10000)
+AUTH_CACHE_TTL_SECONDS = auth_cache_config.get("ttl_seconds", 60)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """已认证用户的精简身份信息（商家附带店铺ID和状态）"""
+
+    id: int
+    user_type: UserType
+    store_id: int | None = None
+    store_state: StoreState | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class VendorStore:
+    """商家店铺上下文（由身份缓存解析，无需查询数据库）"""
+
+    id: int
+    state: StoreState
+    owner_id: int
+
+
+# 访问令牌 -> (用户ID, 签发时刻)，条目有效期不超过令牌本身的过期时间
+_token_cache: TTLCache[str, tuple[int, float | None]] = TTLCache(
+    AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL_SECONDS
+)
+# 用户ID -> Principal
+_principal_cache: TTLCache[int, Principal] = TTLCache(
+    AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL_SECONDS
+)
+
+
+def _drop_principal(user_id: int) -> None:
+    _principal_cache.pop(user_id)
+
+
+# 其他进程发布的身份变更在下一次同步时到达
+principal_changes.on_change(_drop_principal)
+
+
+async def invalidate_principal(session: AsyncSession, *user_ids: int | None) -> None:
+    """用户角色、店铺归属或店铺状态变更（已提交）后使缓存的身份失效
+
+    只在 Principal 中的字段实际变化时调用，普通资料修改不需要。本进程立即生效；
+    其他进程在下一次同步（auth_cache.sync_interval_seconds）后生效。
+    """
+    await principal_changes.publish(session, *user_ids)
+
 
 async def get_session():
     """获取数据库会话"""
-    engine = await get_engine()
-    async_session = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with async_session_factory() as session:
         yield session
 
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep
-) -> User:
-    """获取当前登录用户"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="无法验证凭证",
-        headers={"WWW-Authenticate": "Bearer"},
+async def get_read_session():
+    """获取只读数据库会话，查询优先发往从库（未配置从库时等同于主库会话）"""
+    async with async_session_factory(info={"read_only": True}) as session:
+        yield session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+def _decode_token(token: str) -> int | None:
+    """解析访问令牌，返回用户ID；用户吊销令牌前签发的令牌视为无效
+
+    刷新令牌（type=refresh 或带 jti/fam）不能当作访问令牌使用，
+    否则已轮换或整个家族被吊销的刷新令牌在过期前仍可访问接口。
+    """
+    decoded = _token_cache.get(token)
+    if decoded is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            subject = payload.get("sub")
+            if subject is None:
+                return None
+            if payload.get("type") == "refresh" or "jti" in payload or "fam" in payload:
+                return None
+            decoded = (int(subject), payload.get("iat"))
+        except (jwt.InvalidTokenError, ValueError):
+            return None
+
+        exp = payload.get("exp")
+        if exp is not None:
+            remaining = exp - datetime.now(UTC).timestamp()
+            _token_cache.set(token, decoded, ttl=remaining)
+
+    user_id, issued_at = decoded
+    if revocation_list.issued_before_revocation(user_id, issued_at):
+        return None
+    return user_id
+
+
+async def _load_principal(session: AsyncSession, user_id: int) -> Principal | None:
+    """从数据库加载用户身份（缓存未命中时）"""
+    user = await session.get(User, user_id)
+    if user is None or user.id is None:
+        return None
+
+    store_id = None
+    store_state = None
+    if user.user_type == UserType.VENDOR:
+        statement = select(Store.id, Store.state).where(Store.owner_id == user.id)
+        row = (await session.execute(statement)).first()
+        if row:
+            store_id, store_state = row
+
+    return Principal(
+        id=user.id,
+        user_type=user.user_type,
+        store_id=store_id,
+        store_state=store_state,
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except jwt.InvalidTokenError:
-        raise credentials_exception
-
-    user = await session.get(User, int(user_id))
-    if user is None:
-        raise credentials_exception
 
-    # 确保用户ID存在（从数据库加载的用户必然有ID）
-    if user.id is None:
-        raise credentials_exception
 
+async def authenticate_token(token: str, session: AsyncSession) -> Principal | None:
+    """解析访问令牌并返回身份信息（优先读取缓存），令牌无效时返回 None"""
+    user_id = _decode_token(token)
+    if user_id is None:
+        return None
+
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        principal = await _load_principal(session, user_id)
+        if principal is None:
+            return None
+        _principal_cache.set(user_id, principal)
+    return principal
+
+
+async def get_current_principal(
+    token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep
+) -> Principal:
+    """获取当前登录用户的身份信息（优先读取缓存，不访问数据库）"""
+    principal = await authenticate_token(token, session)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无法验证凭证",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return principal
+
+
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
+
+async def get_current_user(principal: CurrentPrincipal, session: SessionDep) -> User:
+    """获取当前登录用户的完整数据库记录"""
+    user = await session.get(User, principal.id)
+    if user is None:
+        _drop_principal(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无法验证凭证",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-async def get_current_admin(current_user: CurrentUser) -> User:
+async def get_current_admin(principal: CurrentPrincipal) -> Principal:
     """验证当前用户是否为管理员"""
-    if current_user.user_type != UserType.ADMIN:
+    if principal.user_type != UserType.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限"
         )
-    return current_user
+    return principal
 
 
-CurrentAdmin = Annotated[User, Depends(get_current_admin)]
+CurrentAdmin = Annotated[Principal, Depends(get_current_admin)]
 
 
-async def get_current_vendor(current_user: CurrentUser) -> User:
+async def get_current_vendor(principal: CurrentPrincipal) -> Principal:
     """验证当前用户是否为商家"""
-    if current_user.user_type != UserType.VENDOR:
+    if principal.user_type != UserType.VENDOR:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="需要商家权限"
         )
-    return current_user
+    return principal
 
 
-CurrentVendor = Annotated[User, Depends(get_current_vendor)]
+CurrentVendor = Annotated[Principal, Depends(get_current_vendor)]
 
 
-async def get_current_customer(current_user: CurrentUser) -> User:
+async def get_current_customer(principal: CurrentPrincipal) -> Principal:
     """验证当前用户是否为普通用户"""
-    if current_user.user_type != UserType.CUSTOMER:
+    if principal.user_type != UserType.CUSTOMER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="需要普通用户权限"
         )
-    return current_user
+    return principal
+
+
+CurrentCustomer = Annotated[Principal, Depends(get_current_customer)]
+
+
+def require_approved_store(principal: Principal, action: str = "管理店铺") -> int:
+    """校验商家已提交且审核通过店铺信息，返回店铺ID"""
+    if principal.store_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="商家尚未提交商家信息，请先完成商家注册",
+        )
+    if principal.store_state != StoreState.APPROVED:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"商家信息未审核通过，暂无法{action}",
+        )
+    return principal.store_id
+
+
+async def get_current_vendor_store(vendor: CurrentVendor) -> VendorStore:
+    """获取当前商家已审核通过的店铺"""
+    store_id = require_approved_store(vendor)
+    return VendorStore(id=store_id, state=StoreState.APPROVED, owner_id=vendor.id)
 
 
-CurrentCustomer = Annotated[User, Depends(get_current_customer)]
+CurrentVendorStore = Annotated[VendorStore, Depends(get_current_vendor_store)]
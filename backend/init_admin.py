@@ -3,21 +3,23 @@
 """
 
 import asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlmodel import select
-from .database import get_engine
+from .database import async_session_factory, dispose_engine, init_engine
 from .models import User, UserType
 from .security import get_password_hash
 
 
 async def create_default_admin():
     """创建默认管理员账户"""
-    engine = await get_engine()
-    async_session = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    await init_engine()
+    try:
+        await _create_default_admin()
+    finally:
+        await dispose_engine()
 
-    async with async_session() as session:
+
+async def _create_default_admin():
+    async with async_session_factory() as session:
         # 检查是否已存在管理员
         statement = select(User).where(User.user_type == UserType.ADMIN)
         existing_admin = (await session.execute(statement)).scalars().first()
@@ -1,21 +1,9 @@
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import traceback
 
-from .database import lifespan
-from .routers import auth, user, store, item, order, comment, stats
-
-app = FastAPI(
-    title="食堂餐点预定系统",
-    description="食堂餐点预定系统接口",
-    version="1.0.0",
-    lifespan=lifespan,
-)
-
 
 # 全局异常处理器
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """捕获所有未处理的异常并返回详细错误信息"""
     error_detail = {
@@ -31,39 +19,117 @@ async def global_exception_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content=error_detail)
 
 
-# 配置CORS中间件
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# 注册路由
-app.include_router(auth.router)
-app.include_router(user.router)
-app.include_router(store.router)
-app.include_router(item.router)
-app.include_router(order.router)
-app.include_router(comment.router)
-app.include_router(stats.router)
-
-
-@app.get("/")
-async def root():
-    return {
-        "message": "Welcome to the Canteen Meal Reservation System API",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "redoc": "/redoc",
-    }
+def create_app() -> FastAPI:
+    """创建应用实例
+
+    路由、中间件和各子系统在这里才导入，import backend.main 本身只加载 FastAPI；
+    多进程部署时可用 uvicorn backend.main:create_app --factory 在每个 worker 中各自创建。
+    """
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from .database import DB_REPLICAS, lifespan
+    from .middleware import (
+        MemoryMiddleware,
+        MetricsMiddleware,
+        ProfilerMiddleware,
+        QueryStatsMiddleware,
+        ReadYourWritesMiddleware,
+    )
+    from .routers import admin, auth, comment, item, order, stats, store, user
+    from .utils.health import check_readiness
+    from .utils.metrics import METRICS_ENABLED, render_metrics
+    from .utils.profiler import PROFILER_ENABLED
+    from .utils.query_stats import REQUEST_QUERY_STATS
+
+    app = FastAPI(
+        title="食堂餐点预定系统",
+        description="食堂餐点预定系统接口",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    # 配置CORS中间件
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Last-Write"],
+    )
+
+    # 配置了从库时，按客户端带回的最近写入时刻把写后读请求路由到主库
+    if DB_REPLICAS:
+        app.add_middleware(ReadYourWritesMiddleware)
+
+    # 按请求统计 SQL 条数和耗时
+    if REQUEST_QUERY_STATS:
+        app.add_middleware(QueryStatsMiddleware)
+
+    # tracemalloc 追踪期间按路由记录内存增长（由 /admin/memory 开启）
+    app.add_middleware(MemoryMiddleware)
+
+    # 管理员按需采样分析（X-Profile 请求头）
+    if PROFILER_ENABLED:
+        app.add_middleware(ProfilerMiddleware)
+
+    # 请求指标（最外层，包含其他中间件的耗时）
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # 注册路由
+    app.include_router(auth.router)
+    app.include_router(user.router)
+    app.include_router(store.router)
+    app.include_router(item.router)
+    app.include_router(order.router)
+    app.include_router(comment.router)
+    app.include_router(stats.router)
+    app.include_router(admin.router)
+
+    @app.get("/")
+    async def root():
+        return {
+            "message": "Welcome to the Canteen Meal Reservation System API",
+            "version": "1.0.0",
+            "docs": "/docs",
+            "redoc": "/redoc",
+        }
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus 指标"""
+        return PlainTextResponse(
+            render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    # /health 兼容旧配置，与 /health/live 为同一接口
+    @app.get("/health")
+    @app.get("/health/live")
+    async def liveness_check():
+        """存活检查：进程能处理请求即返回 200，不访问数据库"""
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def readiness_check():
+        """就绪检查：依赖不可用或过载时返回 503，负载均衡据此摘除该实例"""
+        ready, checks = await check_readiness()
+        return JSONResponse(
+            status_code=200 if ready else 503,
+            content={"status": "ready" if ready else "not_ready", "checks": checks},
+        )
+
+    return app
 
 
-@app.get("/health")
-async def health_check():
-    """健康检查接口"""
-    return {"status": "healthy"}
+def __getattr__(name: str):
+    # 兼容 uvicorn backend.main:app 和 from backend.main import app：首次访问时创建
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+"""ASGI 中间件"""
+
+import time
+import tracemalloc
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .database import (
+    READ_YOUR_WRITES_SECONDS,
+    WriteMarker,
+    async_session_factory,
+    write_marker,
+)
+from .dependencies import authenticate_token
+from .models import UserType
+from .utils.memory import record_route_memory
+from .utils.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+from .utils.profiler import PROFILE_FORMATS, start_profiler, stop_profiler
+from .utils.query_stats import report_repeated_queries, track_queries
+from .utils.warmup import is_warming_up
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+LAST_WRITE_COOKIE = "last_write"
+
+
+def _last_write(scope: Scope) -> float | None:
+    """客户端带来的最近写入时刻：X-Last-Write 头优先，其次为 last_write Cookie"""
+    value = _header(scope, b"x-last-write")
+    if value is None:
+        cookie = _header(scope, b"cookie") or ""
+        for part in cookie.split(";"):
+            name, _, cookie_value = part.strip().partition("=")
+            if name == LAST_WRITE_COOKIE:
+                value = cookie_value
+                break
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """写后读一致：请求中有写入提交时，响应附带最近写入时刻（Set-Cookie 和 X-Last-Write 头）；
+    客户端随后的请求带回该时刻，read_your_writes_seconds 内的只读查询走主库。
+
+    标记保存在客户端而非进程内，多 worker 部署时下一个请求落在任何 worker 上都生效。
+    浏览器需携带 Cookie（credentials: include），其他客户端可回传 X-Last-Write 头。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        marker = WriteMarker(client_last_write=_last_write(scope))
+        token = write_marker.set(marker)
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start" and marker.wrote_at:
+                headers = MutableHeaders(scope=message)
+                value = f"{marker.wrote_at:.3f}"
+                headers.append("X-Last-Write", value)
+                headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={value}; Max-Age={READ_YOUR_WRITES_SECONDS}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            write_marker.reset(token)
+
+
+class QueryStatsMiddleware:
+    """统计每个请求执行的 SQL 条数和耗时，写入 Server-Timing 响应头，并记录疑似 N+1 的请求
+
+    启动预热的请求不统计。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or is_warming_up():
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f"db;dur={stats.total * 1000:.2f};"
+                        f'desc="{stats.count} queries, '
+                        f'{len(stats.fingerprints)} distinct"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        report_repeated_queries(scope["method"], scope["path"], stats)
+
+
+class MetricsMiddleware:
+    """记录请求数、状态码、耗时和并发请求数；路由标签使用路径模板，避免 ID 造成标签爆炸
+
+    启动预热的请求不计入。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or is_warming_up():
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_duration_seconds.observe(duration, method, route_path)
+            http_requests_total.inc(method, route_path, str(status_code))
+
+
+class MemoryMiddleware:
+    """tracemalloc 追踪期间按路由记录请求前后已追踪内存的差值；未追踪时直接放行
+
+    差值为进程级数据，并发请求的分配会互相计入，需结合请求数看平均值。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracemalloc.is_tracing() or is_warming_up():
+            await self.app(scope, receive, send)
+            return
+
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tracemalloc.is_tracing():
+                route_path = getattr(scope.get("route"), "path", "unmatched")
+                record_route_memory(
+                    scope["method"],
+                    route_path,
+                    tracemalloc.get_traced_memory()[0] - before,
+                )
+
+
+class ProfilerMiddleware:
+    """管理员请求带 X-Profile 头（collapsed 或 speedscope）时对该请求采样，
+    以分析结果代替原响应返回，原状态码放在 X-Profiled-Status 头中。
+
+    未带该头的请求只多一次请求头查找。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fmt = _header(scope, b"x-profile")
+        if fmt is None or not await _is_admin_request(scope):
+            await self.app(scope, receive, send)
+            return
+        if fmt not in PROFILE_FORMATS:
+            fmt = "collapsed"
+
+        profiler = start_profiler()
+        if profiler is None:
+            # 已有分析在进行，按普通请求处理
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def discard_response(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            profile = stop_profiler(profiler)
+
+        name = f"{scope['method']} {scope['path']}"
+        response = Response(
+            profile.export(fmt, name),
+            media_type=PROFILE_FORMATS[fmt],
+            headers={
+                "X-Profiled-Status": str(status_code),
+                "X-Profile-Samples": str(profile.sample_count),
+            },
+        )
+        await response(scope, receive, send)
+
+
+async def _is_admin_request(scope: Scope) -> bool:
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    async with async_session_factory() as session:
+        principal = await authenticate_token(authorization[7:], session)
+    return principal is not None and principal.user_type == UserType.ADMIN
@@ -0,0 +1,48 @@
+"""
+数据库结构迁移命令
+
+用法:
+    python -m backend.migrate            # 执行全部未应用的迁移
+    python -m backend.migrate --to 1     # 只迁移到指定版本
+    python -m backend.migrate --status   # 查看当前版本和待执行的迁移
+    python -m backend.migrate --database-url sqlite+aiosqlite:///./ordersystem.db
+"""
+
+import argparse
+import asyncio
+import logging
+
+from .database import create_database_engine, database_url
+from .migrations import apply_migrations, get_schema_version, load_migrations
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_database_engine(args.database_url or database_url)
+    try:
+        if args.status:
+            async with engine.connect() as conn:
+                current = await get_schema_version(conn) or 0
+            print(f"当前版本: {current}")
+            pending = [m for m in load_migrations() if m.version > current]
+            for migration in pending:
+                print(f"  待执行 {migration.version:04d}: {migration.description}")
+            if not pending:
+                print("已是最新版本")
+            return
+
+        applied = await apply_migrations(engine, args.to)
+        if applied:
+            print(f"已执行 {len(applied)} 个迁移，当前版本 {applied[-1].version}")
+        else:
+            print("已是最新版本，无需迁移")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据库结构迁移")
+    parser.add_argument("--database-url", help="默认使用 config.yaml 中的数据库")
+    parser.add_argument("--to", type=int, help="迁移到的目标版本，默认最新")
+    parser.add_argument("--status", action="store_true", help="只显示迁移状态")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(main(parser.parse_args()))
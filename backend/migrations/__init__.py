@@ -0,0 +1,179 @@
+"""数据库结构迁移
+
+每个迁移是本目录下名为 v<版本号>_<说明>.py 的模块，定义:
+- DESCRIPTION: 一句话说明
+- async def upgrade(conn: AsyncConnection) -> None
+
+已执行的版本记录在 schema_version 表中。服务启动时只检查版本（check_schema_version），
+迁移由 python -m backend.migrate 显式执行。
+
+迁移必须可重复执行：中途失败后重新运行时跳过已完成的步骤；
+同时要兼容由旧版 init.sql 或旧版 create_all 建出的库（所需的列和索引可能已经存在或缺失）。
+已发布的迁移中的表结构须自行定义（固定的 Table 或 DDL），不能引用会继续变化的模型。
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    insert,
+    inspect,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+migrations_config = get_config().get("migrations", {})
+# MySQL 执行 DDL 前等待元数据锁的最长秒数，超时即失败而不是让后续查询排队
+LOCK_WAIT_TIMEOUT_SECONDS = migrations_config.get("lock_wait_timeout_seconds", 10)
+
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Integer, nullable=False),
+)
+
+_MODULE_NAME = re.compile(r"^v(\d+)_")
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[AsyncConnection], Awaitable[None]]
+
+
+def load_migrations() -> list[Migration]:
+    """按版本号排序的全部迁移"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match is None:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(Migration(int(match[1]), module.DESCRIPTION, module.upgrade))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"迁移版本号重复: {versions}")
+    return migrations
+
+
+def latest_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+async def get_schema_version(conn: AsyncConnection) -> int | None:
+    """当前数据库结构版本；没有 schema_version 表时返回 None"""
+    exists = await conn.run_sync(
+        lambda sync_conn: inspect(sync_conn).has_table(schema_version_table.name)
+    )
+    if not exists:
+        return None
+    version = (
+        await conn.execute(select(func.max(schema_version_table.c.version)))
+    ).scalar()
+    return version or 0
+
+
+async def check_schema_version(engine: AsyncEngine) -> int:
+    """启动时检查数据库结构版本，低于代码所需版本时拒绝启动"""
+    async with engine.connect() as conn:
+        current = await get_schema_version(conn)
+    required = latest_version()
+    if current is None or current < required:
+        raise RuntimeError(
+            f"数据库结构版本为 {current or 0}，当前代码需要 {required}，"
+            "请先执行 python -m backend.migrate"
+        )
+    if current > required:
+        # 滚动升级时旧版本实例可能短暂连接到已迁移的数据库
+        logger.warning("数据库结构版本 %s 高于当前代码所需的 %s", current, required)
+    return current
+
+
+async def apply_migrations(
+    engine: AsyncEngine, target: int | None = None
+) -> list[Migration]:
+    """依次执行未应用的迁移（直到 target 版本），返回本次执行的迁移"""
+    async with engine.begin() as conn:
+        await conn.run_sync(schema_version_table.create, checkfirst=True)
+    async with engine.connect() as conn:
+        current = await get_schema_version(conn) or 0
+
+    pending = [
+        migration
+        for migration in load_migrations()
+        if migration.version > current
+        and (target is None or migration.version <= target)
+    ]
+    for migration in pending:
+        logger.info("执行迁移 %04d: %s", migration.version, migration.description)
+        started = time.perf_counter()
+        async with engine.connect() as conn:
+            await migration.upgrade(conn)
+            await conn.commit()
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(schema_version_table).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(UTC).replace(tzinfo=None),
+                    duration_ms=duration_ms,
+                )
+            )
+        logger.info("迁移 %04d 完成，耗时 %d ms", migration.version, duration_ms)
+    return pending
+
+
+async def create_index(
+    conn: AsyncConnection, table: str, name: str, columns: list[str]
+) -> bool:
+    """创建索引，已有以这些列为前缀的索引时跳过；返回是否实际创建
+
+    MySQL 使用 InnoDB 在线 DDL（ALGORITHM=INPLACE, LOCK=NONE），建索引期间表仍可读写；
+    每个索引单独提交，大表上分多个索引执行时中途失败可从下一个索引继续。
+    """
+    existing = await conn.run_sync(
+        lambda sync_conn: inspect(sync_conn).get_indexes(table)
+    )
+    if any(index["column_names"][: len(columns)] == columns for index in existing):
+        return False
+
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = (
+        f"CREATE INDEX {quote(name)} ON {quote(table)} "
+        f"({', '.join(quote(column) for column in columns)})"
+    )
+    if conn.dialect.name == "mysql":
+        await conn.exec_driver_sql(
+            f"SET SESSION lock_wait_timeout = {int(LOCK_WAIT_TIMEOUT_SECONDS)}"
+        )
+        ddl += " ALGORITHM=INPLACE LOCK=NONE"
+    logger.info("创建索引 %s.%s (%s)", table, name, ", ".join(columns))
+    started = time.perf_counter()
+    await conn.exec_driver_sql(ddl)
+    await conn.commit()
+    logger.info("索引 %s 创建完成，耗时 %.1f s", name, time.perf_counter() - started)
+    return True
@@ -0,0 +1,167 @@
+"""基线：创建尚不存在的表
+
+表结构按本迁移编写时的模型固定在下面的 Table 定义中，之后修改模型须另写迁移，不能改动这里。
+新库由此建出全部表和索引；由旧版 init.sql 或旧版启动时 create_all 建出的库只补建缺少的表
+（如发件箱、验证码、令牌吊销表），已有的表不做修改，缺少的索引由后续迁移补建。
+
+枚举列按模型的非原生枚举（native_enum=False）建为 VARCHAR，长度为最长取值的长度；
+未指定长度的字符串列与 SQLModel 的 AutoString 一致，在 MySQL 上为 VARCHAR(255)。
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+DESCRIPTION = "创建尚不存在的表"
+
+metadata = MetaData()
+
+Table(
+    "user",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String(255), nullable=False),
+    Column("email", String(255), nullable=False),
+    Column("phone", String(255)),
+    Column("hashed_password", String(255), nullable=False),
+    Column("user_type", String(8)),
+    Column("create_time", DateTime, nullable=False),
+    Index("ix_user_username", "username", unique=True),
+    Index("ix_user_email", "email", unique=True),
+    Index("ix_user_phone", "phone", unique=True),
+    Index("ix_user_user_type", "user_type"),
+)
+
+Table(
+    "store",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("description", String(255)),
+    Column("address", String(255), nullable=False),
+    Column("phone", String(255), nullable=False),
+    Column("hours", String(255)),
+    Column("image_url", String(255)),
+    Column("state", String(8)),
+    Column("publish_time", DateTime, nullable=False),
+    Column("review_time", DateTime),
+    Column("owner_id", Integer, ForeignKey("user.id"), nullable=False),
+    Index("ix_store_name", "name"),
+    Index("ix_store_owner_id", "owner_id"),
+    Index("ix_store_state_publish_time", "state", "publish_time"),
+)
+
+Table(
+    "item",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("description", String(255)),
+    Column("image_url", String(255)),
+    Column("price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("store_id", Integer, ForeignKey("store.id"), nullable=False),
+    Index("ix_item_name", "name"),
+    Index("ix_item_price", "price"),
+    Index("ix_item_store_quantity", "store_id", "quantity"),
+)
+
+Table(
+    "order",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("create_time", DateTime, nullable=False),
+    Column("review_time", DateTime),
+    Column("state", String(9)),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("store_id", Integer, ForeignKey("store.id"), nullable=False),
+    Index("ix_order_store_state_create_time", "store_id", "state", "create_time"),
+    Index("ix_order_user_state_create_time", "user_id", "state", "create_time"),
+    Index("ix_order_state_create_time", "state", "create_time"),
+)
+
+Table(
+    "orderitem",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("quantity", Integer, nullable=False),
+    Column("item_price", Float, nullable=False),
+    Column("order_id", Integer, ForeignKey("order.id"), nullable=False),
+    Column("item_id", Integer, ForeignKey("item.id"), nullable=False),
+    Index("ix_orderitem_order_id", "order_id"),
+    Index("ix_orderitem_item_id", "item_id"),
+)
+
+Table(
+    "comment",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("content", String(255), nullable=False),
+    Column("publish_time", DateTime, nullable=False),
+    Column("review_time", DateTime),
+    Column("state", String(8)),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("store_id", Integer, ForeignKey("store.id"), nullable=False),
+    Index("ix_comment_user_id", "user_id"),
+    Index("ix_comment_store_state_publish_time", "store_id", "state", "publish_time"),
+    Index("ix_comment_state_publish_time", "state", "publish_time"),
+)
+
+Table(
+    "emailverificationcode",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("email", String(255), nullable=False),
+    Column("scene", String(14)),
+    Column("code_hash", String(128), nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("verified", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index(
+        "ix_email_verification_code_lookup", "email", "scene", "verified", "expires_at"
+    ),
+)
+
+Table(
+    "emailoutbox",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("to_email", String(255), nullable=False),
+    Column("subject", String(255), nullable=False),
+    Column("body", Text, nullable=False),
+    Column("state", String(7)),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("last_error", String(1024)),
+    Column("created_at", DateTime, nullable=False),
+    Column("sent_at", DateTime),
+    Index("ix_email_outbox_state_next_attempt", "state", "next_attempt_at"),
+)
+
+Table(
+    "revokedtoken",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String(6), nullable=False),
+    Column("value", String(64), nullable=False),
+    Column("revoked_at", DateTime, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    UniqueConstraint("kind", "value", name="uq_revoked_token_kind_value"),
+    Index("ix_revoked_token_expires_at", "expires_at"),
+)
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.run_sync(metadata.create_all)
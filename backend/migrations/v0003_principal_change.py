@@ -0,0 +1,35 @@
+"""身份变更通知使用独立的 principalchange 表
+
+此前角色和店铺状态变更借用 revokedtoken 表（kind=role）广播，这里建出新表并删除遗留的 role 记录，
+revokedtoken 只保存令牌吊销记录。表结构按本版本固定，不随模型变化。
+"""
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    column,
+    delete,
+    table,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+DESCRIPTION = "新建身份变更通知表 principalchange"
+
+principal_change = Table(
+    "principalchange",
+    MetaData(),
+    Column("user_id", Integer, primary_key=True, autoincrement=False),
+    Column("changed_at", DateTime, nullable=False),
+    Index("ix_principal_change_changed_at", "changed_at"),
+)
+
+revoked_token = table("revokedtoken", column("kind"))
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.run_sync(principal_change.create, checkfirst=True)
+    await conn.execute(delete(revoked_token).where(revoked_token.c.kind == "role"))
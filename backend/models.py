@@ -1,8 +1,14 @@
 import enum
 from typing import List, Optional
 from sqlmodel import Field, Relationship, SQLModel, Column
-from sqlalchemy import Enum as SQLAlchemyEnum, Index
-from datetime import datetime
+from sqlalchemy import Enum as SQLAlchemyEnum, Index, Text, UniqueConstraint
+from datetime import UTC, datetime
+
+
+def utcnow() -> datetime:
+    """当前 UTC 时间（不带时区），数据库中的时间列均按 UTC 存储为不带时区的值"""
+    return datetime.now(UTC).replace(tzinfo=None)
+
 
 # --- Enums based on document definitions ---
 
@@ -38,6 +44,19 @@ class VerificationScene(str, enum.Enum):
     RESET_PASSWORD = "reset-password"
 
 
+class EmailOutboxState(str, enum.Enum):
+    PENDING = "pending"  # 等待发送（含等待重试）
+    SENDING = "sending"  # 已被发送任务领取
+    SENT = "sent"  # 发送成功
+    DEAD = "dead"  # 超过最大重试次数，进入死信
+
+
+class TokenRevocationKind(str, enum.Enum):
+    TOKEN = "token"  # 单个刷新令牌（jti）
+    FAMILY = "family"  # 同一次登录轮换出的全部刷新令牌
+    USER = "user"  # 用户在 revoked_at 之前签发的全部令牌
+
+
 # --- Link Tables ---
 
 
@@ -48,10 +67,10 @@ class OrderItem(SQLModel, table=True):
     quantity: int = Field(gt=0)
     item_price: float = Field(gt=0)  # 下单时的价格快照 [cite: 76]
 
-    order_id: int = Field(foreign_key="order.id")
+    order_id: int = Field(foreign_key="order.id", index=True)
     order: "Order" = Relationship(back_populates="items")
 
-    item_id: int = Field(foreign_key="item.id")
+    item_id: int = Field(foreign_key="item.id", index=True)
     item: "Item" = Relationship(back_populates="order_items")
 
 
@@ -61,6 +80,8 @@ class OrderItem(SQLModel, table=True):
 class User(SQLModel, table=True):
     """用户模型 (合并了普通用户、商家和管理员) [cite: 45, 53, 57]"""
 
+    __table_args__ = (Index("ix_user_user_type", "user_type"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(unique=True, index=True)
     email: str = Field(unique=True, index=True)
@@ -76,7 +97,7 @@ class User(SQLModel, table=True):
             )
         ),
     )
-    create_time: datetime = Field(default_factory=datetime.utcnow)
+    create_time: datetime = Field(default_factory=utcnow)
 
     # Relationships
     stores: List["Store"] = Relationship(back_populates="owner", cascade_delete=True)
@@ -87,6 +108,9 @@ class User(SQLModel, table=True):
 class Store(SQLModel, table=True):
     """商家信息 [cite: 61]"""
 
+    # 按状态筛选商家列表、统计待审核数
+    __table_args__ = (Index("ix_store_state_publish_time", "state", "publish_time"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, alias="storeName")
     description: Optional[str] = Field(default=None)
@@ -104,10 +128,10 @@ class Store(SQLModel, table=True):
             )
         ),
     )
-    publish_time: datetime = Field(default_factory=datetime.utcnow)
+    publish_time: datetime = Field(default_factory=utcnow)
     review_time: Optional[datetime] = Field(default=None)
 
-    owner_id: int = Field(foreign_key="user.id")
+    owner_id: int = Field(foreign_key="user.id", index=True)
     owner: User = Relationship(back_populates="stores")
 
     # Relationships
@@ -121,11 +145,14 @@ class Store(SQLModel, table=True):
 class Item(SQLModel, table=True):
     """餐点信息 [cite: 65]"""
 
+    # 商家菜单及有货/售罄筛选
+    __table_args__ = (Index("ix_item_store_quantity", "store_id", "quantity"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, alias="itemName")
     description: Optional[str] = Field(default=None)
     image_url: Optional[str] = Field(default=None, alias="imageURL")
-    price: float = Field(gt=0)
+    price: float = Field(gt=0, index=True)
     quantity: int = Field(default=0)  # 库存 [cite: 68]
 
     store_id: int = Field(foreign_key="store.id")
@@ -140,8 +167,15 @@ class Item(SQLModel, table=True):
 class Order(SQLModel, table=True):
     """预约订单 [cite: 69]"""
 
+    # 商家/用户订单列表按状态筛选，管理员按状态筛选和营业额统计
+    __table_args__ = (
+        Index("ix_order_store_state_create_time", "store_id", "state", "create_time"),
+        Index("ix_order_user_state_create_time", "user_id", "state", "create_time"),
+        Index("ix_order_state_create_time", "state", "create_time"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    create_time: datetime = Field(default_factory=datetime.utcnow)
+    create_time: datetime = Field(default_factory=utcnow)
     review_time: Optional[datetime] = Field(default=None)
     state: OrderState = Field(
         default=OrderState.PENDING,
@@ -167,9 +201,17 @@ class Order(SQLModel, table=True):
 class Comment(SQLModel, table=True):
     """评论 [cite: 77]"""
 
+    # 商家评论列表（只显示已通过）和管理员待审核列表
+    __table_args__ = (
+        Index(
+            "ix_comment_store_state_publish_time", "store_id", "state", "publish_time"
+        ),
+        Index("ix_comment_state_publish_time", "state", "publish_time"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str
-    publish_time: datetime = Field(default_factory=datetime.utcnow)
+    publish_time: datetime = Field(default_factory=utcnow)
     review_time: Optional[datetime] = Field(default=None)
     state: CommentState = Field(
         default=CommentState.PENDING,
@@ -182,7 +224,7 @@ class Comment(SQLModel, table=True):
         ),
     )
 
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     user: User = Relationship(back_populates="comments")
 
     store_id: int = Field(foreign_key="store.id")
@@ -192,10 +234,19 @@ class Comment(SQLModel, table=True):
 class EmailVerificationCode(SQLModel, table=True):
     """邮箱验证码记录"""
 
-    __table_args__ = (Index("ix_email_verification_code_scene", "scene"),)
+    # 保存时按邮箱和场景删除旧记录，校验时按全部列条件更新
+    __table_args__ = (
+        Index(
+            "ix_email_verification_code_lookup",
+            "email",
+            "scene",
+            "verified",
+            "expires_at",
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    email: str = Field(index=True, max_length=255)
+    email: str = Field(max_length=255)
     scene: VerificationScene = Field(
         sa_column=Column(
             SQLAlchemyEnum(
@@ -208,4 +259,69 @@ class EmailVerificationCode(SQLModel, table=True):
     code_hash: str = Field(max_length=128)
     expires_at: datetime = Field()
     verified: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+
+
+class EmailOutbox(SQLModel, table=True):
+    """待发送邮件（发件箱），由后台任务异步投递"""
+
+    __table_args__ = (
+        Index("ix_email_outbox_state_next_attempt", "state", "next_attempt_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    to_email: str = Field(max_length=255)
+    subject: str = Field(max_length=255)
+    body: str = Field(sa_column=Column(Text, nullable=False))
+    state: EmailOutboxState = Field(
+        default=EmailOutboxState.PENDING,
+        sa_column=Column(
+            SQLAlchemyEnum(
+                EmailOutboxState,
+                native_enum=False,
+                values_callable=lambda x: [e.value for e in x],
+            ),
+        ),
+    )
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=utcnow)
+    last_error: Optional[str] = Field(default=None, max_length=1024)
+    created_at: datetime = Field(default_factory=utcnow)
+    sent_at: Optional[datetime] = Field(default=None)
+
+
+class RevokedToken(SQLModel, table=True):
+    """已吊销的令牌记录，过期后由后台任务清理"""
+
+    __table_args__ = (
+        UniqueConstraint("kind", "value", name="uq_revoked_token_kind_value"),
+        Index("ix_revoked_token_expires_at", "expires_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: TokenRevocationKind = Field(
+        sa_column=Column(
+            SQLAlchemyEnum(
+                TokenRevocationKind,
+                native_enum=False,
+                values_callable=lambda x: [e.value for e in x],
+            ),
+            nullable=False,
+        )
+    )
+    value: str = Field(max_length=64)
+    revoked_at: datetime = Field(default_factory=utcnow)
+    expires_at: datetime = Field()
+
+
+class PrincipalChange(SQLModel, table=True):
+    """用户角色、店铺归属或店铺状态的最近一次变更（每个用户一行）
+
+    各进程同步后丢弃缓存的身份，保留到所有进程都同步过后由后台任务清理。
+    """
+
+    __table_args__ = (Index("ix_principal_change_changed_at", "changed_at"),)
+
+    # 用户删除后记录仍需广播，不设外键
+    user_id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    changed_at: datetime = Field(default_factory=utcnow)
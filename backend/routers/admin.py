@@ -0,0 +1,120 @@
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
+from ..database import get_pool_stats, get_replica_stats, pool_metrics
+from ..dependencies import CurrentAdmin
+from ..schemas import (
+    MemoryStatsResponse,
+    PoolStatsResponse,
+    QueryStatsResponse,
+    ReplicaStatsResponse,
+)
+from ..utils.memory import (
+    TRACEMALLOC_FRAMES,
+    count_model_instances,
+    get_memory_summary,
+    get_route_memory,
+    reset_baseline,
+    start_tracing,
+    stop_tracing,
+    top_allocations,
+)
+from ..utils.profiler import (
+    PROFILE_FORMATS,
+    PROFILE_INTERVAL_MS,
+    PROFILE_MAX_SECONDS,
+    start_profiler,
+    stop_profiler,
+)
+from ..utils.query_stats import get_top_queries, reset_query_stats
+
+router = APIRouter(prefix="/admin", tags=["系统管理"])
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_database_pool_stats(current_admin: CurrentAdmin, reset: bool = False):
+    """数据库连接池使用情况；reset=true 时读取后清零等待时间统计"""
+    stats = get_pool_stats()
+    if reset:
+        pool_metrics.reset()
+    return stats
+
+
+@router.get("/replicas", response_model=list[ReplicaStatsResponse])
+async def get_replica_stats_endpoint(current_admin: CurrentAdmin):
+    """从库复制延迟与可用状态"""
+    return get_replica_stats()
+
+
+@router.get("/queries", response_model=list[QueryStatsResponse])
+async def get_query_stats(
+    current_admin: CurrentAdmin,
+    limit: int = Query(default=20, ge=1, le=500),
+    order_by: Literal["total", "count", "p95"] = "total",
+    reset: bool = False,
+):
+    """按语句指纹聚合的 SQL 耗时排行；reset=true 时读取后清空统计"""
+    queries = get_top_queries(limit, order_by)
+    if reset:
+        reset_query_stats()
+    return queries
+
+
+@router.get("/profile")
+async def profile_window(
+    current_admin: CurrentAdmin,
+    seconds: float = Query(default=10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(default=PROFILE_INTERVAL_MS, ge=1, le=100),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+):
+    """对事件循环线程采样指定时长，返回折叠栈文本或 speedscope JSON"""
+    profiler = start_profiler(interval_ms)
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="已有性能分析正在进行"
+        )
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = stop_profiler(profiler)
+    return Response(
+        profile.export(format, f"{seconds:g}s window"),
+        media_type=PROFILE_FORMATS[format],
+        headers={"X-Profile-Samples": str(profile.sample_count)},
+    )
+
+
+@router.get("/memory", response_model=MemoryStatsResponse)
+async def get_memory_stats(
+    current_admin: CurrentAdmin,
+    limit: int = Query(default=20, ge=1, le=200),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    reset: bool = False,
+):
+    """进程内存、SQLModel 实例数，以及开启追踪后相比基线增长最多的分配位置和路由；
+    reset=true 时读取后以当前状态作为新基线"""
+    # 遍历堆、拍摄和比较快照耗时与对象数成正比，放到线程中执行，不阻塞事件循环
+    stats = await asyncio.to_thread(get_memory_summary)
+    stats["models"] = await asyncio.to_thread(count_model_instances)
+    stats["top_allocations"] = await asyncio.to_thread(top_allocations, limit, group_by)
+    stats["routes"] = get_route_memory(limit)
+    if reset:
+        await asyncio.to_thread(reset_baseline)
+    return stats
+
+
+@router.post("/memory/start", status_code=status.HTTP_204_NO_CONTENT)
+async def start_memory_tracing(
+    current_admin: CurrentAdmin,
+    frames: int = Query(default=TRACEMALLOC_FRAMES, ge=1, le=100),
+):
+    """开启 tracemalloc 并记录基线快照（会明显拖慢请求，排查完请及时关闭）"""
+    await asyncio.to_thread(start_tracing, frames)
+
+
+@router.post("/memory/stop", status_code=status.HTTP_204_NO_CONTENT)
+async def stop_memory_tracing(current_admin: CurrentAdmin):
+    """关闭 tracemalloc 并丢弃快照"""
+    stop_tracing()
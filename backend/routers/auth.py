@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 import hashlib
 import random
 import string
@@ -7,11 +7,11 @@ from typing import Annotated, Any
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import delete, select
+from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..dependencies import CurrentUser, SessionDep
-from ..models import EmailVerificationCode, User, VerificationScene
+from ..models import TokenRevocationKind, User, VerificationScene
 from ..schemas import (
     EmailCodeSendRequest,
     EmailLoginRequest,
@@ -30,13 +30,13 @@ from ..security import (
     SECRET_KEY,
     create_access_token,
     create_refesh_token,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
 )
-from ..utils.email import send_email
-
-# table ref for typed column access
-EmailVerificationTable: Any = getattr(EmailVerificationCode, "__table__", None)
+from ..utils.outbox import enqueue_email
+from ..utils.rate_limit import rate_limit
+from ..utils.token_revocation import revocation_list
+from ..utils.verification import get_verification_store
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 
@@ -64,74 +64,84 @@ def _hash_code(code: str) -> str:
 
 async def _store_verification_code(
     session: AsyncSession, email: str, scene: VerificationScene, code: str
-) -> EmailVerificationCode:
-    await session.execute(
-        delete(EmailVerificationCode).where(
-            EmailVerificationTable.c.email == email,
-            EmailVerificationTable.c.scene == scene,
-        )
-    )
-
-    verification = EmailVerificationCode(
-        email=email,
-        scene=scene,
-        code_hash=_hash_code(code),
-        expires_at=datetime.utcnow() + timedelta(minutes=CODE_EXPIRE_MINUTES),
+) -> None:
+    await get_verification_store().save(
+        session,
+        email,
+        scene,
+        _hash_code(code),
+        timedelta(minutes=CODE_EXPIRE_MINUTES),
     )
-    session.add(verification)
-    await session.commit()
-    await session.refresh(verification)
-    return verification
 
 
-def _send_verification_email(email: str, scene: VerificationScene, code: str) -> None:
+async def _send_verification_email(
+    session: AsyncSession, email: str, scene: VerificationScene, code: str
+) -> None:
     action = SCENE_TITLES.get(scene, "操作")
     subject = f"餐饮预订系统{action}验证码"
     body = (
         f"您好！\n\n您正在进行{action}操作，验证码为 {code} ，有效期 {CODE_EXPIRE_MINUTES} 分钟。\n"
         "如非本人操作，请忽略此邮件。"
     )
-    send_email(subject, body, email)
+    await enqueue_email(session, subject, body, email)
 
 
 async def _verify_email_code(
     session: AsyncSession, email: str, scene: VerificationScene, code: str
 ) -> None:
-    code_hash = _hash_code(code)
-    statement = (
-        select(EmailVerificationCode)
-        .where(
-            EmailVerificationTable.c.email == email,
-            EmailVerificationTable.c.scene == scene,
-            EmailVerificationTable.c.verified == False,
-            EmailVerificationTable.c.expires_at >= datetime.utcnow(),
+    verified = await get_verification_store().consume(
+        session, email, scene, _hash_code(code)
+    )
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="验证码错误或已失效"
         )
-        .order_by(EmailVerificationTable.c.created_at.desc())
+
+
+async def _authenticate(session: AsyncSession, account: str, password: str) -> User:
+    """按用户名、邮箱或手机号校验密码，旧版哈希验证通过后自动升级"""
+    statement = select(User).where(
+        (User.username == account)
+        | (User.email == _normalize_email(account))
+        | (User.phone == account)
     )
     result = await session.execute(statement)
-    record = result.scalars().first()
-    if not record or record.code_hash != code_hash:
+    user = result.scalars().first()
+
+    verified = False
+    new_hash = None
+    if user:
+        verified, new_hash = await verify_password_async(password, user.hashed_password)
+    if not user or not verified:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="验证码错误或已失效"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="账号或密码不正确",
+            headers={"WWW-Authenticate": "Bearer"},
         )
 
-    record.verified = True
-    session.add(record)
-    await session.commit()
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
+
+    return user
 
 
-def _create_token_response(user: User) -> Token:
+def _create_token_response(subject: Any, family: str | None = None) -> Token:
     access_token = create_access_token(
-        subject=user.id,
+        subject=subject,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
-    refresh_token = create_refesh_token(subject=user.id)
+    refresh_token = create_refesh_token(subject=subject, family=family)
     return Token(
         access_token=access_token, refresh_token=refresh_token, token_type="bearer"
     )
 
 
-@router.post("/send-email-code")
+@router.post(
+    "/send-email-code",
+    dependencies=[Depends(rate_limit("send_email_code", "email"))],
+)
 async def send_email_code(payload: EmailCodeSendRequest, session: SessionDep):
     email = _normalize_email(payload.email)
     scene = payload.scene
@@ -152,17 +162,9 @@ async def send_email_code(payload: EmailCodeSendRequest, session: SessionDep):
             )
 
     code = _generate_verification_code()
-    verification = await _store_verification_code(session, email, scene, code)
-
-    try:
-        _send_verification_email(email, scene, code)
-    except RuntimeError as exc:
-        await session.delete(verification)
-        await session.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(exc),
-        ) from exc
+    await _store_verification_code(session, email, scene, code)
+    # 邮件写入发件箱后立即返回，由后台任务投递
+    await _send_verification_email(session, email, scene, code)
 
     return {"message": "验证码已发送，请查收邮箱"}
 
@@ -200,7 +202,7 @@ async def register(user_create: UserCreate, session: SessionDep):
         session, email, VerificationScene.REGISTER, user_create.verification_code
     )
 
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     db_user = User(
         username=user_create.username,
         email=email,
@@ -214,28 +216,22 @@ async def register(user_create: UserCreate, session: SessionDep):
     return db_user
 
 
-@router.post("/login", response_model=Token)
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login", "username"))],
+)
 async def login(login_data: LoginRequest, session: SessionDep):
     """用户账号密码登录"""
-    statement = select(User).where(
-        (User.username == login_data.username)
-        | (User.email == _normalize_email(login_data.username))
-        | (User.phone == login_data.username)
-    )
-    result = await session.execute(statement)
-    user = result.scalars().first()
-
-    if not user or not verify_password(login_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="账号或密码不正确",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    return _create_token_response(user)
+    user = await _authenticate(session, login_data.username, login_data.password)
+    return _create_token_response(user.id)
 
 
-@router.post("/login/email", response_model=Token)
+@router.post(
+    "/login/email",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login_email", "email"))],
+)
 async def login_with_email(payload: EmailLoginRequest, session: SessionDep):
     """邮箱验证码登录"""
     email = _normalize_email(payload.email)
@@ -248,59 +244,101 @@ async def login_with_email(payload: EmailLoginRequest, session: SessionDep):
     await _verify_email_code(
         session, email, VerificationScene.LOGIN, payload.verification_code
     )
-    return _create_token_response(user)
+    return _create_token_response(user.id)
 
 
-@router.post("/login/token", response_model=Token)
+@router.post(
+    "/login/token",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login", "username"))],
+)
 async def login_oauth(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()], session: SessionDep
 ):
     """OAuth2 密码模式登录（用于 Swagger UI）"""
-    statement = select(User).where(
-        (User.username == form_data.username)
-        | (User.email == _normalize_email(form_data.username))
-        | (User.phone == form_data.username)
-    )
-    result = await session.execute(statement)
-    user = result.scalars().first()
+    user = await _authenticate(session, form_data.username, form_data.password)
+    return _create_token_response(user.id)
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="账号或密码不正确",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-    return _create_token_response(user)
+def _decode_refresh_token(refresh_token: str) -> dict[str, Any]:
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="无效的刷新令牌"
+    )
+    try:
+        payload = jwt.decode(
+            refresh_token,
+            SECRET_KEY,
+            algorithms=[ALGORITHM],
+            options={"require": ["exp", "sub"]},
+        )
+        user_id = int(payload["sub"])
+    except (jwt.InvalidTokenError, KeyError, ValueError):
+        raise invalid_token
+    if payload.get("type") != "refresh":
+        raise invalid_token
+    payload["sub"] = user_id
+    return payload
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(token_data: TokenRefresh, session: SessionDep):
-    """刷新访问令牌"""
-    try:
-        payload = jwt.decode(
-            token_data.refresh_token, SECRET_KEY, algorithms=[ALGORITHM]
+    """刷新访问令牌，同时轮换刷新令牌（旧刷新令牌立即失效）"""
+    payload = _decode_refresh_token(token_data.refresh_token)
+    user_id = payload["sub"]
+    jti = payload.get("jti")
+    family = payload.get("fam")
+
+    if revocation_list.issued_before_revocation(user_id, payload.get("iat")) or (
+        family and revocation_list.is_revoked(TokenRevocationKind.FAMILY, family)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="刷新令牌已失效"
         )
-        user_id: str | None = payload.get("sub")
-        token_type: str | None = payload.get("type")
-
-        if user_id is None or token_type != "refresh":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="无效的刷新令牌"
-            )
 
-        user = await session.get(User, int(user_id))
+    if not jti or not family:
+        # 旧版刷新令牌不带 jti：以令牌哈希作为吊销记录，只允许换发一次可轮换的新令牌
+        user = await session.get(User, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="用户不存在"
             )
+        exchanged = await revocation_list.revoke(
+            session,
+            TokenRevocationKind.TOKEN,
+            hashlib.sha256(token_data.refresh_token.encode("utf-8")).hexdigest(),
+            datetime.fromtimestamp(payload["exp"], UTC).replace(tzinfo=None),
+        )
+        if not exchanged:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="刷新令牌已失效"
+            )
+        return _create_token_response(user.id)
 
-        return _create_token_response(user)
-    except jwt.InvalidTokenError:
+    rotated = await revocation_list.revoke(
+        session,
+        TokenRevocationKind.TOKEN,
+        jti,
+        datetime.fromtimestamp(payload["exp"], UTC).replace(tzinfo=None),
+    )
+    if not rotated:
+        # 已轮换过的刷新令牌被再次使用，可能已泄露，吊销整个家族
+        await revocation_list.revoke_family(session, family)
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="无效的刷新令牌"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="刷新令牌已失效"
         )
 
+    return _create_token_response(user_id, family=family)
+
+
+@router.post("/logout")
+async def logout(token_data: TokenRefresh, session: SessionDep):
+    """退出登录，吊销该刷新令牌所在家族的全部令牌"""
+    payload = _decode_refresh_token(token_data.refresh_token)
+    family = payload.get("fam")
+    if family:
+        await revocation_list.revoke_family(session, family)
+    return {"message": "已退出登录"}
+
 
 @router.post("/reset-password")
 async def reset_password(payload: UserPasswordReset, session: SessionDep):
@@ -316,9 +354,10 @@ async def reset_password(payload: UserPasswordReset, session: SessionDep):
     await _verify_email_code(
         session, email, VerificationScene.RESET_PASSWORD, payload.verification_code
     )
-    user.hashed_password = get_password_hash(payload.new_password)
+    user.hashed_password = await get_password_hash_async(payload.new_password)
     session.add(user)
     await session.commit()
+    await revocation_list.revoke_user(session, user.id)
 
     return {"message": "密码已重置，请使用新密码登录"}
 
@@ -382,13 +421,19 @@ async def change_current_user_password(
     password_update: UserPasswordUpdate, current_user: CurrentUser, session: SessionDep
 ):
     """修改当前登录用户密码"""
-    if not verify_password(password_update.old_password, current_user.hashed_password):
+    verified, _ = await verify_password_async(
+        password_update.old_password, current_user.hashed_password
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="当前密码不正确"
         )
 
-    current_user.hashed_password = get_password_hash(password_update.new_password)
+    current_user.hashed_password = await get_password_hash_async(
+        password_update.new_password
+    )
     session.add(current_user)
     await session.commit()
+    await revocation_list.revoke_user(session, current_user.id)
 
     return {"message": "密码修改成功"}
@@ -4,7 +4,13 @@ from fastapi import APIRouter, HTTPException, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..dependencies import SessionDep, CurrentUser, CurrentAdmin, CurrentCustomer
+from ..dependencies import (
+    SessionDep,
+    ReadSessionDep,
+    CurrentPrincipal,
+    CurrentAdmin,
+    CurrentCustomer,
+)
 from ..models import Comment, Store, CommentState, UserType, User
 from ..schemas import (
     CommentCreate,
@@ -71,7 +77,7 @@ async def create_comment(
 
 @router.get("/", response_model=PageResponse[CommentResponse])
 async def list_comments(
-    session: SessionDep,
+    session: ReadSessionDep,
     skip: int = 0,
     limit: int = 100,
     store_id: int | None = None,
@@ -150,7 +156,7 @@ async def list_comments(
 @router.get("/store/{store_id}", response_model=PageResponse[CommentResponse])
 async def list_store_comments(
     store_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     skip: int = 0,
     limit: int = 100,
 ):
@@ -193,7 +199,7 @@ async def list_store_comments(
 
 @router.get("/my", response_model=PageResponse[CommentResponse])
 async def get_my_comments(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_customer: CurrentCustomer,
     skip: int = 0,
     limit: int = 100,
@@ -229,7 +235,7 @@ async def get_my_comments(
 
 
 @router.get("/{comment_id}", response_model=CommentResponse)
-async def get_comment(comment_id: int, session: SessionDep):
+async def get_comment(comment_id: int, session: ReadSessionDep):
     """查询指定评论信息"""
     comment = await session.get(Comment, comment_id)
     if not comment:
@@ -241,7 +247,7 @@ async def get_comment(comment_id: int, session: SessionDep):
 async def update_comment(
     comment_id: int,
     comment_update: CommentUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     session: SessionDep,
 ):
     """更新评论内容（仅评论作者本人）"""
@@ -269,7 +275,7 @@ async def update_comment(
 
 @router.delete("/{comment_id}")
 async def delete_comment(
-    comment_id: int, current_user: CurrentUser, session: SessionDep
+    comment_id: int, current_user: CurrentPrincipal, session: SessionDep
 ):
     """删除评论（评论作者或管理员）"""
     comment = await session.get(Comment, comment_id)
@@ -289,7 +295,9 @@ async def delete_comment(
 
 @router.post("/batch-delete", response_model=BatchDeleteResponse)
 async def batch_delete_comments(
-    batch_request: BatchDeleteRequest, session: SessionDep, current_user: CurrentUser
+    batch_request: BatchDeleteRequest,
+    session: SessionDep,
+    current_user: CurrentPrincipal,
 ):
     """批量删除评论（管理员或评论作者）"""
     success_count = 0
@@ -3,7 +3,13 @@ from fastapi import APIRouter, HTTPException, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..dependencies import SessionDep, CurrentUser, CurrentVendor
+from ..dependencies import (
+    SessionDep,
+    ReadSessionDep,
+    CurrentPrincipal,
+    CurrentVendor,
+    require_approved_store,
+)
 from ..models import Item, Store, UserType, StoreState
 from ..schemas import (
     ItemCreate,
@@ -61,8 +67,8 @@ async def create_item(
 
 @router.get("/", response_model=PageResponse[ItemResponse])
 async def list_items(
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: ReadSessionDep,
+    current_user: CurrentPrincipal,
     skip: int = 0,
     limit: int = 100,
     store_id: int | None = None,
@@ -81,21 +87,10 @@ async def list_items(
 
     # 商家用户只能查询自己的餐点
     if current_user.user_type == UserType.VENDOR:
-        # 查询商家的店铺ID
-        store_statement = select(Store).where(Store.owner_id == current_user.id)
-        store = (await session.execute(store_statement)).scalars().first()
-        if not store:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="商家尚未提交商家信息，请先完成商家注册",
-            )
-        if store.state != StoreState.APPROVED:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="商家信息未审核通过，暂无法管理餐点",
-            )
-        statement = statement.where(Item.store_id == store.id)
-        count_statement = count_statement.where(Item.store_id == store.id)
+        # 店铺ID来自身份缓存
+        my_store_id = require_approved_store(current_user, "管理餐点")
+        statement = statement.where(Item.store_id == my_store_id)
+        count_statement = count_statement.where(Item.store_id == my_store_id)
 
     # 按商家ID筛选（内部参数，管理员可用）
     if store_id and current_user.user_type == UserType.ADMIN:
@@ -161,7 +156,7 @@ async def list_items(
 @router.get("/store/{store_id}", response_model=PageResponse[ItemResponse])
 async def list_store_items(
     store_id: int,
-    session: SessionDep,
+    session: ReadSessionDep,
     skip: int = 0,
     limit: int = 100,
 ):
@@ -199,7 +194,7 @@ async def list_store_items(
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
-async def get_item(item_id: int, session: SessionDep):
+async def get_item(item_id: int, session: ReadSessionDep):
     """查询指定餐点信息"""
     item = await session.get(Item, item_id)
     if not item:
@@ -211,7 +206,7 @@ async def get_item(item_id: int, session: SessionDep):
 async def update_item(
     item_id: int,
     item_update: ItemUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     session: SessionDep,
 ):
     """更新餐点信息（商家本人或管理员）"""
@@ -242,7 +237,9 @@ async def update_item(
 
 
 @router.delete("/{item_id}")
-async def delete_item(item_id: int, current_user: CurrentUser, session: SessionDep):
+async def delete_item(
+    item_id: int, current_user: CurrentPrincipal, session: SessionDep
+):
     """删除餐点信息（商家本人或管理员）"""
     item = await session.get(Item, item_id)
     if not item:
@@ -268,7 +265,9 @@ async def delete_item(item_id: int, current_user: CurrentUser, session: SessionD
 
 @router.post("/batch-delete", response_model=BatchDeleteResponse)
 async def batch_delete_items(
-    batch_request: BatchDeleteRequest, session: SessionDep, current_user: CurrentUser
+    batch_request: BatchDeleteRequest,
+    session: SessionDep,
+    current_user: CurrentPrincipal,
 ):
     """批量删除餐点（商家或管理员）"""
     success_count = 0
@@ -7,9 +7,11 @@ from sqlalchemy.orm import selectinload
 
 from ..dependencies import (
     SessionDep,
-    CurrentUser,
-    CurrentVendor,
+    ReadSessionDep,
+    CurrentPrincipal,
+    CurrentVendorStore,
     CurrentCustomer,
+    require_approved_store,
 )
 from ..models import (
     Order,
@@ -19,8 +21,8 @@ from ..models import (
     OrderState,
     UserType,
     User,
-    StoreState,
 )
+from ..utils.metrics import orders_total, stock_reservation_failures_total
 from ..schemas import (
     OrderCreate,
     OrderUpdate,
@@ -98,6 +100,7 @@ async def create_order(
 
         # 验证库存
         if item.quantity < item_data.quantity:
+            stock_reservation_failures_total.inc()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"餐点 {item.name} 库存不足，当前库存: {item.quantity}",
@@ -150,6 +153,7 @@ async def create_order(
             session.add(item)
 
     await session.commit()
+    orders_total.inc("created")
 
     # 重新查询订单以获取所有关系数据（包括 items 和嵌套的 item）
     statement = (
@@ -166,8 +170,8 @@ async def create_order(
 
 @router.get("/", response_model=PageResponse[OrderResponse])
 async def list_orders(
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: ReadSessionDep,
+    current_user: CurrentPrincipal,
     skip: int = 0,
     limit: int = 100,
     state: OrderState | None = None,
@@ -189,20 +193,9 @@ async def list_orders(
         count_statement = count_statement.where(Order.user_id == current_user.id)
     elif current_user.user_type == UserType.VENDOR:
         # 商家查看自己店铺的订单
-        store_statement = select(Store).where(Store.owner_id == current_user.id)
-        store = (await session.execute(store_statement)).scalars().first()
-        if not store:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="商家尚未提交商家信息，请先完成商家注册",
-            )
-        if store.state != StoreState.APPROVED:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="商家信息未审核通过，暂无法查看订单",
-            )
-        statement = statement.where(Order.store_id == store.id)
-        count_statement = count_statement.where(Order.store_id == store.id)
+        my_store_id = require_approved_store(current_user, "查看订单")
+        statement = statement.where(Order.store_id == my_store_id)
+        count_statement = count_statement.where(Order.store_id == my_store_id)
     # 管理员可以查看所有订单
 
     # 按状态筛选
@@ -241,9 +234,14 @@ async def list_orders(
     # 获取总数
     total = (await session.execute(count_statement)).scalar_one()
 
-    # 分页查询 - 使用 selectinload 预加载 items 关系，并嵌套预加载每个 OrderItem 的 item 关系
+    # 分页查询 - 使用 selectinload 预加载 items 关系（嵌套预加载每个 OrderItem 的 item 关系）
+    # 以及下单用户和店铺，populate_order_response 直接命中 identity map，不再逐单查询
     statement = (
-        statement.options(selectinload(Order.items).selectinload(OrderItem.item))
+        statement.options(
+            selectinload(Order.items).selectinload(OrderItem.item),
+            selectinload(Order.user),
+            selectinload(Order.store),
+        )
         .offset(skip)
         .limit(limit)
     )
@@ -262,7 +260,7 @@ async def list_orders(
 
 @router.get("/my", response_model=PageResponse[OrderResponse])
 async def get_my_orders(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_customer: CurrentCustomer,
     skip: int = 0,
     limit: int = 100,
@@ -285,9 +283,14 @@ async def get_my_orders(
     # 获取总数
     total = (await session.execute(count_statement)).scalar_one()
 
-    # 分页查询 - 使用 selectinload 预加载 items 关系，并嵌套预加载每个 OrderItem 的 item 关系
+    # 分页查询 - 使用 selectinload 预加载 items 关系（嵌套预加载每个 OrderItem 的 item 关系）
+    # 以及下单用户和店铺，populate_order_response 直接命中 identity map，不再逐单查询
     statement = (
-        statement.options(selectinload(Order.items).selectinload(OrderItem.item))
+        statement.options(
+            selectinload(Order.items).selectinload(OrderItem.item),
+            selectinload(Order.user),
+            selectinload(Order.store),
+        )
         .offset(skip)
         .limit(limit)
     )
@@ -306,8 +309,8 @@ async def get_my_orders(
 
 @router.get("/store/my", response_model=PageResponse[OrderResponse])
 async def get_my_store_orders(
-    session: SessionDep,
-    current_vendor: CurrentVendor,
+    session: ReadSessionDep,
+    store: CurrentVendorStore,
     skip: int = 0,
     limit: int = 100,
     state: OrderState | None = None,
@@ -315,15 +318,6 @@ async def get_my_store_orders(
     """商家查询自己店铺的订单"""
     from sqlalchemy import func
 
-    # 获取商家的店铺
-    store_statement = select(Store).where(Store.owner_id == current_vendor.id)
-    store = (await session.execute(store_statement)).scalars().first()
-
-    if not store:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="您还未发布商家信息"
-        )
-
     statement = select(Order).where(Order.store_id == store.id)
     count_statement = (
         select(func.count()).select_from(Order).where(Order.store_id == store.id)
@@ -336,9 +330,14 @@ async def get_my_store_orders(
     # 获取总数
     total = (await session.execute(count_statement)).scalar_one()
 
-    # 分页查询 - 使用 selectinload 预加载 items 关系，并嵌套预加载每个 OrderItem 的 item 关系
+    # 分页查询 - 使用 selectinload 预加载 items 关系（嵌套预加载每个 OrderItem 的 item 关系）
+    # 以及下单用户和店铺，populate_order_response 直接命中 identity map，不再逐单查询
     statement = (
-        statement.options(selectinload(Order.items).selectinload(OrderItem.item))
+        statement.options(
+            selectinload(Order.items).selectinload(OrderItem.item),
+            selectinload(Order.user),
+            selectinload(Order.store),
+        )
         .offset(skip)
         .limit(limit)
     )
@@ -356,7 +355,9 @@ async def get_my_store_orders(
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, session: SessionDep, current_user: CurrentUser):
+async def get_order(
+    order_id: int, session: ReadSessionDep, current_user: CurrentPrincipal
+):
     """查询指定订单信息"""
     # 使用 select 和 selectinload 预加载 items 关系，并嵌套预加载每个 OrderItem 的 item 关系
     statement = (
@@ -377,17 +378,11 @@ async def get_order(order_id: int, session: SessionDep, current_user: CurrentUse
                 status_code=status.HTTP_403_FORBIDDEN, detail="您没有权限查看该订单"
             )
     elif current_user.user_type == UserType.VENDOR:
-        store_statement = select(Store).where(Store.owner_id == current_user.id)
-        store = (await session.execute(store_statement)).scalars().first()
-        if not store or order.store_id != store.id:
+        my_store_id = require_approved_store(current_user, "查看订单")
+        if order.store_id != my_store_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="您没有权限查看该订单"
             )
-        if store.state != StoreState.APPROVED:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="商家信息未审核通过，暂无法查看订单",
-            )
 
     # 返回订单响应
     return await populate_order_response(order, session)
@@ -397,7 +392,7 @@ async def get_order(order_id: int, session: SessionDep, current_user: CurrentUse
 async def update_order(
     order_id: int,
     order_update: OrderUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     session: SessionDep,
 ):
     """更新订单状态（商家审核或用户取消）"""
@@ -438,17 +433,11 @@ async def update_order(
 
     elif current_user.user_type == UserType.VENDOR:
         # 商家审核订单
-        store_statement = select(Store).where(Store.owner_id == current_user.id)
-        store = (await session.execute(store_statement)).scalars().first()
-        if not store or order.store_id != store.id:
+        my_store_id = require_approved_store(current_user, "审批订单")
+        if order.store_id != my_store_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="您没有权限修改该订单"
             )
-        if store.state != StoreState.APPROVED:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="商家信息未审核通过，暂无法审批订单",
-            )
 
         if order.state != OrderState.PENDING:
             raise HTTPException(
@@ -487,13 +476,16 @@ async def update_order(
     session.add(order)
     await session.commit()
     await session.refresh(order)
+    orders_total.inc(order_update.state.value)
 
     # 返回订单响应
     return await populate_order_response(order, session)
 
 
 @router.delete("/{order_id}")
-async def delete_order(order_id: int, session: SessionDep, current_user: CurrentUser):
+async def delete_order(
+    order_id: int, session: SessionDep, current_user: CurrentPrincipal
+):
     """删除订单（用户删除未审核订单或管理员删除任意订单）"""
     # 使用 select 和 selectinload 预加载 items 关系，并嵌套预加载每个 OrderItem 的 item 关系
     statement = (
@@ -537,7 +529,9 @@ async def delete_order(order_id: int, session: SessionDep, current_user: Current
 
 @router.post("/batch-delete", response_model=BatchDeleteResponse)
 async def batch_delete_orders(
-    batch_request: BatchDeleteRequest, session: SessionDep, current_user: CurrentUser
+    batch_request: BatchDeleteRequest,
+    session: SessionDep,
+    current_user: CurrentPrincipal,
 ):
     """批量删除订单（管理员或用户删除自己的待审核订单）"""
     success_count = 0
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 from fastapi import APIRouter
 
-from ..dependencies import SessionDep, CurrentUser
+from ..dependencies import ReadSessionDep, CurrentPrincipal
 from ..models import (
     Comment,
     CommentState,
@@ -29,16 +29,14 @@ router = APIRouter(prefix="/stats", tags=["statistics"])
 
 
 @router.get("/personal", response_model=PersonalStatsResponse)
-async def get_personal_stats(current_user: CurrentUser, session: SessionDep):
+async def get_personal_stats(current_user: CurrentPrincipal, session: ReadSessionDep):
     """Return personal statistics based on the current user role."""
     response = PersonalStatsResponse(user_type=current_user.user_type)
 
     if current_user.user_type == UserType.VENDOR:
-        store_stmt = select(Store).where(Store.owner_id == current_user.id)
-        stores = list((await session.execute(store_stmt)).scalars().all())
-        store_ids = [store.id for store in stores if store.id is not None]
-
-        store_state = stores[0].state if stores else None
+        # 店铺ID和状态来自身份缓存，无需再查询店铺表
+        store_ids = [current_user.store_id] if current_user.store_id else []
+        store_state = current_user.store_state
 
         item_total = 0
         order_total = 0
@@ -125,7 +123,7 @@ async def get_personal_stats(current_user: CurrentUser, session: SessionDep):
 
 
 @router.get("/site", response_model=SiteStatsResponse)
-async def get_site_stats(_current_user: CurrentUser, session: SessionDep):
+async def get_site_stats(_current_user: CurrentPrincipal, session: ReadSessionDep):
     """Return aggregated site statistics."""
     user_total = (
         await session.execute(select(func.count()).select_from(User))
@@ -4,7 +4,15 @@ from fastapi import APIRouter, HTTPException, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..dependencies import SessionDep, CurrentUser, CurrentAdmin, CurrentVendor
+from ..dependencies import (
+    SessionDep,
+    ReadSessionDep,
+    CurrentPrincipal,
+    CurrentAdmin,
+    CurrentVendor,
+    Principal,
+    invalidate_principal,
+)
 from ..models import Store, StoreState, UserType, User
 from ..schemas import (
     StoreCreate,
@@ -16,6 +24,7 @@ from ..schemas import (
     BatchDeleteRequest,
     BatchDeleteResponse,
 )
+from ..utils.outbox import enqueue_email
 
 router = APIRouter(prefix="/store", tags=["商家管理"])
 
@@ -30,9 +39,16 @@ async def populate_store_response(store: Store, session: AsyncSession) -> StoreR
     return response
 
 
+async def get_vendor_store(vendor: Principal, session: AsyncSession) -> Store | None:
+    """按缓存的店铺ID读取商家店铺（未发布店铺时不访问数据库）"""
+    if vendor.store_id is None:
+        return None
+    return await session.get(Store, vendor.store_id)
+
+
 @router.post("/", response_model=StoreResponse, status_code=status.HTTP_201_CREATED)
 async def create_store(
-    store_create: StoreCreate, current_user: CurrentUser, session: SessionDep
+    store_create: StoreCreate, current_user: CurrentPrincipal, session: SessionDep
 ):
     """商家用户发布商家信息（需要审核）"""
     # 验证用户是否为商家
@@ -65,12 +81,13 @@ async def create_store(
     session.add(db_store)
     await session.commit()
     await session.refresh(db_store)
+    await invalidate_principal(session, current_user.id)
     return db_store
 
 
 @router.get("/", response_model=PageResponse[StoreResponse])
 async def list_stores(
-    session: SessionDep,
+    session: ReadSessionDep,
     skip: int = 0,
     limit: int = 100,
     state: StoreState | None = None,
@@ -146,8 +163,7 @@ async def list_stores(
 @router.get("/my", response_model=StoreResponse)
 async def get_my_store(current_vendor: CurrentVendor, session: SessionDep):
     """商家查询自己的商家信息"""
-    statement = select(Store).where(Store.owner_id == current_vendor.id)
-    store = (await session.execute(statement)).scalars().first()
+    store = await get_vendor_store(current_vendor, session)
     if not store:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="您还未发布商家信息"
@@ -158,8 +174,7 @@ async def get_my_store(current_vendor: CurrentVendor, session: SessionDep):
 @router.get("/my/status", response_model=VendorStoreStatus)
 async def get_my_store_status(current_vendor: CurrentVendor, session: SessionDep):
     """商家查询自己的商家信息状态"""
-    statement = select(Store).where(Store.owner_id == current_vendor.id)
-    store = (await session.execute(statement)).scalars().first()
+    store = await get_vendor_store(current_vendor, session)
 
     if not store:
         return VendorStoreStatus(exists=False, can_manage=False)
@@ -179,8 +194,7 @@ async def update_my_store(
     store_update: StoreUpdate, current_vendor: CurrentVendor, session: SessionDep
 ):
     """商家更新自己的商家信息"""
-    statement = select(Store).where(Store.owner_id == current_vendor.id)
-    store = (await session.execute(statement)).scalars().first()
+    store = await get_vendor_store(current_vendor, session)
     if not store:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="商家不存在")
 
@@ -200,7 +214,7 @@ async def update_my_store(
 
 
 @router.get("/{store_id}", response_model=StoreResponse)
-async def get_store(store_id: int, session: SessionDep):
+async def get_store(store_id: int, session: ReadSessionDep):
     """查询指定商家信息"""
     store = await session.get(Store, store_id)
     if not store:
@@ -212,7 +226,7 @@ async def get_store(store_id: int, session: SessionDep):
 async def update_store(
     store_id: int,
     store_update: StoreUpdate,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     session: SessionDep,
 ):
     """更新商家信息（商家本人或管理员）"""
@@ -242,7 +256,9 @@ async def update_store(
 
 
 @router.delete("/{store_id}")
-async def delete_store(store_id: int, current_user: CurrentUser, session: SessionDep):
+async def delete_store(
+    store_id: int, current_user: CurrentPrincipal, session: SessionDep
+):
     """删除商家信息（商家本人或管理员）"""
     store = await session.get(Store, store_id)
     if not store:
@@ -254,8 +270,10 @@ async def delete_store(store_id: int, current_user: CurrentUser, session: Sessio
             status_code=status.HTTP_403_FORBIDDEN, detail="您没有权限删除该商家信息"
         )
 
+    owner_id = store.owner_id
     await session.delete(store)
     await session.commit()
+    await invalidate_principal(session, owner_id)
     return {"message": "商家信息已删除"}
 
 
@@ -267,11 +285,13 @@ async def batch_delete_stores(
     success_count = 0
     failed_count = 0
     failed_ids = []
+    owner_ids = []
 
     for store_id in batch_request.ids:
         try:
             store = await session.get(Store, store_id)
             if store:
+                owner_ids.append(store.owner_id)
                 await session.delete(store)
                 success_count += 1
             else:
@@ -286,6 +306,7 @@ async def batch_delete_stores(
     # 提交所有成功的删除操作
     if success_count > 0:
         await session.commit()
+        await invalidate_principal(session, *owner_ids)
 
     return BatchDeleteResponse(
         success_count=success_count,
@@ -357,6 +378,21 @@ async def list_pending_stores(
     return PageResponse(records=result, total=total, current=current, size=limit)
 
 
+REVIEW_STATE_TITLES = {
+    StoreState.APPROVED: "已通过审核，店铺已正常营业",
+    StoreState.PENDING: "已重新进入待审核状态",
+    StoreState.DISABLED: "已被停用",
+}
+
+
+def _review_notification_body(store: Store, review: StoreReview) -> str:
+    result = REVIEW_STATE_TITLES.get(review.state, review.state.value)
+    body = f"您好！\n\n您的商家信息“{store.name}”{result}。\n"
+    if review.review_comment:
+        body += f"审核意见：{review.review_comment}\n"
+    return body
+
+
 @router.post("/{store_id}/review", response_model=StoreResponse)
 async def review_store(
     store_id: int, review: StoreReview, current_admin: CurrentAdmin, session: SessionDep
@@ -367,13 +403,24 @@ async def review_store(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="商家不存在")
 
     # 更新审核状态
+    state_changed = store.state != review.state
     store.state = review.state
     store.review_time = datetime.utcnow()
 
     session.add(store)
     await session.commit()
     await session.refresh(store)
-
-    # TODO: 发送审核结果通知给商家
+    if state_changed:
+        await invalidate_principal(session, store.owner_id)
+
+    # 发送审核结果通知给商家（写入发件箱，异步投递）
+    owner = await session.get(User, store.owner_id)
+    if owner:
+        await enqueue_email(
+            session,
+            f"餐饮预订系统商家审核结果：{store.name}",
+            _review_notification_body(store, review),
+            owner.email,
+        )
 
     return store
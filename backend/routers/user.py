@@ -3,7 +3,13 @@ from fastapi import APIRouter, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from ..dependencies import SessionDep, CurrentUser, CurrentAdmin
+from ..dependencies import (
+    SessionDep,
+    ReadSessionDep,
+    CurrentUser,
+    CurrentAdmin,
+    invalidate_principal,
+)
 from ..models import User
 from ..schemas import (
     UserResponse,
@@ -16,7 +22,8 @@ from ..schemas import (
     BatchDeleteRequest,
     BatchDeleteResponse,
 )
-from ..security import verify_password, get_password_hash
+from ..security import verify_password_async, get_password_hash_async
+from ..utils.token_revocation import revocation_list
 
 router = APIRouter(prefix="/user", tags=["用户管理"])
 
@@ -67,12 +74,17 @@ async def update_my_info(
 
     # 更新用户信息
     update_data = user_update.model_dump(exclude_unset=True)
+    new_user_type = update_data.get("user_type", current_user.user_type)
+    role_changed = new_user_type != current_user.user_type
     for key, value in update_data.items():
         setattr(current_user, key, value)
 
     session.add(current_user)
     await session.commit()
     await session.refresh(current_user)
+    # 缓存的身份只包含角色和店铺，修改用户名、邮箱、手机号无需通知其他进程
+    if role_changed:
+        await invalidate_principal(session, current_user.id)
     return current_user
 
 
@@ -82,15 +94,21 @@ async def update_my_password(
 ):
     """修改当前用户密码"""
     # 验证旧密码
-    if not verify_password(password_update.old_password, current_user.hashed_password):
+    verified, _ = await verify_password_async(
+        password_update.old_password, current_user.hashed_password
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="旧密码错误"
         )
 
     # 更新密码
-    current_user.hashed_password = get_password_hash(password_update.new_password)
+    current_user.hashed_password = await get_password_hash_async(
+        password_update.new_password
+    )
     session.add(current_user)
     await session.commit()
+    await revocation_list.revoke_user(session, current_user.id)
     return {"message": "密码修改成功"}
 
 
@@ -100,11 +118,17 @@ async def delete_my_account(
 ):
     """注销当前用户账户(需要验证密码)"""
     # 验证密码
-    if not verify_password(delete_request.password, current_user.hashed_password):
+    verified, _ = await verify_password_async(
+        delete_request.password, current_user.hashed_password
+    )
+    if not verified:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="密码错误")
 
+    user_id = current_user.id
     await session.delete(current_user)
     await session.commit()
+    # 吊销该用户的全部令牌，各进程在解析令牌时即拒绝，无需另行通知身份变更
+    await revocation_list.revoke_user(session, user_id)
     return {"message": "账户已注销"}
 
 
@@ -140,7 +164,7 @@ async def create_user(
             )
 
     # 创建新用户
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     db_user = User(
         username=user_create.username,
         email=user_create.email,
@@ -156,7 +180,7 @@ async def create_user(
 
 @router.get("/", response_model=PageResponse[UserResponse])
 async def list_users(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_admin: CurrentAdmin,
     skip: int = 0,
     limit: int = 100,
@@ -232,12 +256,15 @@ async def update_user(
 
     # 更新用户信息
     update_data = user_update.model_dump(exclude_unset=True)
+    role_changed = update_data.get("user_type", user.user_type) != user.user_type
     for key, value in update_data.items():
         setattr(user, key, value)
 
     session.add(user)
     await session.commit()
     await session.refresh(user)
+    if role_changed:
+        await invalidate_principal(session, user.id)
     return user
 
 
@@ -250,6 +277,8 @@ async def delete_user(user_id: int, session: SessionDep, current_admin: CurrentA
 
     await session.delete(user)
     await session.commit()
+    # 吊销该用户的全部令牌，各进程在解析令牌时即拒绝，无需另行通知身份变更
+    await revocation_list.revoke_user(session, user_id)
     return {"message": "用户已删除"}
 
 
@@ -286,6 +315,10 @@ async def batch_delete_users(
     # 提交所有成功的删除操作
     if success_count > 0:
         await session.commit()
+        deleted_ids = [
+            user_id for user_id in batch_request.ids if user_id not in failed_ids
+        ]
+        await revocation_list.revoke_user(session, *deleted_ids)
 
     return BatchDeleteResponse(
         success_count=success_count,
@@ -308,9 +341,10 @@ async def admin_reset_user_password(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在")
 
     # 更新密码为默认密码或指定密码
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await get_password_hash_async(new_password)
     session.add(user)
     await session.commit()
+    await revocation_list.revoke_user(session, user.id)
     return {"message": f"密码已重置为: {new_password}"}
 
 
@@ -328,7 +362,8 @@ async def reset_password(reset_data: UserPasswordReset, session: SessionDep):
     # 目前简化处理，实际应该有验证码发送和验证逻辑
 
     # 更新密码
-    user.hashed_password = get_password_hash(reset_data.new_password)
+    user.hashed_password = await get_password_hash_async(reset_data.new_password)
     session.add(user)
     await session.commit()
+    await revocation_list.revoke_user(session, user.id)
     return {"message": "密码重置成功"}
@@ -278,6 +278,67 @@ class SiteStatsResponse(BaseModel):
     turnover_total: float = 0.0
 
 
+class PoolStatsResponse(BaseModel):
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    checked_out: int  # 正在使用的连接数
+    checked_in: int  # 池中空闲的连接数
+    overflow: int  # 超出 pool_size 额外创建的连接数
+    checkouts: int  # 统计周期内获取连接的次数
+    timeouts: int  # 等待超时（QueuePool limit）的次数
+    wait_avg_ms: float
+    wait_p50_ms: float
+    wait_p99_ms: float
+    wait_max_ms: float
+
+
+class QueryStatsResponse(BaseModel):
+    fingerprint: str  # 归一化后的 SQL
+    count: int
+    errors: int
+    total_ms: float
+    avg_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class AllocationStat(BaseModel):
+    location: str  # 文件:行号（group_by=traceback 时为完整调用栈）
+    size_kb: float
+    size_diff_kb: float  # 相比基线快照的增长
+    count: int
+    count_diff: int
+
+
+class RouteMemoryStat(BaseModel):
+    method: str
+    route: str
+    requests: int
+    total_kb: float  # 请求前后已追踪内存差值之和
+    avg_kb: float
+    max_kb: float
+
+
+class MemoryStatsResponse(BaseModel):
+    rss_kb: float
+    max_rss_kb: float
+    tracing: bool
+    traced_kb: float
+    traced_peak_kb: float
+    gc_objects: int
+    models: dict[str, int]  # SQLModel 表模型 -> 存活实例数
+    top_allocations: list[AllocationStat]
+    routes: list[RouteMemoryStat]
+
+
+class ReplicaStatsResponse(BaseModel):
+    name: str
+    healthy: bool
+    lag_seconds: Optional[float] = None  # 为空表示从库不可用
+    checked_at: float
+
+
 # ============ Auth Schemas ============
 class Token(BaseModel):
     access_token: str
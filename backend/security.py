@@ -1,46 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any
-import hashlib
+import asyncio
+import logging
+import secrets
 
 import jwt
-# from passlib.context import CryptContext
+from passlib.context import CryptContext
 
-# 临时使用简单的 SHA256 加密（无盐），仅用于测试
-# ⚠️ 生产环境请使用 passlib 的 bcrypt 或 argon2
-# pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .config import get_config
+
+# passlib 读取新版 bcrypt 版本号时会输出无害的警告
+logging.getLogger("passlib").setLevel(logging.ERROR)
+
+# 密码哈希配置
+password_config = get_config().get("password", {})
+BCRYPT_ROUNDS = password_config.get("bcrypt_rounds", 12)
+HASH_WORKERS = password_config.get("hash_workers", 4)
+HASH_MAX_PENDING = password_config.get("max_pending", HASH_WORKERS * 8)
+
+# bcrypt 为当前方案；hex_sha256 是旧版无盐 SHA-256 哈希，仅用于校验，登录成功后自动升级
+pwd_context = CryptContext(
+    schemes=["bcrypt", "hex_sha256"],
+    deprecated=["hex_sha256"],
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt 计算期间会释放 GIL，使用线程池即可并行且不阻塞事件循环
+_hash_executor = ThreadPoolExecutor(
+    max_workers=HASH_WORKERS, thread_name_prefix="password-hash"
+)
+# 限制排队中的哈希任务数量，避免登录洪峰时无限堆积
+_hash_slots = asyncio.Semaphore(HASH_MAX_PENDING)
 
 
 SECRET_KEY = "your-secret-key"  # 请换成环境变量或配置
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    now = datetime.now(timezone.utc)
+    # iat 保留小数，用于和用户吊销时刻比较
+    to_encode = {
+        "exp": now + expires_delta,
+        "iat": now.timestamp(),
+        "sub": str(subject),
+    }
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """验证密码 - 临时使用 SHA256"""
-    plain_hash = hashlib.sha256(plain_password.encode()).hexdigest()
-    return plain_hash == hashed_password
+    """验证密码（同步，会阻塞调用线程）"""
+    return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """生成密码哈希 - 临时使用 SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """生成密码哈希（同步，会阻塞调用线程）"""
+    return pwd_context.hash(password)
+
+
+async def _run_in_hash_pool(func, *args):
+    async with _hash_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """在线程池中验证密码
+
+    返回 (是否通过, 新哈希)。旧版 SHA-256 或 cost 过低的哈希验证通过时，
+    新哈希不为 None，调用方应将其写回数据库。
+    """
+    return await _run_in_hash_pool(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在线程池中生成密码哈希"""
+    return await _run_in_hash_pool(pwd_context.hash, password)
 
 
 def create_refesh_token(
-    subject: str | Any, expires_delta: timedelta = timedelta(days=7)
+    subject: str | Any,
+    expires_delta: timedelta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    family: str | None = None,
 ) -> str:
     """
     生成刷新令牌，默认过期时间为7天
-    该令牌用于获取新的访问令牌
+    该令牌用于获取新的访问令牌；每个令牌有唯一的 jti，
+    同一次登录轮换出的令牌共享同一个 fam（家族）
     """
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "exp": now + expires_delta,
+        "iat": now.timestamp(),
+        "sub": str(subject),
+        "type": "refresh",
+        "jti": secrets.token_urlsafe(16),
+        "fam": family or secrets.token_urlsafe(16),
+    }
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -0,0 +1,418 @@
+"""
+测试数据生成脚本 - 批量生成接近生产规模的用户、商家、菜品和订单
+
+数据分布：
+- 商家热度服从 Zipf 分布（少数热门档口承接大部分订单），店内菜品热度同样服从 Zipf 分布
+- 下单时间集中在午餐（12:00 前后）和晚餐（17:45 前后）高峰，周末订单量较少
+- 近期订单仍处于待审核/已同意状态，较早的订单大多已完成，少量已取消；评论数默认为订单数的 5%
+
+库中没有管理员时另建一个管理员账号，执行计划检查（benchmarks/query_plans.py）的管理员用例需要它。
+
+写入时绕过 ORM 工作单元，直接使用 Core 批量 INSERT，并预先分配主键，订单项无需回读订单 ID。
+
+用法（在仓库根目录运行，数据库取自 config.yaml，也可用 --database-url 指定）:
+    python -m backend.seed_data --users 100000 --stores 1000 --orders 5700000
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .database import create_database_engine, database_url
+from .migrations import apply_migrations
+from .models import (
+    Comment,
+    CommentState,
+    Item,
+    Order,
+    OrderItem,
+    OrderState,
+    Store,
+    StoreState,
+    User,
+    UserType,
+    utcnow,
+)
+from .security import get_password_hash
+
+SEED_PASSWORD = "seed123456"
+
+# 每单菜品数量的分布（平均约 1.75 项）
+LINES_PER_ORDER = (1, 2, 3, 4)
+LINES_WEIGHTS = (50, 30, 15, 5)
+
+COMMENT_TEMPLATES = (
+    "味道不错，出餐很快",
+    "分量足，价格实惠",
+    "好吃，会再来",
+    "今天有点咸",
+    "排队太久了",
+    "打包很仔细",
+)
+
+# 下单时段：(权重, 均值小时, 标准差小时)；其余时间均匀分布在 7:00-21:00
+MEAL_PEAKS = ((0.6, 12.0, 0.4), (0.3, 17.75, 0.5))
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    """排名第 k 的元素权重为 1/k^s 的累积权重，用于 random.choices"""
+    return list(
+        itertools.accumulate(1 / (rank**exponent) for rank in range(1, count + 1))
+    )
+
+
+class OrderTimeSampler:
+    """按午晚餐高峰和工作日/周末生成下单时间（返回 UTC 时间）"""
+
+    def __init__(self, days: int, utc_offset_hours: float, rng: random.Random):
+        self.rng = rng
+        today = utcnow() + timedelta(hours=utc_offset_hours)
+        self.first_day = (today - timedelta(days=days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.utc_offset = timedelta(hours=utc_offset_hours)
+        self.now = utcnow()
+        # 周末订单量约为工作日的 60%
+        day_weights = [
+            0.6 if (self.first_day + timedelta(days=d)).weekday() >= 5 else 1.0
+            for d in range(days + 1)
+        ]
+        self.day_cum_weights = list(itertools.accumulate(day_weights))
+        self.days = range(days + 1)
+
+    def _hour(self) -> float:
+        roll = self.rng.random()
+        for weight, mean, stddev in MEAL_PEAKS:
+            if roll < weight:
+                return min(23.99, max(6.0, self.rng.gauss(mean, stddev)))
+            roll -= weight
+        return self.rng.uniform(7, 21)
+
+    def sample(self) -> datetime:
+        while True:
+            day = self.rng.choices(self.days, cum_weights=self.day_cum_weights)[0]
+            local = self.first_day + timedelta(days=day, hours=self._hour())
+            created = local - self.utc_offset
+            if created <= self.now:
+                return created
+
+
+def _order_state(age: timedelta, rng: random.Random) -> OrderState:
+    if age < timedelta(minutes=30):
+        return rng.choice((OrderState.PENDING, OrderState.APPROVED))
+    if age < timedelta(hours=3):
+        return rng.choices(
+            (OrderState.APPROVED, OrderState.COMPLETED, OrderState.CANCELLED),
+            (30, 65, 5),
+        )[0]
+    return rng.choices((OrderState.COMPLETED, OrderState.CANCELLED), (95, 5))[0]
+
+
+async def _next_id(conn: AsyncConnection, table) -> int:
+    current = (await conn.execute(select(func.max(table.c.id)))).scalar()
+    return (current or 0) + 1
+
+
+async def _bulk_insert(conn: AsyncConnection, table, rows: list[dict]) -> None:
+    if rows:
+        await conn.execute(insert(table), rows)
+
+
+async def _prepare_connection(conn: AsyncConnection) -> None:
+    """导入期间放宽一致性检查以加快写入（仅对当前连接生效）"""
+    if conn.dialect.name == "mysql":
+        await conn.exec_driver_sql("SET unique_checks=0, foreign_key_checks=0")
+    elif conn.dialect.name == "sqlite":
+        # WAL 等 PRAGMA 已由 create_database_engine 设置，这里只关闭同步落盘
+        await conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+
+class Progress:
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+        self._last_report = 0.0
+
+    def add(self, count: int) -> None:
+        self.done += count
+        now = time.perf_counter()
+        if now - self._last_report >= 2 or self.done >= self.total:
+            self._last_report = now
+            elapsed = now - self.started
+            print(
+                f"  {self.label}: {self.done}/{self.total} "
+                f"({self.done / max(elapsed, 1e-9):,.0f} 行/秒)",
+                flush=True,
+            )
+
+
+async def seed(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    engine = create_database_engine(args.database_url or database_url)
+    tables = {
+        model: model.__table__  # type: ignore[attr-defined]
+        for model in (User, Store, Item, Order, OrderItem, Comment)
+    }
+    hashed_password = get_password_hash(SEED_PASSWORD)
+    now = utcnow()
+    batch_size = args.batch_size
+
+    await apply_migrations(engine)
+
+    async with engine.connect() as conn:
+        await _prepare_connection(conn)
+
+        # ---- 用户：每个商家一个商户账号，其余为普通用户 ----
+        first_user_id = await _next_id(conn, tables[User])
+        vendor_count = args.stores
+        total_users = args.users + vendor_count
+        progress = Progress("用户", total_users)
+        for start in range(0, total_users, batch_size):
+            rows = []
+            for offset in range(start, min(start + batch_size, total_users)):
+                user_id = first_user_id + offset
+                is_vendor = offset < vendor_count
+                rows.append(
+                    {
+                        "id": user_id,
+                        "username": f"seed_{'vendor' if is_vendor else 'user'}{user_id}",
+                        "email": f"seed{user_id}@seed.example.com",
+                        "hashed_password": hashed_password,
+                        "user_type": UserType.VENDOR
+                        if is_vendor
+                        else UserType.CUSTOMER,
+                        "create_time": now - timedelta(days=args.days + 30),
+                    }
+                )
+            await _bulk_insert(conn, tables[User], rows)
+            await conn.commit()
+            progress.add(len(rows))
+        vendor_ids = range(first_user_id, first_user_id + vendor_count)
+        customer_ids = range(first_user_id + vendor_count, first_user_id + total_users)
+
+        # 管理员用例（审核列表、全站订单等）需要管理员账号，库中没有时补一个
+        admin_exists = (
+            await conn.execute(
+                select(tables[User].c.id)
+                .where(tables[User].c.user_type == UserType.ADMIN)
+                .limit(1)
+            )
+        ).scalar()
+        if admin_exists is None:
+            admin_id = first_user_id + total_users
+            await _bulk_insert(
+                conn,
+                tables[User],
+                [
+                    {
+                        "id": admin_id,
+                        "username": f"seed_admin{admin_id}",
+                        "email": f"seed{admin_id}@seed.example.com",
+                        "hashed_password": hashed_password,
+                        "user_type": UserType.ADMIN,
+                        "create_time": now - timedelta(days=args.days + 30),
+                    }
+                ],
+            )
+            await conn.commit()
+            print(f"  管理员: seed_admin{admin_id}")
+
+        # ---- 商家与菜品 ----
+        first_store_id = await _next_id(conn, tables[Store])
+        store_ids = list(range(first_store_id, first_store_id + args.stores))
+        await _bulk_insert(
+            conn,
+            tables[Store],
+            [
+                {
+                    "id": store_id,
+                    "name": f"档口{store_id}",
+                    "address": f"第{index % 5 + 1}食堂 {index} 号窗口",
+                    "phone": f"0{store_id:010d}",
+                    "hours": "07:00-21:00",
+                    "state": StoreState.APPROVED,
+                    "publish_time": now - timedelta(days=args.days + 30),
+                    "review_time": now - timedelta(days=args.days + 29),
+                    "owner_id": owner_id,
+                }
+                for index, (store_id, owner_id) in enumerate(zip(store_ids, vendor_ids))
+            ],
+        )
+        first_item_id = await _next_id(conn, tables[Item])
+        prices: dict[int, float] = {}
+        item_rows = []
+        for store_index, store_id in enumerate(store_ids):
+            for rank in range(args.items_per_store):
+                item_id = first_item_id + store_index * args.items_per_store + rank
+                prices[item_id] = round(rng.uniform(6, 30) * 2) / 2
+                item_rows.append(
+                    {
+                        "id": item_id,
+                        "name": f"菜品{store_id}-{rank + 1}",
+                        "price": prices[item_id],
+                        "quantity": 10**6,
+                        "store_id": store_id,
+                    }
+                )
+        for start in range(0, len(item_rows), batch_size):
+            await _bulk_insert(
+                conn, tables[Item], item_rows[start : start + batch_size]
+            )
+        await conn.commit()
+        print(f"  商家: {len(store_ids)}，菜品: {len(item_rows)}")
+
+        # ---- 订单与订单项 ----
+        store_cum_weights = zipf_cum_weights(len(store_ids), args.store_skew)
+        item_cum_weights = zipf_cum_weights(args.items_per_store, args.item_skew)
+        item_total_weight = item_cum_weights[-1]
+        sampler = OrderTimeSampler(args.days, args.utc_offset, rng)
+        # 部分用户是常客：用户 ID 同样按 Zipf 分布抽取
+        customer_cum_weights = zipf_cum_weights(len(customer_ids), 0.5)
+
+        order_id = await _next_id(conn, tables[Order])
+        line_id = await _next_id(conn, tables[OrderItem])
+        progress = Progress("订单", args.orders)
+        lines_written = 0
+        started = time.perf_counter()
+        for start in range(0, args.orders, batch_size):
+            count = min(batch_size, args.orders - start)
+            store_indices = rng.choices(
+                range(len(store_ids)), cum_weights=store_cum_weights, k=count
+            )
+            customers = rng.choices(
+                customer_ids, cum_weights=customer_cum_weights, k=count
+            )
+            line_counts = rng.choices(LINES_PER_ORDER, LINES_WEIGHTS, k=count)
+            order_rows = []
+            line_rows = []
+            for store_index, user_id, line_count in zip(
+                store_indices, customers, line_counts
+            ):
+                created = sampler.sample()
+                state = _order_state(now - created, rng)
+                order_rows.append(
+                    {
+                        "id": order_id,
+                        "create_time": created,
+                        "review_time": (
+                            None
+                            if state == OrderState.PENDING
+                            else created + timedelta(minutes=rng.uniform(1, 10))
+                        ),
+                        "state": state,
+                        "user_id": user_id,
+                        "store_id": store_ids[store_index],
+                    }
+                )
+                first_store_item = first_item_id + store_index * args.items_per_store
+                ranks = {
+                    bisect.bisect_left(
+                        item_cum_weights, rng.random() * item_total_weight
+                    )
+                    for _ in range(line_count)
+                }
+                for rank in ranks:
+                    item_id = first_store_item + rank
+                    line_rows.append(
+                        {
+                            "id": line_id,
+                            "quantity": 1 if rng.random() < 0.85 else 2,
+                            "item_price": prices[item_id],
+                            "order_id": order_id,
+                            "item_id": item_id,
+                        }
+                    )
+                    line_id += 1
+                order_id += 1
+            await _bulk_insert(conn, tables[Order], order_rows)
+            await _bulk_insert(conn, tables[OrderItem], line_rows)
+            await conn.commit()
+            lines_written += len(line_rows)
+            progress.add(count)
+        elapsed = time.perf_counter() - started
+
+        # ---- 评论：同样集中在热门商家，大部分已审核通过 ----
+        progress = Progress("评论", args.comments)
+        for start in range(0, args.comments, batch_size):
+            count = min(batch_size, args.comments - start)
+            store_indices = rng.choices(
+                range(len(store_ids)), cum_weights=store_cum_weights, k=count
+            )
+            customers = rng.choices(
+                customer_ids, cum_weights=customer_cum_weights, k=count
+            )
+            rows = []
+            for store_index, user_id in zip(store_indices, customers):
+                published = sampler.sample() + timedelta(hours=1)
+                state = rng.choices(
+                    (
+                        CommentState.APPROVED,
+                        CommentState.PENDING,
+                        CommentState.REJECTED,
+                    ),
+                    (85, 10, 5),
+                )[0]
+                rows.append(
+                    {
+                        "content": rng.choice(COMMENT_TEMPLATES),
+                        "publish_time": published,
+                        "review_time": (
+                            None
+                            if state == CommentState.PENDING
+                            else published + timedelta(hours=rng.uniform(1, 24))
+                        ),
+                        "state": state,
+                        "user_id": user_id,
+                        "store_id": store_ids[store_index],
+                    }
+                )
+            await _bulk_insert(conn, tables[Comment], rows)
+            await conn.commit()
+            progress.add(count)
+
+    await engine.dispose()
+    print(
+        f"完成：{args.orders} 个订单，{lines_written} 个订单项，"
+        f"耗时 {elapsed:.1f}s（{lines_written / max(elapsed, 1e-9):,.0f} 订单项/秒）"
+    )
+    print(f"生成的账号密码均为 {SEED_PASSWORD}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量生成测试数据")
+    parser.add_argument("--users", type=int, default=10000, help="普通用户数")
+    parser.add_argument(
+        "--stores", type=int, default=100, help="商家数（每家一个商户账号）"
+    )
+    parser.add_argument("--items-per-store", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--comments", type=int, help="评论数（默认为订单数的 5%%）")
+    parser.add_argument("--days", type=int, default=30, help="订单分布的天数")
+    parser.add_argument(
+        "--store-skew", type=float, default=1.1, help="商家热度 Zipf 指数"
+    )
+    parser.add_argument(
+        "--item-skew", type=float, default=1.2, help="菜品热度 Zipf 指数"
+    )
+    parser.add_argument(
+        "--utc-offset",
+        type=float,
+        default=8,
+        help="食堂所在时区（小时），用于确定高峰时段",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="默认使用 config.yaml 中的数据库")
+    args = parser.parse_args()
+    if args.comments is None:
+        args.comments = args.orders // 20
+    asyncio.run(seed(args))
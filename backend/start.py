@@ -1,12 +1,22 @@
 """
 快速启动脚本
 用于一键初始化和启动后端服务
+
+用法:
+    python start.py          # 开发模式：安装依赖、迁移、初始化管理员，单进程 --reload 启动
+    python start.py --prod   # 生产模式：迁移、初始化管理员，按 config.yaml 的 server 启动多个 worker
 """
 
+import argparse
+import importlib.util
 import subprocess
 import sys
 import os
 
+from config import get_config
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 def print_section(title):
     """打印分隔符"""
@@ -78,6 +88,22 @@ def check_database_config():
         return True  # 继续执行，使用默认配置
 
 
+def migrate_database():
+    """执行数据库结构迁移"""
+    print_section("数据库结构迁移")
+    result = subprocess.run(
+        [sys.executable, "-m", "backend.migrate"],
+        cwd=REPO_ROOT,
+        check=False,
+    )
+    if result.returncode != 0:
+        print(
+            "❌ 数据库迁移失败，请检查数据库配置后手动运行: python -m backend.migrate"
+        )
+        return False
+    return True
+
+
 def init_admin():
     """初始化管理员账户"""
     print_section("初始化管理员账户")
@@ -113,20 +139,150 @@ def start_server():
                 sys.executable,
                 "-m",
                 "uvicorn",
-                "main:app",
+                "backend.main:create_app",
+                "--factory",
                 "--reload",
                 "--host",
                 "0.0.0.0",
                 "--port",
                 "8000",
-            ]
+            ],
+            cwd=REPO_ROOT,
         )
     except KeyboardInterrupt:
         print("\n\n服务器已停止")
 
 
+def available_cpus():
+    """当前进程可用的 CPU 核数（容器中受 cpuset 限制时小于 os.cpu_count()）"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def build_production_command(server, workers):
+    """生产模式启动命令
+
+    Linux/macOS 上安装了 gunicorn 时由 gunicorn 管理 worker（支持 preload 和 kill -HUP 平滑重启）；
+    否则（包括 Windows）使用 uvicorn 自带的多进程管理（kill -HUP 逐个替换 worker）。
+    两种方式下每个 worker 都调用 create_app() 创建各自的应用、连接池和后台任务。
+    """
+    host = server.get("host", "0.0.0.0")
+    port = server.get("port", 8000)
+    max_requests = server.get("max_requests", 10000)
+    max_requests_jitter = server.get("max_requests_jitter", 1000)
+    graceful_timeout = server.get("graceful_timeout_seconds", 30)
+    drain_seconds = server.get("drain_seconds", 5)
+    keepalive = server.get("keepalive_seconds", 5)
+    backlog = server.get("backlog", 2048)
+
+    if sys.platform != "win32" and importlib.util.find_spec("gunicorn") is not None:
+        # uvicorn.workers 已弃用，优先使用独立的 uvicorn-worker 包
+        if importlib.util.find_spec("uvicorn_worker") is not None:
+            worker_class = "uvicorn_worker.UvicornWorker"
+        else:
+            worker_class = "uvicorn.workers.UvicornWorker"
+        command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "backend.main:create_app()",
+            "--worker-class",
+            worker_class,
+            "--workers",
+            str(workers),
+            "--bind",
+            f"{host}:{port}",
+            "--max-requests",
+            str(max_requests),
+            "--max-requests-jitter",
+            str(max_requests_jitter),
+            "--graceful-timeout",
+            str(graceful_timeout),
+            "--timeout",
+            str(server.get("timeout_seconds", 60)),
+            "--keep-alive",
+            str(keepalive),
+            "--backlog",
+            str(backlog),
+        ]
+        if server.get("preload", True):
+            command.append("--preload")
+        return command
+
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "backend.main:create_app",
+        "--factory",
+        "--host",
+        str(host),
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--loop",
+        server.get("loop", "auto"),
+        "--http",
+        server.get("http", "auto"),
+        "--timeout-keep-alive",
+        str(keepalive),
+        "--backlog",
+        str(backlog),
+        # drain 期间仍在处理请求，剩余时间留给关闭监听后等待进行中的请求
+        "--timeout-graceful-shutdown",
+        str(max(1, int(graceful_timeout - drain_seconds))),
+    ]
+    if max_requests:
+        command += [
+            "--limit-max-requests",
+            str(max_requests),
+            "--limit-max-requests-jitter",
+            str(max_requests_jitter),
+        ]
+    return command
+
+
+def start_production_server(workers=None):
+    """生产模式启动：多 worker，无 --reload"""
+    print_section("启动服务器（生产模式）")
+    server = get_config().get("server", {})
+    workers = workers or server.get("workers") or available_cpus()
+    command = build_production_command(server, workers)
+    env = {
+        **os.environ,
+        "ORDER_SYSTEM_DRAIN_SECONDS": str(server.get("drain_seconds", 5)),
+    }
+
+    print(f"worker 进程数: {workers}")
+    print(f"进程管理: {command[2]}")
+    for module in ("uvloop", "httptools"):
+        installed = importlib.util.find_spec(module) is not None
+        print(f"{module}: {'已安装' if installed else '未安装'}")
+    print("平滑重启 worker: kill -HUP <主进程 pid>；停止: kill -TERM <主进程 pid>")
+    print("-" * 60)
+
+    try:
+        result = subprocess.run(command, cwd=REPO_ROOT, env=env, check=False)
+    except KeyboardInterrupt:
+        print("\n\n服务器已停止")
+        return
+    if result.returncode != 0:
+        sys.exit(result.returncode)
+
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="食堂餐点预定系统 - 后端快速启动")
+    parser.add_argument(
+        "--prod", action="store_true", help="生产模式：多 worker 启动，不安装依赖"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="worker 进程数，默认使用 server.workers"
+    )
+    args = parser.parse_args()
+
     print("\n" + "=" * 60)
     print("  食堂餐点预定系统 - 后端快速启动")
     print("=" * 60)
@@ -135,8 +291,8 @@ def main():
     if not check_python_version():
         sys.exit(1)
 
-    # 2. 安装依赖
-    if not install_dependencies():
+    # 2. 安装依赖（生产环境由部署流程安装）
+    if not args.prod and not install_dependencies():
         print("\n❌ 依赖安装失败，请手动安装")
         print("   运行: pip install -r requirements.txt")
         sys.exit(1)
@@ -144,11 +300,18 @@ def main():
     # 3. 检查数据库配置
     check_database_config()
 
-    # 4. 初始化管理员
+    # 4. 数据库结构迁移
+    if not migrate_database():
+        sys.exit(1)
+
+    # 5. 初始化管理员
     init_admin()
 
-    # 5. 启动服务器
-    start_server()
+    # 6. 启动服务器
+    if args.prod:
+        start_production_server(args.workers)
+    else:
+        start_server()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+"""测试公共夹具
+
+导入 backend 之前把数据库指向 SQLite 内存库（每个引擎独占的临时文件库，启动时自动迁移），
+不依赖本地 MySQL 和 SMTP 服务。每个用例使用一个新应用和一个空数据库。
+"""
+
+import os
+
+os.environ["ORDER_SYSTEM_DATABASE_URL"] = "sqlite+aiosqlite://"
+
+import httpx
+import pytest
+
+from backend import database, dependencies
+from backend.main import create_app
+from backend.models import User, UserType
+from backend.security import get_password_hash_async
+from backend.utils import outbox, rate_limit, warmup
+
+PASSWORD = "pw123456"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def warmup_enabled():
+    """默认跳过启动预热，需要预热的测试模块覆盖该夹具"""
+    return False
+
+
+@pytest.fixture
+async def app(monkeypatch, warmup_enabled):
+    # 发件箱由用例自行驱动，应用内不启动后台投递任务；限流从零开始计数
+    monkeypatch.setattr(outbox, "OUTBOX_WORKERS", 0)
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", warmup_enabled)
+    monkeypatch.setattr(rate_limit, "_backend", None)
+    # 各用例的数据库都从用户ID 1 开始，清空上一个用例缓存的身份
+    dependencies._principal_cache.clear()
+    dependencies._token_cache.clear()
+    application = create_app()
+    async with application.router.lifespan_context(application):
+        yield application
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as test_client:
+        yield test_client
+
+
+async def create_user(username: str, user_type: UserType) -> User:
+    async with database.async_session_factory() as session:
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password=await get_password_hash_async(PASSWORD),
+            user_type=user_type,
+        )
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        return user
+
+
+async def login(client: httpx.AsyncClient, username: str) -> dict[str, str]:
+    """登录并返回带访问令牌的请求头"""
+    response = await client.post(
+        "/auth/login", json={"username": username, "password": PASSWORD}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,38 @@
+"""存活与就绪检查"""
+
+import asyncio
+
+import anyio
+import pytest
+
+from backend.utils import health
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_health_is_liveness_alias(client):
+    legacy = await client.get("/health")
+    live = await client.get("/health/live")
+
+    assert legacy.status_code == live.status_code == 200
+    assert legacy.json() == live.json()
+
+
+async def test_ready_does_not_wait_for_stuck_backlog_count(client, monkeypatch):
+    async def stuck(session):
+        # 相当于连接池耗尽时等待 pool_timeout
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(health, "count_backlog", stuck)
+    monkeypatch.setattr(
+        health, "_outbox_check", health.CachedCheck(health._count_outbox_backlog, 0)
+    )
+
+    with anyio.fail_after(health.DB_PING_TIMEOUT_SECONDS + 2):
+        response = await client.get("/health/ready")
+
+    # 积压统计失败只记录错误，不判为未就绪
+    assert response.status_code == 200
+    outbox = response.json()["checks"]["outbox"]
+    assert outbox["ok"] is True
+    assert "TimeoutError" in outbox["error"]
@@ -0,0 +1,27 @@
+"""冷启动导入耗时：在全新子进程中用 python -X importtime 测量，检查预算和应延迟加载的模块"""
+
+import statistics
+
+import pytest
+
+from backend.benchmarks.import_time import (
+    BUDGETS_MS,
+    DEFERRED_MODULES,
+    SCENARIOS,
+    measure,
+)
+
+RUNS = 3
+
+
+@pytest.mark.parametrize("scenario", list(SCENARIOS))
+def test_import_within_budget(scenario):
+    walls = []
+    modules: dict = {}
+    for _ in range(RUNS):
+        wall, modules = measure(SCENARIOS[scenario])
+        walls.append(wall)
+
+    assert modules, "未解析到 -X importtime 输出"
+    assert statistics.median(walls) <= BUDGETS_MS[scenario]
+    assert not set(DEFERRED_MODULES) & set(modules)
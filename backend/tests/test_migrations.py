@@ -0,0 +1,42 @@
+"""迁移建出的表结构与模型一致：修改模型而未新增迁移时失败"""
+
+import pytest
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+from backend.database import create_database_engine
+from backend.migrations import apply_migrations, latest_version, schema_version_table
+
+pytestmark = pytest.mark.anyio
+
+
+def _schema(sync_conn) -> dict:
+    inspector = inspect(sync_conn)
+    return {
+        name: (
+            {column["name"] for column in inspector.get_columns(name)},
+            {tuple(index["column_names"]) for index in inspector.get_indexes(name)},
+        )
+        for name in inspector.get_table_names()
+        if name != schema_version_table.name
+    }
+
+
+async def test_migrations_match_models():
+    engine = create_database_engine("sqlite+aiosqlite://")
+    try:
+        applied = await apply_migrations(engine)
+        assert applied[-1].version == latest_version()
+        async with engine.connect() as conn:
+            migrated = await conn.run_sync(_schema)
+    finally:
+        await engine.dispose()
+
+    expected = {
+        table.name: (
+            {column.name for column in table.columns},
+            {tuple(column.name for column in index.columns) for index in table.indexes},
+        )
+        for table in SQLModel.metadata.sorted_tables
+    }
+    assert migrated == expected
@@ -0,0 +1,210 @@
+"""邮件发件箱投递：本地 aiosmtpd 服务器代替真实 SMTP
+
+应用内不启动后台发送任务（见 conftest），用例直接调用领取和投递函数，结果确定。
+"""
+
+import asyncio
+import re
+import socket
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import update
+
+from backend import database
+from backend.models import EmailOutbox, EmailOutboxState, utcnow
+from backend.utils import email as email_module
+from backend.utils import outbox
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingHandler:
+    """记录收到的邮件及对端地址；fail 为 True 时以 451 拒收，delay 模拟慢速服务器"""
+
+    def __init__(self):
+        self.messages: list[tuple[tuple, bytes]] = []
+        self.fail = False
+        self.delay = 0.0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            return "451 Requested action aborted: local error in processing"
+        self.messages.append((session.peer, envelope.content))
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    settings = email_module.SMTPSettings(
+        host="127.0.0.1",
+        port=controller.port,
+        user="",
+        password="",
+        sender="noreply@example.com",
+        use_tls=False,
+        timeout=5,
+    )
+    monkeypatch.setattr(email_module, "get_smtp_settings", lambda: settings)
+    yield handler
+    controller.stop()
+
+
+async def _enqueue(count: int) -> list[int]:
+    async with database.async_session_factory() as session:
+        messages = [
+            await outbox.enqueue_email(
+                session, f"subject {i}", "body", f"user{i}@example.com"
+            )
+            for i in range(count)
+        ]
+        return [message.id for message in messages]
+
+
+async def _run_once() -> list[EmailOutbox]:
+    """领取一批到期邮件并逐封投递，相当于发送任务的一轮循环"""
+    async with outbox._session_factory() as session:
+        batch = await outbox._claim_batch(session)
+        for message in batch:
+            await outbox._deliver(session, message)
+        return batch
+
+
+async def _make_due(message_id: int) -> None:
+    async with database.async_session_factory() as session:
+        await session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == message_id)
+            .values(next_attempt_at=utcnow() - timedelta(seconds=1))
+        )
+        await session.commit()
+
+
+async def _load(message_id: int) -> EmailOutbox:
+    async with database.async_session_factory() as session:
+        return await session.get(EmailOutbox, message_id)
+
+
+async def test_delivers_pending_email(app, smtp_server):
+    [message_id] = await _enqueue(1)
+
+    assert len(await _run_once()) == 1
+
+    message = await _load(message_id)
+    assert message.state == EmailOutboxState.SENT
+    assert message.attempts == 1
+    assert message.sent_at is not None
+    assert message.last_error is None
+    [(_, content)] = smtp_server.messages
+    assert b"To: user0@example.com" in content
+    assert b"Subject: subject 0" in content
+
+
+async def test_reuses_smtp_connection(app, smtp_server):
+    await _enqueue(3)
+
+    await _run_once()
+    await _enqueue(1)
+    await _run_once()
+
+    # 四封邮件来自同一个客户端端口，即同一条 SMTP 连接
+    peers = {peer for peer, _ in smtp_server.messages}
+    assert len(smtp_server.messages) == 4
+    assert len(peers) == 1
+
+
+async def test_retries_with_backoff(app, smtp_server):
+    smtp_server.fail = True
+    [message_id] = await _enqueue(1)
+
+    before = utcnow()
+    await _run_once()
+
+    message = await _load(message_id)
+    assert message.state == EmailOutboxState.PENDING
+    assert message.attempts == 1
+    assert "451" in message.last_error
+    # 第一次重试间隔 retry_base_seconds，上下浮动 20%
+    delay = (message.next_attempt_at - before).total_seconds()
+    assert (
+        outbox.OUTBOX_RETRY_BASE * 0.8 - 1
+        <= delay
+        <= outbox.OUTBOX_RETRY_BASE * 1.2 + 1
+    )
+    # 未到重试时间的邮件不会被领取
+    assert await _run_once() == []
+
+    smtp_server.fail = False
+    await _make_due(message_id)
+    await _run_once()
+
+    message = await _load(message_id)
+    assert message.state == EmailOutboxState.SENT
+    assert message.attempts == 2
+    assert message.last_error is None
+
+
+async def test_retry_delay_grows_and_is_capped():
+    delays = [outbox._retry_delay(attempts) for attempts in range(1, 12)]
+    for attempts, delay in enumerate(delays, start=1):
+        expected = min(
+            outbox.OUTBOX_RETRY_BASE * 2 ** (attempts - 1), outbox.OUTBOX_RETRY_MAX
+        )
+        assert expected * 0.8 <= delay <= expected * 1.2
+
+
+async def test_dead_letters_after_max_attempts(app, smtp_server):
+    smtp_server.fail = True
+    [message_id] = await _enqueue(1)
+
+    for attempt in range(1, outbox.OUTBOX_MAX_ATTEMPTS + 1):
+        await _make_due(message_id)
+        assert len(await _run_once()) == 1
+        message = await _load(message_id)
+        assert message.attempts == attempt
+
+    assert message.state == EmailOutboxState.DEAD
+    assert "451" in message.last_error
+    # 死信不再被领取
+    await _make_due(message_id)
+    assert await _run_once() == []
+    assert smtp_server.messages == []
+
+
+async def test_slow_batch_not_sent_twice(app, smtp_server, monkeypatch):
+    # 一批邮件的总发送时长超过租约，排在后面的邮件在发送前已过了领取时的租约
+    monkeypatch.setattr(outbox, "OUTBOX_LEASE_SECONDS", 1)
+    smtp_server.delay = 0.4
+    message_ids = await _enqueue(4)
+
+    first = asyncio.create_task(_run_once())
+    # 等第一个任务领取整批邮件后，另一个发送任务再开始轮询
+    while not smtp_server.messages:
+        await asyncio.sleep(0.05)
+    while not first.done():
+        # 另一个发送任务不断尝试领取过期的邮件
+        await _run_once()
+        await asyncio.sleep(0.05)
+    await first
+    await _run_once()
+
+    subjects = Counter(
+        re.search(rb"Subject: (.+?)\r?\n", content).group(1)
+        for _, content in smtp_server.messages
+    )
+    assert len(subjects) == len(message_ids)
+    assert set(subjects.values()) == {1}
+    for message_id in message_ids:
+        assert (await _load(message_id)).state == EmailOutboxState.SENT
@@ -0,0 +1,64 @@
+"""身份变更通知：只在角色或店铺变化时写入 principalchange，其他进程同步后丢弃缓存的身份"""
+
+import pytest
+from sqlmodel import select
+
+from backend import database
+from backend.models import PrincipalChange, UserType
+from backend.utils.principal_changes import PrincipalChangeFeed
+
+from .conftest import create_user, login
+
+pytestmark = pytest.mark.anyio
+
+
+async def _changed_user_ids() -> list[int]:
+    async with database.async_session_factory() as session:
+        statement = select(PrincipalChange.user_id)
+        return list((await session.execute(statement)).scalars().all())
+
+
+async def test_profile_edit_does_not_publish(client):
+    await create_user("customer", UserType.CUSTOMER)
+    headers = await login(client, "customer")
+
+    response = await client.put(
+        "/user/me",
+        json={"username": "renamed", "phone": "13800000000"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert await _changed_user_ids() == []
+
+
+async def test_role_change_reaches_other_process(client):
+    await create_user("admin", UserType.ADMIN)
+    customer = await create_user("customer", UserType.CUSTOMER)
+    headers = await login(client, "admin")
+
+    # 模拟另一个进程的同步任务
+    other = PrincipalChangeFeed()
+    other._session_factory = database.async_session_factory
+    dropped = []
+    other.on_change(dropped.append)
+    await other.sync()
+
+    # 未改变角色的修改不发布
+    response = await client.put(
+        f"/user/{customer.id}", json={"user_type": "customer"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert await _changed_user_ids() == []
+
+    response = await client.put(
+        f"/user/{customer.id}", json={"user_type": "vendor"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert await _changed_user_ids() == [customer.id]
+
+    await other.sync()
+    assert dropped == [customer.id]
+    # 重叠读取到同一条记录不重复通知
+    await other.sync()
+    assert dropped == [customer.id]
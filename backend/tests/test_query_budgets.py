@@ -0,0 +1,73 @@
+"""热点列表接口的 SQL 条数预算
+
+条数不随列表长度增长；关联数据批量加载，同一语句指纹在一个请求内不重复执行。
+"""
+
+import pytest
+
+from backend import database
+from backend.models import Item, Order, OrderItem, Store, StoreState, UserType
+from backend.utils.query_stats import assert_max_queries
+
+from .conftest import create_user, login
+
+pytestmark = pytest.mark.anyio
+
+PAGE = 20
+
+
+async def _seed_store(rows: int) -> int:
+    """一个已审核店铺，带 rows 个餐点和 rows 个订单（每单两项），返回店铺ID"""
+    vendor = await create_user("vendor", UserType.VENDOR)
+    customer = await create_user("customer", UserType.CUSTOMER)
+    async with database.async_session_factory() as session:
+        store = Store(
+            name="store",
+            address="address",
+            phone="10000",
+            state=StoreState.APPROVED,
+            owner_id=vendor.id,
+        )
+        session.add(store)
+        await session.flush()
+        items = [
+            Item(name=f"item{i}", price=10 + i, quantity=100, store_id=store.id)
+            for i in range(rows)
+        ]
+        session.add_all(items)
+        await session.flush()
+        for i in range(rows):
+            order = Order(user_id=customer.id, store_id=store.id)
+            order.items = [
+                OrderItem(quantity=1, item_price=item.price, item_id=item.id)
+                for item in (items[i], items[(i + 1) % rows])
+            ]
+            session.add(order)
+        await session.commit()
+        return store.id
+
+
+@pytest.mark.parametrize("username", ["admin", "vendor", "customer"])
+async def test_list_orders_query_budget(client, username):
+    await _seed_store(PAGE)
+    if username == "admin":
+        await create_user("admin", UserType.ADMIN)
+    headers = await login(client, username)
+
+    # 身份（商家另查店铺）、计数、订单分页，以及批量加载的订单项、餐点、用户、店铺各一条
+    with assert_max_queries(8, max_repeats=1):
+        response = await client.get("/order/", params={"limit": PAGE}, headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["records"]) == PAGE
+
+
+async def test_list_store_items_query_budget(client):
+    store_id = await _seed_store(PAGE)
+
+    # 店铺、计数、餐点分页；店铺名取自 identity map，不逐个餐点查询
+    with assert_max_queries(3, max_repeats=1):
+        response = await client.get(f"/item/store/{store_id}", params={"limit": PAGE})
+
+    assert response.status_code == 200
+    assert len(response.json()["records"]) == PAGE
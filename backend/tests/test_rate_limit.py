@@ -0,0 +1,148 @@
+"""登录与验证码接口限流：滑动窗口、429 响应和 Retry-After 头"""
+
+import pytest
+
+from backend.utils import rate_limit
+
+pytestmark = pytest.mark.anyio
+
+LIMITED = "请求过于频繁，请稍后再试"
+
+
+def _assert_limited(response, window: int) -> None:
+    assert response.status_code == 429, response.text
+    assert response.json()["detail"] == LIMITED
+    assert 0 < int(response.headers["Retry-After"]) <= window
+
+
+async def test_local_backend_slides_window(monkeypatch):
+    now = 0.0
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now)
+    backend = rate_limit.LocalRateLimitBackend()
+
+    async def hit_at(moment: float) -> float:
+        nonlocal now
+        now = moment
+        return await backend.hit("key", 2, 10)
+
+    assert await hit_at(0) == 0
+    assert await hit_at(6) == 0
+    # 窗口内已有两次，等到 t=0 的请求滑出窗口
+    assert await hit_at(9) == pytest.approx(1)
+    assert await hit_at(10) == 0
+    # 固定窗口在 t=10 重新计数会放行；滑动窗口内仍有 t=6 和 t=10 两次
+    assert await hit_at(11) == pytest.approx(5)
+    assert await hit_at(16) == 0
+
+
+async def test_local_backend_evicts_least_recent_key():
+    backend = rate_limit.LocalRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        await backend.hit(key, 1, 60)
+
+    # b 最久未访问被淘汰，重新计数
+    assert await backend.hit("b", 1, 60) == 0
+    assert await backend.hit("c", 1, 60) > 0
+
+
+async def test_rejected_hit_is_not_recorded():
+    backend = rate_limit.LocalRateLimitBackend()
+    assert await backend.hit("account", 1, 60) == 0
+
+    # account 超限，ip 窗口不计数
+    for _ in range(3):
+        assert await backend.hit_all([("ip", 2, 60), ("account", 1, 60)]) > 0
+    assert await backend.hit_all([("ip", 2, 60), ("other", 1, 60)]) == 0
+    assert await backend.hit("ip", 2, 60) == 0
+    assert await backend.hit("ip", 2, 60) > 0
+
+
+async def test_send_email_code_per_account(client):
+    rule = rate_limit.RATE_LIMIT_RULES["send_email_code"]["per_account"]
+    payload = {"email": "someone@example.com", "scene": "register"}
+
+    first = await client.post("/auth/send-email-code", json=payload)
+    assert first.status_code != 429
+
+    # 邮箱大小写不同仍是同一账号
+    payload["email"] = "SomeOne@example.com"
+    _assert_limited(
+        await client.post("/auth/send-email-code", json=payload),
+        rule["window_seconds"],
+    )
+    other = await client.post(
+        "/auth/send-email-code",
+        json={"email": "other@example.com", "scene": "register"},
+    )
+    assert other.status_code != 429
+
+
+async def test_send_email_code_per_ip(client):
+    rule = rate_limit.RATE_LIMIT_RULES["send_email_code"]["per_ip"]
+    for i in range(rule["limit"]):
+        response = await client.post(
+            "/auth/send-email-code",
+            json={"email": f"user{i}@example.com", "scene": "register"},
+        )
+        assert response.status_code != 429
+
+    _assert_limited(
+        await client.post(
+            "/auth/send-email-code",
+            json={"email": "another@example.com", "scene": "register"},
+        ),
+        rule["window_seconds"],
+    )
+
+
+async def test_login_per_account(client):
+    rule = rate_limit.RATE_LIMIT_RULES["login"]["per_account"]
+    credentials = {"username": "nobody", "password": "wrong-password"}
+    for _ in range(rule["limit"] - 1):
+        response = await client.post("/auth/login", json=credentials)
+        assert response.status_code == 401
+
+    # 表单登录（Swagger UI）与 JSON 登录共用同一计数
+    response = await client.post("/auth/login/token", data=credentials)
+    assert response.status_code == 401
+    _assert_limited(
+        await client.post("/auth/login", json=credentials), rule["window_seconds"]
+    )
+    _assert_limited(
+        await client.post("/auth/login/token", data=credentials),
+        rule["window_seconds"],
+    )
+
+    # 其他账号不受影响
+    response = await client.post(
+        "/auth/login", json={"username": "somebody", "password": "wrong-password"}
+    )
+    assert response.status_code == 401
+
+
+async def test_login_email_per_account(client):
+    rule = rate_limit.RATE_LIMIT_RULES["login_email"]["per_account"]
+    payload = {"email": "nobody@example.com", "verification_code": "000000"}
+    for _ in range(rule["limit"]):
+        response = await client.post("/auth/login/email", json=payload)
+        assert response.status_code != 429
+
+    _assert_limited(
+        await client.post("/auth/login/email", json=payload), rule["window_seconds"]
+    )
+
+
+async def test_account_limited_requests_keep_ip_budget(client):
+    """按账号被拒绝的请求不消耗该 IP 的额度"""
+    ip_rule = rate_limit.RATE_LIMIT_RULES["send_email_code"]["per_ip"]
+    payload = {"email": "someone@example.com", "scene": "register"}
+    assert (await client.post("/auth/send-email-code", json=payload)).status_code != 429
+    for _ in range(ip_rule["limit"]):
+        response = await client.post("/auth/send-email-code", json=payload)
+        assert response.status_code == 429
+
+    response = await client.post(
+        "/auth/send-email-code",
+        json={"email": "other@example.com", "scene": "register"},
+    )
+    assert response.status_code != 429
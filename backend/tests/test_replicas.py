@@ -0,0 +1,155 @@
+"""读写分离：只读会话读从库，客户端刚写入过数据时读主库，同一会话固定读一个从库
+
+主库和从库是两个 SQLite 文件，之间没有复制；数据只写入其中一个，由查询结果判断读到了哪个库。
+"""
+
+import time
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from backend import database
+from backend.middleware import LAST_WRITE_COOKIE
+from backend.migrations import apply_migrations
+from backend.models import Store, StoreState, User, UserType
+
+from .conftest import PASSWORD, create_user, login
+
+pytestmark = pytest.mark.anyio
+
+
+async def _migrate(url: str) -> None:
+    engine = database.create_database_engine(url)
+    try:
+        await apply_migrations(engine)
+    finally:
+        await engine.dispose()
+
+
+async def _add_store(url: str) -> None:
+    """直接写入指定的库（绕过读写分离）"""
+    engine = database.create_database_engine(url)
+    try:
+        async with AsyncSession(engine) as session:
+            vendor = User(
+                username="vendor",
+                email="vendor@example.com",
+                hashed_password="x",
+                user_type=UserType.VENDOR,
+            )
+            session.add(vendor)
+            await session.flush()
+            session.add(
+                Store(
+                    name="store",
+                    address="address",
+                    phone="10000",
+                    state=StoreState.APPROVED,
+                    owner_id=vendor.id,
+                )
+            )
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+def replica_count():
+    return 1
+
+
+@pytest.fixture(autouse=True)
+async def databases(monkeypatch, tmp_path, replica_count):
+    """在应用启动前准备主库和从库文件，并把它们配置给应用"""
+    primary_url = f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}"
+    replica_urls = [
+        f"sqlite+aiosqlite:///{tmp_path / f'replica{index}.db'}"
+        for index in range(replica_count)
+    ]
+    for url in [primary_url, *replica_urls]:
+        await _migrate(url)
+    monkeypatch.setattr(database, "database_url", primary_url)
+    monkeypatch.setattr(database, "DB_REPLICAS", [{"url": url} for url in replica_urls])
+    return primary_url, replica_urls
+
+
+async def _store_total(client, **kwargs) -> int:
+    response = await client.get("/store/", **kwargs)
+    assert response.status_code == 200, response.text
+    return response.json()["total"]
+
+
+async def test_read_session_uses_replica(databases, client):
+    primary_url, _ = databases
+    await _add_store(primary_url)
+
+    # 数据只在主库中，读从库看不到
+    assert await _store_total(client) == 0
+
+
+async def test_recent_write_header_reads_primary(databases, client):
+    primary_url, _ = databases
+    await _add_store(primary_url)
+
+    headers = {"X-Last-Write": f"{time.time():.3f}"}
+    assert await _store_total(client, headers=headers) == 1
+
+
+async def test_recent_write_cookie_reads_primary(databases, client):
+    primary_url, _ = databases
+    await _add_store(primary_url)
+
+    client.cookies.set(LAST_WRITE_COOKIE, f"{time.time():.3f}")
+    assert await _store_total(client) == 1
+
+
+async def test_stale_write_marker_reads_replica(databases, client):
+    primary_url, _ = databases
+    await _add_store(primary_url)
+
+    stale = time.time() - database.READ_YOUR_WRITES_SECONDS - 1
+    headers = {"X-Last-Write": f"{stale:.3f}"}
+    assert await _store_total(client, headers=headers) == 0
+
+
+async def test_write_response_carries_marker(client):
+    await create_user("admin", UserType.ADMIN)
+    headers = await login(client, "admin")
+
+    response = await client.post(
+        "/user/",
+        json={
+            "username": "customer",
+            "email": "customer@example.com",
+            "password": PASSWORD,
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == 201, response.text
+    assert float(response.headers["X-Last-Write"]) <= time.time()
+    assert LAST_WRITE_COOKIE in response.cookies
+
+
+@pytest.mark.parametrize("replica_count", [2])
+async def test_session_stays_on_one_replica(databases, app):
+    _, replica_urls = databases
+    # 只有第一个从库有数据；轮询到不同从库时计数会在 0 和 1 之间交替
+    await _add_store(replica_urls[0])
+
+    async with database.async_session_factory(info={"read_only": True}) as session:
+        totals = [
+            (await session.execute(select(func.count()).select_from(Store))).scalar()
+            for _ in range(4)
+        ]
+        chosen = session.info["replica"]
+
+    assert chosen is not None
+    assert len(set(totals)) == 1
+
+    # 新会话按轮询选择另一个从库
+    async with database.async_session_factory(info={"read_only": True}) as session:
+        await session.execute(select(func.count()).select_from(Store))
+        assert session.info["replica"] is not chosen
@@ -0,0 +1,58 @@
+"""启动预热的请求和语句不计入 HTTP 指标、Server-Timing 和 SQL 执行统计"""
+
+import pytest
+
+from backend.utils import query_stats, warmup
+from backend.utils.metrics import http_requests_total
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def warmup_enabled():
+    return True
+
+
+@pytest.fixture(autouse=True)
+def warmup_calls(monkeypatch):
+    calls = []
+    warm_paths = warmup._warm_paths
+
+    async def recording_warm_paths(app):
+        calls.append(app)
+        await warm_paths(app)
+
+    monkeypatch.setattr(warmup, "_warm_paths", recording_warm_paths)
+    monkeypatch.setattr(warmup, "WARMUP_PATHS", ["/store/?limit=20"])
+    query_stats.reset_query_stats()
+    return calls
+
+
+def _store_queries() -> list[dict]:
+    rows = query_stats.get_top_queries(limit=query_stats.MAX_FINGERPRINTS)
+    return [row for row in rows if "FROM store" in row["fingerprint"]]
+
+
+def _store_requests() -> float:
+    return http_requests_total.value("GET", "/store/", "200")
+
+
+@pytest.fixture
+def store_requests_before():
+    # 在应用启动（预热）之前读取
+    return _store_requests()
+
+
+async def test_warmup_not_counted(store_requests_before, client, warmup_calls):
+    assert len(warmup_calls) == 1
+    assert warmup.is_ready()
+    assert _store_requests() == store_requests_before
+    # 启动时的数据库迁移照常统计，预热请求的查询不统计
+    assert _store_queries() == []
+
+    response = await client.get("/store/", params={"limit": 20})
+
+    assert response.status_code == 200
+    assert "queries" in response.headers["Server-Timing"]
+    assert _store_requests() == store_requests_before + 1
+    assert _store_queries() != []
@@ -1,35 +1,127 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from email.message import EmailMessage
-import smtplib
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from ..config import get_config
 
-# 从配置文件读取SMTP配置
-config = get_config()
-smtp_config = config["smtp"]
+# aiosmtplib 和 SMTP 配置在第一次发信时才加载，不计入服务启动耗时
+if TYPE_CHECKING:
+    import aiosmtplib
 
-SMTP_HOST = smtp_config["host"]
-SMTP_PORT = smtp_config["port"]
-SMTP_USER = smtp_config["user"]
-SMTP_PASSWORD = smtp_config["password"]
-SMTP_FROM = smtp_config["from"]
-SMTP_USE_TLS = smtp_config["use_tls"]
 
+@dataclass(frozen=True)
+class SMTPSettings:
+    host: str
+    port: int
+    user: str
+    password: str
+    sender: str
+    use_tls: bool
+    timeout: float
+
+
+@lru_cache(maxsize=1)
+def get_smtp_settings() -> SMTPSettings:
+    """从配置文件读取SMTP配置"""
+    smtp_config = get_config()["smtp"]
+    return SMTPSettings(
+        host=smtp_config["host"],
+        port=smtp_config["port"],
+        user=smtp_config["user"],
+        password=smtp_config["password"],
+        sender=smtp_config["from"],
+        use_tls=smtp_config["use_tls"],
+        timeout=smtp_config.get("timeout", 10),
+    )
+
+
+def smtp_configured() -> bool:
+    settings = get_smtp_settings()
+    return all([settings.host, settings.port, settings.sender])
 
-def send_email(subject: str, body: str, to_email: str) -> None:
-    if not all([SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_FROM]):
-        raise RuntimeError("SMTP 服务尚未正确配置")
 
+def build_message(subject: str, body: str, to_email: str) -> EmailMessage:
     message = EmailMessage()
     message["Subject"] = subject
-    message["From"] = SMTP_FROM
+    message["From"] = get_smtp_settings().sender
     message["To"] = to_email
     message.set_content(body)
+    return message
+
+
+class SMTPConnectionPool:
+    """复用已登录的 SMTP 连接，避免每封邮件都重新握手
+
+    出错的连接直接丢弃，下一次获取时重新建立。
+    """
+
+    def __init__(self, size: int):
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[aiosmtplib.SMTP] = []
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        import aiosmtplib
+
+        settings = get_smtp_settings()
+        client = aiosmtplib.SMTP(
+            hostname=settings.host,
+            port=settings.port,
+            username=settings.user or None,
+            password=settings.password or None,
+            start_tls=settings.use_tls,
+            timeout=settings.timeout,
+        )
+        await client.connect()
+        return client
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._slots:
+            client = None
+            while self._idle and client is None:
+                candidate = self._idle.pop()
+                if candidate.is_connected:
+                    client = candidate
+            if client is None:
+                client = await self._connect()
+            try:
+                yield client
+            except BaseException:
+                client.close()
+                raise
+            self._idle.append(client)
+
+    async def close(self) -> None:
+        import aiosmtplib
+
+        idle, self._idle = self._idle, []
+        for client in idle:
+            try:
+                await client.quit()
+            except aiosmtplib.SMTPException:
+                client.close()
+
+
+async def send_email(
+    pool: SMTPConnectionPool, subject: str, body: str, to_email: str
+) -> None:
+    """通过连接池发送邮件，失败时抛出 RuntimeError"""
+    import aiosmtplib
+
+    if not smtp_configured():
+        raise RuntimeError("SMTP 服务尚未正确配置")
 
+    message = build_message(subject, body, to_email)
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
-            if SMTP_USE_TLS:
-                server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(message)
-    except Exception as exc:  # pragma: no cover - 网络相关异常无法稳定复现
+        try:
+            async with pool.connection() as client:
+                await client.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # 空闲连接可能已被服务器关闭，换一条新连接重试一次
+            async with pool.connection() as client:
+                await client.send_message(message)
+    except (aiosmtplib.SMTPException, OSError) as exc:
         raise RuntimeError(f"邮件发送失败: {exc}") from exc
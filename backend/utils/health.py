@@ -0,0 +1,139 @@
+"""存活与就绪检查
+
+- 存活（/health/live）：进程能处理请求即可，不访问依赖，供编排系统判断是否需要重启进程
+- 就绪（/health/ready）：预热完成且未在关闭，并且数据库可连接、连接池未接近耗尽、
+  事件循环延迟和邮件积压在阈值以内；任一项不满足时返回 503，负载均衡把流量转给其他实例
+
+数据库 ping 和邮件积压计数的结果分别缓存若干秒，探针频繁请求时不会额外占用连接池；
+并发的探针共用同一次检查。
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .. import database
+from ..config import get_config
+from .metrics import event_loop_lag_last_seconds, readiness_failures_total
+from .outbox import count_backlog
+from .warmup import is_ready
+
+logger = logging.getLogger(__name__)
+
+health_config = get_config().get("health", {})
+DB_PING_CACHE_SECONDS = health_config.get("db_ping_cache_seconds", 2)
+DB_PING_TIMEOUT_SECONDS = health_config.get("db_ping_timeout_seconds", 1)
+MAX_DB_PING_MS = health_config.get("max_db_ping_ms", 500)
+MAX_POOL_UTILIZATION = health_config.get("max_pool_utilization", 0.9)
+MAX_LOOP_LAG_MS = health_config.get("max_loop_lag_ms", 250)
+MAX_OUTBOX_BACKLOG = health_config.get("max_outbox_backlog", 1000)
+OUTBOX_CACHE_SECONDS = health_config.get("outbox_cache_seconds", 10)
+
+
+class CachedCheck:
+    """缓存 ttl 秒的异步检查；缓存过期时并发调用只执行一次"""
+
+    def __init__(self, check: Callable[[], Awaitable[Any]], ttl: float):
+        self._check = check
+        self._ttl = ttl
+        self._lock = asyncio.Lock()
+        self._result: Any = None
+        self._checked_at = float("-inf")
+
+    async def get(self) -> Any:
+        if time.monotonic() - self._checked_at < self._ttl:
+            return self._result
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= self._ttl:
+                self._result = await self._check()
+                self._checked_at = time.monotonic()
+        return self._result
+
+
+async def _ping_database() -> dict:
+    """SELECT 1 往返耗时；连接池耗尽或数据库不可用时在超时后返回失败"""
+    started = time.perf_counter()
+    try:
+        engine = await database.get_engine()
+
+        async def ping():
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+
+        await asyncio.wait_for(ping(), DB_PING_TIMEOUT_SECONDS)
+    except Exception as e:  # noqa: BLE001 探针只报告失败，不向外抛出
+        logger.warning("就绪检查: 数据库 ping 失败: %r", e)
+        return {"ok": False, "error": repr(e)}
+    latency_ms = (time.perf_counter() - started) * 1000
+    return {
+        "ok": latency_ms <= MAX_DB_PING_MS,
+        "latency_ms": round(latency_ms, 1),
+        "threshold_ms": MAX_DB_PING_MS,
+    }
+
+
+async def _count_outbox_backlog() -> dict:
+    async def count():
+        async with database.async_session_factory() as session:
+            return await count_backlog(session)
+
+    try:
+        # 与 ping 相同的超时：连接池耗尽时不在缓存锁内等满 pool_timeout，拖住并发的探针
+        backlog = await asyncio.wait_for(count(), DB_PING_TIMEOUT_SECONDS)
+    except Exception as e:  # noqa: BLE001
+        # 积压只影响邮件投递，统计失败不判为未就绪（数据库故障由 ping 反映）
+        logger.warning("就绪检查: 统计邮件积压失败: %r", e)
+        return {"ok": True, "error": repr(e)}
+    return {
+        "ok": backlog <= MAX_OUTBOX_BACKLOG,
+        "backlog": backlog,
+        "threshold": MAX_OUTBOX_BACKLOG,
+    }
+
+
+_database_check = CachedCheck(_ping_database, DB_PING_CACHE_SECONDS)
+_outbox_check = CachedCheck(_count_outbox_backlog, OUTBOX_CACHE_SECONDS)
+
+
+def _check_pool() -> dict:
+    stats = database.get_pool_stats()
+    capacity = stats["pool_size"] + stats["max_overflow"]
+    utilization = stats["checked_out"] / capacity if capacity else 0.0
+    return {
+        "ok": utilization < MAX_POOL_UTILIZATION,
+        "checked_out": stats["checked_out"],
+        "capacity": capacity,
+        "utilization": round(utilization, 3),
+        "threshold": MAX_POOL_UTILIZATION,
+    }
+
+
+def _check_loop_lag() -> dict:
+    lag_ms = event_loop_lag_last_seconds.value() * 1000
+    return {
+        "ok": lag_ms <= MAX_LOOP_LAG_MS,
+        "lag_ms": round(lag_ms, 1),
+        "threshold_ms": MAX_LOOP_LAG_MS,
+    }
+
+
+async def check_readiness() -> tuple[bool, dict]:
+    """返回 (是否就绪, 各项检查结果)"""
+    if not is_ready():
+        # 预热未完成或正在关闭，不再访问数据库
+        return False, {"lifecycle": {"ok": False, "detail": "预热未完成或正在关闭"}}
+    database_result, outbox_result = await asyncio.gather(
+        _database_check.get(), _outbox_check.get()
+    )
+    checks = {
+        "database": database_result,
+        "pool": _check_pool(),
+        "event_loop": _check_loop_lag(),
+        "outbox": outbox_result,
+    }
+    failed = [name for name, check in checks.items() if not check["ok"]]
+    for name in failed:
+        readiness_failures_total.inc(name)
+    return not failed, checks
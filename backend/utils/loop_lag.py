@@ -0,0 +1,114 @@
+"""事件循环延迟采样与阻塞检测
+
+后台任务定期 sleep 固定间隔，实际唤醒时间超出的部分即为事件循环被占用（阻塞调用、CPU 密集计算）的时长。
+
+开启 blocking_detection 后，事件循环上另有一个高频心跳任务，并由看门狗线程检查心跳：
+心跳停止超过 blocking_threshold_ms 说明事件循环线程正被某个回调占用，此时抓取该线程的调用栈写入日志并计数。
+事件循环只是排队回调过多（而非单个回调阻塞）时也会触发，栈为当时正在执行的回调。
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from ..config import get_config
+from .metrics import (
+    event_loop_blocked_total,
+    event_loop_lag_last_seconds,
+    event_loop_lag_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+loop_lag_config = get_config().get("loop_lag", {})
+LOOP_LAG_SAMPLE_INTERVAL = loop_lag_config.get("sample_interval_seconds", 0.5)
+BLOCKING_DETECTION = loop_lag_config.get("blocking_detection", False)
+BLOCKING_THRESHOLD_MS = loop_lag_config.get("blocking_threshold_ms", 100)
+
+_sampler: asyncio.Task | None = None
+_heartbeat: asyncio.Task | None = None
+_watchdog: "BlockingWatchdog | None" = None
+# 心跳任务最近一次运行的时刻（time.monotonic），由看门狗线程读取
+_last_beat = 0.0
+
+
+async def _sample_loop_lag() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_SAMPLE_INTERVAL)
+        lag = max(0.0, loop.time() - started - LOOP_LAG_SAMPLE_INTERVAL)
+        event_loop_lag_seconds.observe(lag)
+        event_loop_lag_last_seconds.set(lag)
+
+
+async def _beat(interval: float) -> None:
+    global _last_beat
+    while True:
+        _last_beat = time.monotonic()
+        await asyncio.sleep(interval)
+
+
+class BlockingWatchdog:
+    """在独立线程中检查心跳任务是否按时运行，超时则抓取事件循环线程的调用栈"""
+
+    def __init__(self, loop_thread_id: int, threshold: float):
+        self.loop_thread_id = loop_thread_id
+        self.threshold = threshold
+        # 心跳与检查间隔，阻塞检测的误差不超过该值
+        self.interval = threshold / 4
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="loop-blocking-watchdog", daemon=True
+        )
+
+    def _run(self) -> None:
+        reported = None
+        while not self._stop.wait(self.interval):
+            last_beat = _last_beat
+            overdue = time.monotonic() - last_beat - self.interval
+            # 同一次阻塞只报告一次
+            if last_beat == 0 or overdue < self.threshold or last_beat == reported:
+                continue
+            reported = last_beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            event_loop_blocked_total.inc()
+            logger.warning(
+                "事件循环已被阻塞 %.0f ms，当前调用栈:\n%s", overdue * 1000, stack
+            )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def start_loop_lag_monitor() -> None:
+    global _sampler, _heartbeat, _watchdog
+    if _sampler is None:
+        _sampler = asyncio.create_task(_sample_loop_lag())
+    if BLOCKING_DETECTION and _watchdog is None:
+        _watchdog = BlockingWatchdog(
+            threading.get_ident(), BLOCKING_THRESHOLD_MS / 1000
+        )
+        _heartbeat = asyncio.create_task(_beat(_watchdog.interval))
+        _watchdog.start()
+
+
+async def stop_loop_lag_monitor() -> None:
+    global _sampler, _heartbeat, _watchdog, _last_beat
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+    tasks = [task for task in (_sampler, _heartbeat) if task is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _sampler = _heartbeat = None
+    _last_beat = 0.0
@@ -0,0 +1,161 @@
+"""内存诊断
+
+按需开启 tracemalloc，与基线快照对比得到增长最多的分配位置；统计各 SQLModel 表模型的
+存活实例数，用于发现会话身份映射（identity map）或大分页 selectinload 造成的对象堆积；
+追踪期间按路由记录每个请求前后已追踪内存的差值。
+
+tracemalloc 会显著拖慢分配，只应在排查问题时短时间开启。
+"""
+
+import gc
+import os
+import tracemalloc
+from collections import Counter
+
+from sqlmodel import SQLModel
+
+from ..config import get_config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+memory_config = get_config().get("memory", {})
+TRACEMALLOC_FRAMES = memory_config.get("tracemalloc_frames", 10)
+
+# 忽略 tracemalloc 自身和导入系统的分配
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+_baseline: tracemalloc.Snapshot | None = None
+
+
+class RouteMemoryStats:
+    __slots__ = ("max", "requests", "total")
+
+    def __init__(self):
+        self.requests = 0
+        self.total = 0
+        self.max = 0
+
+
+# (方法, 路由模板) -> 请求前后已追踪内存的差值
+_route_stats: dict[tuple[str, str], RouteMemoryStats] = {}
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def start_tracing(frames: int = TRACEMALLOC_FRAMES) -> None:
+    """开启 tracemalloc 并记录基线快照；已开启时只重置基线和路由统计"""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _route_stats.clear()
+    _baseline = _take_snapshot()
+
+
+def stop_tracing() -> None:
+    global _baseline
+    _baseline = None
+    tracemalloc.stop()
+
+
+def reset_baseline() -> None:
+    global _baseline
+    if tracemalloc.is_tracing():
+        _baseline = _take_snapshot()
+
+
+def record_route_memory(method: str, route: str, delta: int) -> None:
+    stats = _route_stats.get((method, route))
+    if stats is None:
+        stats = _route_stats[(method, route)] = RouteMemoryStats()
+    stats.requests += 1
+    stats.total += delta
+    stats.max = max(stats.max, delta)
+
+
+def top_allocations(limit: int = 20, group_by: str = "lineno") -> list[dict]:
+    """与基线相比内存增长最多的分配位置（未开启追踪时返回空列表）"""
+    if not tracemalloc.is_tracing() or _baseline is None:
+        return []
+    differences = _take_snapshot().compare_to(_baseline, group_by)
+    return [
+        {
+            "location": _format_traceback(stat.traceback, group_by),
+            "size_kb": stat.size / 1024,
+            "size_diff_kb": stat.size_diff / 1024,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in differences[:limit]
+    ]
+
+
+def _format_traceback(traceback: tracemalloc.Traceback, group_by: str) -> str:
+    if group_by == "filename":
+        return traceback[0].filename
+    if group_by == "traceback":
+        # 最内层调用在前
+        return "\n".join(
+            f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback)
+        )
+    return f"{traceback[0].filename}:{traceback[0].lineno}"
+
+
+def count_model_instances() -> dict[str, int]:
+    """各 SQLModel 表模型当前存活的实例数（遍历整个堆，耗时与对象数成正比）"""
+    counts: Counter[str] = Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        if isinstance(obj, SQLModel) and hasattr(cls, "__table__"):
+            counts[cls.__name__] += 1
+    return dict(counts.most_common())
+
+
+def get_route_memory(limit: int = 20) -> list[dict]:
+    rows = [
+        {
+            "method": method,
+            "route": route,
+            "requests": stats.requests,
+            "total_kb": stats.total / 1024,
+            "avg_kb": stats.total / stats.requests / 1024,
+            "max_kb": stats.max / 1024,
+        }
+        for (method, route), stats in list(_route_stats.items())
+    ]
+    rows.sort(key=lambda row: row["total_kb"], reverse=True)
+    return rows[:limit]
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):  # 非 Linux 系统
+        return 0
+
+
+def get_memory_summary() -> dict:
+    """进程常驻内存及 tracemalloc 当前/峰值（单位 KB）"""
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        "rss_kb": _rss_bytes() / 1024,
+        # Linux 下 ru_maxrss 单位为 KB
+        "max_rss_kb": (
+            float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+            if resource is not None
+            else 0.0
+        ),
+        "tracing": tracemalloc.is_tracing(),
+        "traced_kb": traced / 1024,
+        "traced_peak_kb": peak / 1024,
+        "gc_objects": len(gc.get_objects()),
+    }
@@ -0,0 +1,195 @@
+"""Prometheus 文本格式的进程内指标
+
+所有指标只在事件循环线程中更新，计数直接累加普通整数/浮点数，无需加锁；
+采集时（GET /metrics）才拼接输出文本。多进程部署时每个进程各自暴露指标。
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from ..config import get_config
+
+metrics_config = get_config().get("metrics", {})
+METRICS_ENABLED = metrics_config.get("enabled", True)
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        registry.append(self)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _ValueMetric(Metric):
+    """按标签值保存单个数值；也可传入采集时调用的回调（返回 {标签值元组: 数值}）"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], dict[LabelValues, float]] | None = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+        self._collect = collect
+        if not self.label_names:
+            # 无标签的指标从 0 开始输出，便于计算速率
+            self._values[()] = 0
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """当前值（不适用于传入 collect 回调的指标）"""
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        values = self._collect() if self._collect else self._values
+        for labels, value in list(values.items()):
+            label_text = _format_labels(self.label_names, labels)
+            yield f"{self.name}{label_text} {_format_value(value)}"
+
+
+class Counter(_ValueMetric):
+    kind = "counter"
+
+
+class Gauge(_ValueMetric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数（不累计，最后一个为 +Inf）, 总和]
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.label_names, labels, le)} {cumulative}"
+                )
+            label_text = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total[0])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+registry: list[Metric] = []
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+# ---- HTTP ----
+http_requests_total = Counter(
+    "http_requests_total", "处理完成的请求数", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "请求处理耗时", ("method", "route")
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "正在处理的请求数")
+
+# ---- 业务 ----
+orders_total = Counter(
+    "orders_total", "订单事件数（created/approved/completed/cancelled）", ("event",)
+)
+stock_reservation_failures_total = Counter(
+    "stock_reservation_failures_total", "下单时库存不足的次数"
+)
+
+# ---- 事件循环 ----
+event_loop_lag_last_seconds = Gauge(
+    "event_loop_lag_last_seconds", "最近一次采样的事件循环延迟"
+)
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "事件循环调度延迟",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+# 由阻塞检测线程累加（只有该线程写入）
+event_loop_blocked_total = Counter(
+    "event_loop_blocked_total", "事件循环被单个回调阻塞超过阈值的次数"
+)
+
+# ---- 就绪检查 ----
+readiness_failures_total = Counter(
+    "readiness_failures_total",
+    "就绪检查未通过的次数（database/pool/event_loop/outbox）",
+    ("check",),
+)
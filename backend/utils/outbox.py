@@ -0,0 +1,228 @@
+"""邮件发件箱：请求内只写入待发送记录，由后台任务异步投递"""
+
+import asyncio
+import logging
+import random
+from datetime import timedelta
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from ..config import get_config
+from ..models import EmailOutbox, EmailOutboxState, utcnow
+from .email import SMTPConnectionPool, get_smtp_settings, send_email
+
+logger = logging.getLogger(__name__)
+
+outbox_config = get_config().get("email_outbox", {})
+OUTBOX_WORKERS = outbox_config.get("workers", 2)
+OUTBOX_SMTP_POOL_SIZE = outbox_config.get("smtp_pool_size", OUTBOX_WORKERS)
+OUTBOX_BATCH_SIZE = outbox_config.get("batch_size", 20)
+OUTBOX_POLL_INTERVAL = outbox_config.get("poll_interval_seconds", 5)
+OUTBOX_MAX_ATTEMPTS = outbox_config.get("max_attempts", 5)
+OUTBOX_RETRY_BASE = outbox_config.get("retry_base_seconds", 10)
+OUTBOX_RETRY_MAX = outbox_config.get("retry_max_seconds", 600)
+# 每封邮件发送前续租；超过该时间仍未完成的记录视为发送任务异常退出，可被重新领取
+OUTBOX_LEASE_SECONDS = outbox_config.get("lease_seconds", 60)
+
+_wakeup = asyncio.Event()
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+_smtp_pool: SMTPConnectionPool | None = None
+_workers: list[asyncio.Task] = []
+
+EmailOutboxTable = EmailOutbox.__table__  # type: ignore[attr-defined]
+
+
+async def enqueue_email(
+    session: AsyncSession, subject: str, body: str, to_email: str
+) -> EmailOutbox:
+    """写入发件箱并唤醒发送任务，不等待实际投递"""
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body)
+    session.add(message)
+    await session.commit()
+    _wakeup.set()
+    return message
+
+
+def _retry_delay(attempts: int) -> float:
+    delay = min(OUTBOX_RETRY_BASE * 2 ** (attempts - 1), OUTBOX_RETRY_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def _claim_batch(session: AsyncSession) -> list[EmailOutbox]:
+    """领取一批到期的邮件；条件更新保证多个进程不会重复领取"""
+    now = utcnow()
+    statement = (
+        select(EmailOutbox)
+        .where(
+            or_(
+                EmailOutboxTable.c.state == EmailOutboxState.PENDING,
+                EmailOutboxTable.c.state == EmailOutboxState.SENDING,
+            ),
+            EmailOutboxTable.c.next_attempt_at <= now,
+        )
+        .order_by(EmailOutboxTable.c.next_attempt_at)
+        .limit(OUTBOX_BATCH_SIZE)
+    )
+    candidates = list((await session.execute(statement)).scalars().all())
+
+    claimed_ids = []
+    lease_until = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    for message in candidates:
+        result = await session.execute(
+            update(EmailOutbox)
+            .where(
+                EmailOutboxTable.c.id == message.id,
+                EmailOutboxTable.c.state == message.state,
+                EmailOutboxTable.c.next_attempt_at == message.next_attempt_at,
+            )
+            .values(
+                state=EmailOutboxState.SENDING,
+                attempts=EmailOutboxTable.c.attempts + 1,
+                next_attempt_at=lease_until,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed_ids.append(message.id)
+    await session.commit()
+
+    if not claimed_ids:
+        return []
+    statement = (
+        select(EmailOutbox)
+        .where(EmailOutboxTable.c.id.in_(claimed_ids))
+        .execution_options(populate_existing=True)
+    )
+    return list((await session.execute(statement)).scalars().all())
+
+
+async def _renew_lease(session: AsyncSession, message: EmailOutbox) -> bool:
+    """发送前续租；租约已过期并被其他任务重新领取时返回 False，本任务不再发送
+
+    一批邮件逐封发送，只在领取时设置租约的话，排在后面的邮件可能在等待期间过期并被重复发送。
+    """
+    lease_until = utcnow() + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    result = await session.execute(
+        update(EmailOutbox)
+        .where(
+            EmailOutboxTable.c.id == message.id,
+            EmailOutboxTable.c.state == EmailOutboxState.SENDING,
+            EmailOutboxTable.c.attempts == message.attempts,
+            EmailOutboxTable.c.next_attempt_at == message.next_attempt_at,
+        )
+        .values(next_attempt_at=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if result.rowcount != 1:
+        return False
+    message.next_attempt_at = lease_until
+    return True
+
+
+async def _deliver(session: AsyncSession, message: EmailOutbox) -> None:
+    assert _smtp_pool is not None
+    if not await _renew_lease(session, message):
+        logger.info("邮件 %s 的租约已过期并被重新领取，跳过", message.id)
+        session.expunge(message)
+        return
+    try:
+        # 发送限时为租约的一半，留出写回结果的时间；租约有效期内其他任务不会领取同一封邮件
+        await asyncio.wait_for(
+            send_email(_smtp_pool, message.subject, message.body, message.to_email),
+            OUTBOX_LEASE_SECONDS / 2,
+        )
+    except (TimeoutError, RuntimeError) as exc:
+        if isinstance(exc, asyncio.TimeoutError):
+            exc = RuntimeError(f"邮件发送超时（{OUTBOX_LEASE_SECONDS / 2:g} 秒）")
+        message.last_error = str(exc)[:1024]
+        if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+            message.state = EmailOutboxState.DEAD
+            logger.error(
+                "邮件 %s 发送 %s 次均失败，已转入死信: %s",
+                message.id,
+                message.attempts,
+                exc,
+            )
+        else:
+            message.state = EmailOutboxState.PENDING
+            message.next_attempt_at = utcnow() + timedelta(
+                seconds=_retry_delay(message.attempts)
+            )
+            logger.warning(
+                "邮件 %s 第 %s 次发送失败，稍后重试: %s",
+                message.id,
+                message.attempts,
+                exc,
+            )
+    else:
+        message.state = EmailOutboxState.SENT
+        message.sent_at = utcnow()
+        message.last_error = None
+    session.add(message)
+    await session.commit()
+
+
+async def _worker_loop() -> None:
+    assert _session_factory is not None
+    while True:
+        _wakeup.clear()
+        try:
+            async with _session_factory() as session:
+                batch = await _claim_batch(session)
+                for message in batch:
+                    await _deliver(session, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("邮件发件箱任务异常")
+            batch = []
+
+        if len(batch) < OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL)
+            except TimeoutError:
+                pass
+
+
+async def count_backlog(session: AsyncSession) -> int:
+    """待发送（含重试中）的邮件数量"""
+    statement = (
+        select(func.count())
+        .select_from(EmailOutbox)
+        .where(
+            or_(
+                EmailOutboxTable.c.state == EmailOutboxState.PENDING,
+                EmailOutboxTable.c.state == EmailOutboxState.SENDING,
+            )
+        )
+    )
+    return (await session.execute(statement)).scalar_one()
+
+
+def start_outbox_workers(engine: AsyncEngine) -> None:
+    global _session_factory, _smtp_pool
+    # send_email 在连接失效时会重连重试一次，租约至少要容纳两次 SMTP 超时
+    smtp_timeout = get_smtp_settings().timeout
+    if OUTBOX_LEASE_SECONDS / 2 < 2 * smtp_timeout:
+        raise ValueError(
+            f"email_outbox.lease_seconds ({OUTBOX_LEASE_SECONDS}) 应不小于 "
+            f"SMTP 超时 ({smtp_timeout}) 的 4 倍"
+        )
+    _session_factory = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    _smtp_pool = SMTPConnectionPool(OUTBOX_SMTP_POOL_SIZE)
+    for _ in range(OUTBOX_WORKERS):
+        _workers.append(asyncio.create_task(_worker_loop()))
+
+
+async def stop_outbox_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    if _smtp_pool is not None:
+        await _smtp_pool.close()
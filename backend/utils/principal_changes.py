@@ -0,0 +1,141 @@
+"""身份变更通知
+
+用户角色、店铺归属或店铺状态变更后写入 PrincipalChange 表（每个用户只保留最近一次），
+各进程周期性增量读取新记录，丢弃缓存的身份（dependencies._principal_cache）。
+发起变更的进程立即生效，其他进程最多在 auth_cache.sync_interval_seconds 后生效。
+记录只需保留到所有进程都同步过，之后由后台任务删除。
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from ..config import get_config
+from ..models import PrincipalChange, utcnow
+
+logger = logging.getLogger(__name__)
+
+auth_cache_config = get_config().get("auth_cache", {})
+SYNC_INTERVAL_SECONDS = auth_cache_config.get("sync_interval_seconds", 10)
+
+# 增量同步时向前多读一段时间，覆盖其他进程提交较晚的记录
+SYNC_OVERLAP_SECONDS = max(60, SYNC_INTERVAL_SECONDS * 2)
+RETENTION = timedelta(seconds=max(600, SYNC_OVERLAP_SECONDS * 2))
+
+PrincipalChangeTable = PrincipalChange.__table__  # type: ignore[attr-defined]
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=UTC).timestamp()
+
+
+class PrincipalChangeFeed:
+    def __init__(self):
+        # 用户ID -> 已处理的最近一次变更时刻，重叠读取到的旧记录不重复通知
+        self._changed_at: dict[int, float] = {}
+        self._listeners: list[Callable[[int], None]] = []
+        self._last_sync: datetime | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def on_change(self, listener: Callable[[int], None]) -> None:
+        """注册变更回调（参数为用户ID），本进程和其他进程的变更都会触发"""
+        self._listeners.append(listener)
+
+    def _apply(self, user_id: int, changed_at: float) -> None:
+        if self._changed_at.get(user_id, float("-inf")) >= changed_at:
+            return
+        self._changed_at[user_id] = changed_at
+        for listener in self._listeners:
+            listener(user_id)
+
+    async def publish(self, session: AsyncSession, *user_ids: int | None) -> None:
+        """记录用户身份变更（在业务事务提交后调用）"""
+        values = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not values:
+            return
+        await session.execute(
+            delete(PrincipalChange).where(PrincipalChangeTable.c.user_id.in_(values))
+        )
+        now = utcnow()
+        session.add_all(
+            [PrincipalChange(user_id=user_id, changed_at=now) for user_id in values]
+        )
+        try:
+            await session.commit()
+        except IntegrityError:
+            # 其他进程同时写入了同一用户的变更记录，各进程同步时会读到那一条
+            await session.rollback()
+        for user_id in values:
+            self._apply(user_id, _timestamp(now))
+
+    async def sync(self) -> None:
+        """读取其他进程新写入的变更记录（首次调用只记录同步时刻，启动时缓存为空）"""
+        assert self._session_factory is not None
+        now = utcnow()
+        if self._last_sync is not None:
+            statement = select(PrincipalChange).where(
+                PrincipalChangeTable.c.changed_at
+                >= self._last_sync - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            )
+            async with self._session_factory() as session:
+                records = (await session.execute(statement)).scalars().all()
+            for record in records:
+                self._apply(record.user_id, _timestamp(record.changed_at))
+        self._last_sync = now
+
+    async def sweep(self) -> None:
+        """删除所有进程都已同步过的记录"""
+        assert self._session_factory is not None
+        cutoff = utcnow() - RETENTION
+        async with self._session_factory() as session:
+            await session.execute(
+                delete(PrincipalChange).where(
+                    PrincipalChangeTable.c.changed_at < cutoff
+                )
+            )
+            await session.commit()
+        cutoff_timestamp = time.time() - RETENTION.total_seconds()
+        self._changed_at = {
+            user_id: changed_at
+            for user_id, changed_at in self._changed_at.items()
+            if changed_at >= cutoff_timestamp
+        }
+
+    async def _run_periodically(self, interval: float, job) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception:
+                logger.exception("身份变更同步任务异常")
+
+    async def start(self, engine: AsyncEngine) -> None:
+        self._session_factory = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        await self.sync()
+        self._tasks = [
+            asyncio.create_task(
+                self._run_periodically(SYNC_INTERVAL_SECONDS, self.sync)
+            ),
+            asyncio.create_task(
+                self._run_periodically(RETENTION.total_seconds(), self.sweep)
+            ),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+principal_changes = PrincipalChangeFeed()
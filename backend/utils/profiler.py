@@ -0,0 +1,163 @@
+"""按需采样分析器
+
+由后台线程周期读取事件循环线程的调用栈（sys._current_frames），不修改被分析代码，
+未启动时没有任何开销。结果可导出为火焰图使用的折叠栈文本或 speedscope JSON。
+
+注意：事件循环线程上的所有协程共享同一个调用栈，分析单个请求时，
+同时在执行的其他请求也会被采样到。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from ..config import get_config
+
+profiler_config = get_config().get("profiler", {})
+PROFILER_ENABLED = profiler_config.get("enabled", True)
+PROFILE_INTERVAL_MS = profiler_config.get("interval_ms", 5)
+PROFILE_MAX_SECONDS = profiler_config.get("max_seconds", 60)
+
+PROFILE_FORMATS = {
+    "collapsed": "text/plain; charset=utf-8",
+    "speedscope": "application/json",
+}
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+_lock = threading.Lock()
+_active: "SamplingProfiler | None" = None
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            return filename[index + len(marker) :]
+    if filename.startswith(_PROJECT_ROOT):
+        return os.path.relpath(filename, _PROJECT_ROOT)
+    return filename
+
+
+class Profile:
+    """采样结果：调用栈（根在前）-> 采样次数"""
+
+    def __init__(self, stacks: Counter, interval: float, duration: float):
+        self.stacks = stacks
+        self.interval = interval
+        self.duration = duration
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Brendan Gregg flamegraph.pl / speedscope 均可读取的折叠栈格式"""
+        lines = [
+            ";".join(f"{name} ({path}:{line})" for name, path, line in stack)
+            + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> str:
+        frames: list[dict] = []
+        frame_index: dict[tuple, int] = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks.most_common():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append(
+                        {"name": frame[0], "file": frame[1], "line": frame[2]}
+                    )
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "order-system-profiler",
+            "name": name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+        return json.dumps(document, ensure_ascii=False)
+
+    def export(self, fmt: str, name: str = "profile") -> str:
+        if fmt == "speedscope":
+            return self.speedscope(name)
+        return self.collapsed()
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._started = 0.0
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                (code.co_name, _short_path(code.co_filename), code.co_firstlineno)
+            )
+            frame = frame.f_back
+        if stack:
+            stack.reverse()
+            self._stacks[tuple(stack)] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        return Profile(self._stacks, self.interval, time.perf_counter() - self._started)
+
+
+def start_profiler(interval_ms: float = PROFILE_INTERVAL_MS) -> SamplingProfiler | None:
+    """在调用线程（事件循环线程）上启动采样；已有分析在进行时返回 None"""
+    global _active
+    with _lock:
+        if _active is not None:
+            return None
+        _active = SamplingProfiler(threading.get_ident(), interval_ms / 1000)
+        _active.start()
+        return _active
+
+
+def stop_profiler(profiler: SamplingProfiler) -> Profile:
+    global _active
+    try:
+        return profiler.stop()
+    finally:
+        with _lock:
+            if _active is profiler:
+                _active = None
@@ -0,0 +1,275 @@
+"""SQL 执行统计与慢查询日志
+
+通过 SQLAlchemy 事件记录每条语句的耗时，按归一化后的语句指纹聚合次数、总耗时和 p95；
+只有超过阈值或被抽样的语句才写日志，日志经 QueueHandler 交给后台线程输出，不阻塞事件循环。
+"""
+
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..config import get_config
+from .warmup import is_warming_up
+
+query_log_config = get_config().get("query_log", {})
+QUERY_LOG_ENABLED = query_log_config.get("enabled", True)
+SLOW_QUERY_MS = query_log_config.get("slow_threshold_ms", 200)
+QUERY_SAMPLE_RATE = query_log_config.get("sample_rate", 0.0)
+MAX_FINGERPRINTS = query_log_config.get("max_fingerprints", 2000)
+DURATION_SAMPLES = query_log_config.get("duration_samples", 512)
+LOG_PARAMETERS = query_log_config.get("log_parameters", False)
+# 按请求统计语句条数和耗时（Server-Timing 响应头）
+REQUEST_QUERY_STATS = query_log_config.get("request_stats", True)
+# 单个请求内同一语句指纹执行次数超过该值时视为 N+1 查询
+N_PLUS_ONE_THRESHOLD = query_log_config.get("n_plus_one_threshold", 10)
+
+slow_query_logger = logging.getLogger("backend.sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """归一化 SQL：字面量和占位符替换为 ?，IN 列表折叠，空白合并"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class FingerprintStats:
+    __slots__ = ("count", "durations", "errors", "max", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.durations: deque[float] = deque(maxlen=DURATION_SAMPLES)
+
+    def percentile(self, percent: float) -> float:
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class RequestQueryStats:
+    """单个请求（或一段代码）内执行的语句统计，嵌套时同时计入外层"""
+
+    __slots__ = ("count", "fingerprints", "parent", "total")
+
+    def __init__(self, parent: "RequestQueryStats | None" = None):
+        self.count = 0
+        self.total = 0.0
+        self.fingerprints: Counter[str] = Counter()
+        self.parent = parent
+
+    def record(self, key: str, duration: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.total += duration
+            stats.fingerprints[key] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """执行次数超过阈值的语句指纹"""
+        return [
+            (key, count)
+            for key, count in self.fingerprints.most_common()
+            if count > threshold
+        ]
+
+
+# 指纹 -> 统计，超出上限时淘汰最久未出现的指纹
+_stats: OrderedDict[str, FingerprintStats] = OrderedDict()
+_listener: QueueListener | None = None
+_request_stats: ContextVar[RequestQueryStats | None] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries():
+    """统计代码块内执行的语句，返回 RequestQueryStats"""
+    stats = RequestQueryStats(parent=_request_stats.get())
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, max_repeats: int | None = None):
+    """断言代码块内执行的语句不超过 limit 条，用于发现 N+1 回归
+
+    例如::
+
+        with assert_max_queries(5):
+            await client.get("/order/my", headers=headers)
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        top = "\n".join(
+            f"  {count} x {key}" for key, count in stats.fingerprints.most_common(5)
+        )
+        raise AssertionError(f"执行了 {stats.count} 条 SQL，超过上限 {limit}:\n{top}")
+    if max_repeats is not None and stats.repeated(max_repeats):
+        key, count = stats.repeated(max_repeats)[0]
+        raise AssertionError(
+            f"同一语句执行了 {count} 次，超过上限 {max_repeats}: {key}"
+        )
+
+
+def record_query(key: str, duration: float, failed: bool = False) -> None:
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = FingerprintStats()
+        if len(_stats) > MAX_FINGERPRINTS:
+            _stats.popitem(last=False)
+    else:
+        _stats.move_to_end(key)
+    stats.count += 1
+    stats.total += duration
+    stats.max = max(stats.max, duration)
+    stats.durations.append(duration)
+    if failed:
+        stats.errors += 1
+
+
+def _log_query(key, statement, parameters, duration, rowcount, sampled) -> None:
+    entry = {
+        "event": "slow_query" if not sampled else "sampled_query",
+        "duration_ms": round(duration * 1000, 3),
+        "rows": rowcount,
+        "fingerprint": key,
+        "statement": statement,
+    }
+    if LOG_PARAMETERS:
+        entry["parameters"] = repr(parameters)[:1000]
+    level = logging.INFO if sampled else logging.WARNING
+    slow_query_logger.log(level, json.dumps(entry, ensure_ascii=False))
+
+
+def report_repeated_queries(method: str, path: str, stats: RequestQueryStats) -> None:
+    """记录疑似 N+1 的请求"""
+    repeated = stats.repeated()
+    if not repeated:
+        return
+    entry = {
+        "event": "n_plus_one",
+        "method": method,
+        "path": path,
+        "queries": stats.count,
+        "db_ms": round(stats.total * 1000, 3),
+        "repeated": [{"fingerprint": key, "count": count} for key, count in repeated],
+    }
+    slow_query_logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    key = fingerprint(statement)
+    if not is_warming_up():
+        record_query(key, duration)
+    request_stats = _request_stats.get()
+    if request_stats is not None:
+        request_stats.record(key, duration)
+
+    slow = duration * 1000 >= SLOW_QUERY_MS
+    sampled = not slow and QUERY_SAMPLE_RATE > 0 and random.random() < QUERY_SAMPLE_RATE
+    if slow or sampled:
+        _log_query(key, statement, parameters, duration, cursor.rowcount, sampled)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("query_start_time") if conn is not None else None
+    if not starts or exception_context.statement is None:
+        return
+    duration = time.perf_counter() - starts.pop()
+    key = fingerprint(exception_context.statement)
+    if not is_warming_up():
+        record_query(key, duration, failed=True)
+    request_stats = _request_stats.get()
+    if request_stats is not None:
+        request_stats.record(key, duration)
+
+
+def install_query_hooks(engine: AsyncEngine) -> None:
+    """为引擎注册计时事件（主库和从库分别调用）"""
+    if not QUERY_LOG_ENABLED:
+        return
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def start_query_log() -> None:
+    """慢查询日志改为写入队列，由后台线程输出到标准错误"""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    slow_query_logger.handlers = [QueueHandler(log_queue)]
+    slow_query_logger.setLevel(logging.INFO)
+    slow_query_logger.propagate = False
+
+
+def stop_query_log() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_top_queries(limit: int = 20, order_by: str = "total") -> list[dict]:
+    """按总耗时、次数或 p95 排序的前 N 个语句指纹（耗时单位毫秒）"""
+    rows = [
+        {
+            "fingerprint": key,
+            "count": stats.count,
+            "errors": stats.errors,
+            "total_ms": stats.total * 1000,
+            "avg_ms": stats.total / stats.count * 1000,
+            "p95_ms": stats.percentile(95) * 1000,
+            "max_ms": stats.max * 1000,
+        }
+        for key, stats in list(_stats.items())
+    ]
+    sort_key = {"total": "total_ms", "count": "count", "p95": "p95_ms"}[order_by]
+    rows.sort(key=lambda row: row[sort_key], reverse=True)
+    return rows[:limit]
+
+
+def reset_query_stats() -> None:
+    _stats.clear()
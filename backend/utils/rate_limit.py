@@ -0,0 +1,229 @@
+"""滑动窗口限流
+
+- local: 进程内限流，每个键使用定长环形缓冲区记录最近 N 次请求的时间戳
+- redis: 基于有序集合的共享限流，适用于多进程/多节点部署（需要安装 redis 包）
+"""
+
+import math
+import secrets
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+from ..config import get_config
+
+rate_limit_config = get_config().get("rate_limit", {})
+RATE_LIMIT_ENABLED = rate_limit_config.get("enabled", True)
+RATE_LIMIT_BACKEND = rate_limit_config.get("backend", "local")
+RATE_LIMIT_REDIS_URL = rate_limit_config.get("redis_url", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = rate_limit_config.get("max_keys", 100000)
+TRUST_FORWARDED_FOR = rate_limit_config.get("trust_forwarded_for", False)
+
+DEFAULT_RULES = {
+    "login": {
+        "per_ip": {"limit": 30, "window_seconds": 60},
+        "per_account": {"limit": 10, "window_seconds": 300},
+    },
+    "login_email": {
+        "per_ip": {"limit": 30, "window_seconds": 60},
+        "per_account": {"limit": 10, "window_seconds": 300},
+    },
+    "send_email_code": {
+        "per_ip": {"limit": 10, "window_seconds": 600},
+        "per_account": {"limit": 1, "window_seconds": 60},
+    },
+}
+RATE_LIMIT_RULES = {**DEFAULT_RULES, **rate_limit_config.get("rules", {})}
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def hit_all(self, windows: list[tuple[str, int, float]]) -> float:
+        """按 (键, 次数上限, 窗口秒数) 同时检查多个窗口
+
+        全部允许时在每个窗口中记录一次请求并返回 0；任一窗口超限时不记录，
+        返回需要等待的秒数（各超限窗口中最长的）。
+        """
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """记录一次请求；允许时返回 0，超限时返回需要等待的秒数"""
+        return await self.hit_all([(key, limit, window)])
+
+
+class _RingWindow:
+    """最近 limit 次请求的时间戳，index 指向最早的一次"""
+
+    __slots__ = ("index", "stamps")
+
+    def __init__(self, limit: int):
+        self.stamps = array("d", [-math.inf]) * limit
+        self.index = 0
+
+    def wait(self, now: float, window: float) -> float:
+        """距下一次允许请求的秒数，0 表示当前允许"""
+        return max(window - (now - self.stamps[self.index]), 0.0)
+
+    def record(self, now: float) -> None:
+        self.stamps[self.index] = now
+        self.index = (self.index + 1) % len(self.stamps)
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """进程内滑动窗口限流，键数量超出上限时淘汰最久未访问的键"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._windows: OrderedDict[str, _RingWindow] = OrderedDict()
+
+    def _ring(self, key: str, limit: int) -> _RingWindow:
+        ring = self._windows.get(key)
+        if ring is None or len(ring.stamps) != limit:
+            ring = _RingWindow(limit)
+            self._windows[key] = ring
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return ring
+
+    async def hit_all(self, windows: list[tuple[str, int, float]]) -> float:
+        now = time.monotonic()
+        rings = [(self._ring(key, limit), window) for key, limit, window in windows]
+        retry_after = max((ring.wait(now, window) for ring, window in rings), default=0)
+        if retry_after > 0:
+            return retry_after
+        for ring, _ in rings:
+            ring.record(now)
+        return 0.0
+
+
+# KEYS 为各窗口的键；ARGV: now, member, 之后每个窗口依次为 window, limit
+_REDIS_SLIDING_WINDOW = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[1 + i * 2])
+    local limit = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+    end
+end
+if retry_after > 0 then
+    return tostring(retry_after)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, math.ceil(tonumber(ARGV[1 + i * 2]) * 1000))
+end
+return '0'
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """基于 Redis 有序集合的共享滑动窗口限流"""
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise RuntimeError("使用 redis 限流需要安装 redis 包") from exc
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_SLIDING_WINDOW)
+
+    async def hit_all(self, windows: list[tuple[str, int, float]]) -> float:
+        now = time.time()
+        member = f"{now}-{secrets.token_hex(4)}"
+        args: list = [now, member]
+        for _, limit, window in windows:
+            args += [window, limit]
+        result = await self._script(
+            keys=[f"ratelimit:{key}" for key, _, _ in windows], args=args
+        )
+        return float(result)
+
+
+_backend: RateLimitBackend | None = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """按配置返回限流后端（单例）"""
+    global _backend
+    if _backend is None:
+        if RATE_LIMIT_BACKEND == "local":
+            _backend = LocalRateLimitBackend()
+        elif RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisRateLimitBackend()
+        else:
+            raise ValueError(f"未知的限流后端: {RATE_LIMIT_BACKEND}")
+    return _backend
+
+
+def _client_ip(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _account_identifier(request: Request, field: str) -> str | None:
+    """从请求体（JSON 或表单）中读取账号标识；FastAPI 已缓存请求体，不会重复读取"""
+    try:
+        if request.headers.get("content-type", "").startswith(
+            ("application/x-www-form-urlencoded", "multipart/form-data")
+        ):
+            value = (await request.form()).get(field)
+        else:
+            body = await request.json()
+            value = body.get(field) if isinstance(body, dict) else None
+    except ValueError:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().lower()
+
+
+def rate_limit(rule: str, account_field: str | None = None):
+    """生成限流依赖，按客户端 IP 和账号（用户名/邮箱）分别计数
+
+    作为路由的 dependencies 使用时先于 SessionDep 执行，超限请求不会打开数据库会话。
+    """
+    limits = RATE_LIMIT_RULES[rule]
+
+    async def dependency(request: Request) -> None:
+        if not RATE_LIMIT_ENABLED:
+            return
+        backend = get_rate_limit_backend()
+
+        checks = [("per_ip", _client_ip(request))]
+        if account_field:
+            account = await _account_identifier(request, account_field)
+            if account:
+                checks.append(("per_account", account))
+
+        # 所有窗口都允许时才计数：按账号超限的请求不占用该 IP 的额度，反之亦然
+        windows = [
+            (
+                f"{rule}:{scope}:{identifier}",
+                limits[scope]["limit"],
+                limits[scope]["window_seconds"],
+            )
+            for scope, identifier in checks
+            if limits.get(scope)
+        ]
+        if not windows:
+            return
+        retry_after = await backend.hit_all(windows)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="请求过于频繁，请稍后再试",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return dependency
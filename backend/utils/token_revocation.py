@@ -0,0 +1,281 @@
+"""令牌吊销列表
+
+吊销记录持久化在 RevokedToken 表中，启动时加载到内存，之后周期性增量同步其他进程写入的记录。
+校验只查内存：布隆过滤器先排除绝大多数未吊销的令牌，命中时再查精确集合，刷新令牌无需读取数据库。
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from ..config import get_config
+from ..models import RevokedToken, TokenRevocationKind, utcnow
+from ..security import REFRESH_TOKEN_EXPIRE_DAYS
+
+logger = logging.getLogger(__name__)
+
+revocation_config = get_config().get("token_revocation", {})
+SYNC_INTERVAL_SECONDS = revocation_config.get("sync_interval_seconds", 10)
+SWEEP_INTERVAL_SECONDS = revocation_config.get("sweep_interval_seconds", 600)
+PURGE_BATCH_SIZE = revocation_config.get("purge_batch_size", 1000)
+BLOOM_CAPACITY = revocation_config.get("bloom_capacity", 100000)
+BLOOM_ERROR_RATE = revocation_config.get("bloom_error_rate", 0.001)
+
+# 增量同步时向前多读一段时间，覆盖其他进程提交较晚的记录
+SYNC_OVERLAP_SECONDS = max(60, SYNC_INTERVAL_SECONDS * 2)
+
+RevokedTokenTable = RevokedToken.__table__  # type: ignore[attr-defined]
+
+
+class BloomFilter:
+    """定长位数组布隆过滤器：判断为不存在时一定不存在，判断为存在时可能误判"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=UTC).timestamp()
+
+
+def _refresh_lifetime_deadline() -> datetime:
+    """此刻之前签发的刷新令牌都会在该时刻前过期"""
+    return utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+class TokenRevocationList:
+    def __init__(self):
+        # "kind:value" -> 过期时刻，单个令牌和令牌家族共用
+        self._revoked: dict[str, float] = {}
+        # 用户ID -> (吊销时刻, 过期时刻)，早于吊销时刻签发的令牌均失效
+        self._users: dict[int, tuple[float, float]] = {}
+        self._bloom = BloomFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE)
+        self._last_sync: datetime | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _key(kind: TokenRevocationKind, value: str) -> str:
+        return f"{kind.value}:{value}"
+
+    def _rebuild_bloom(self) -> None:
+        capacity = BLOOM_CAPACITY
+        while capacity < len(self._revoked) * 2:
+            capacity *= 2
+        self._bloom = BloomFilter(capacity, BLOOM_ERROR_RATE)
+        for key in self._revoked:
+            self._bloom.add(key)
+
+    def _apply(
+        self,
+        kind: TokenRevocationKind,
+        value: str,
+        revoked_at: float,
+        expires_at: float,
+    ) -> None:
+        if kind == TokenRevocationKind.USER:
+            user_id = int(value)
+            current = self._users.get(user_id)
+            if current is None or current[0] < revoked_at:
+                self._users[user_id] = (revoked_at, expires_at)
+            return
+
+        key = self._key(kind, value)
+        if key in self._revoked:
+            return
+        self._revoked[key] = expires_at
+        self._bloom.add(key)
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild_bloom()
+
+    def is_revoked(self, kind: TokenRevocationKind, value: str) -> bool:
+        key = self._key(kind, value)
+        if key not in self._bloom:
+            return False
+        return key in self._revoked
+
+    def issued_before_revocation(self, user_id: int, issued_at: float | None) -> bool:
+        """令牌是否签发于用户最近一次吊销（修改密码、注销账户等）之前"""
+        entry = self._users.get(user_id)
+        if entry is None:
+            return False
+        return issued_at is None or issued_at < entry[0]
+
+    async def revoke(
+        self,
+        session: AsyncSession,
+        kind: TokenRevocationKind,
+        value: str,
+        expires_at: datetime,
+    ) -> bool:
+        """吊销单个令牌或令牌家族；已被吊销过时返回 False
+
+        唯一约束保证多个进程同时吊销同一令牌时只有一个成功，可据此识别刷新令牌被重复使用。
+        """
+        if self.is_revoked(kind, value):
+            return False
+
+        record = RevokedToken(kind=kind, value=value, expires_at=expires_at)
+        session.add(record)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            self._apply(kind, value, time.time(), _timestamp(expires_at))
+            return False
+        self._apply(kind, value, _timestamp(record.revoked_at), _timestamp(expires_at))
+        return True
+
+    async def revoke_family(self, session: AsyncSession, family: str) -> None:
+        await self.revoke(
+            session, TokenRevocationKind.FAMILY, family, _refresh_lifetime_deadline()
+        )
+
+    async def revoke_user(self, session: AsyncSession, *user_ids: int | None) -> None:
+        """吊销用户此前签发的全部访问令牌和刷新令牌"""
+        values = [str(user_id) for user_id in user_ids if user_id is not None]
+        if not values:
+            return
+        # 每个用户只保留最近一次吊销记录
+        await session.execute(
+            delete(RevokedToken).where(
+                RevokedTokenTable.c.kind == TokenRevocationKind.USER,
+                RevokedTokenTable.c.value.in_(values),
+            )
+        )
+        expires_at = _refresh_lifetime_deadline()
+        records = [
+            RevokedToken(
+                kind=TokenRevocationKind.USER, value=value, expires_at=expires_at
+            )
+            for value in values
+        ]
+        session.add_all(records)
+        await session.commit()
+        for record in records:
+            self._apply(
+                record.kind,
+                record.value,
+                _timestamp(record.revoked_at),
+                _timestamp(expires_at),
+            )
+
+    async def sync(self) -> None:
+        """加载其他进程新写入的吊销记录（首次调用时加载全部未过期记录）"""
+        assert self._session_factory is not None
+        now = utcnow()
+        statement = select(RevokedToken).where(RevokedTokenTable.c.expires_at > now)
+        if self._last_sync is not None:
+            statement = statement.where(
+                RevokedTokenTable.c.revoked_at
+                >= self._last_sync - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            )
+        async with self._session_factory() as session:
+            records = (await session.execute(statement)).scalars().all()
+        for record in records:
+            self._apply(
+                record.kind,
+                record.value,
+                _timestamp(record.revoked_at),
+                _timestamp(record.expires_at),
+            )
+        self._last_sync = now
+
+    async def sweep(self) -> None:
+        """分批删除已过期的吊销记录，并清理内存中的对应条目"""
+        assert self._session_factory is not None
+        async with self._session_factory() as session:
+            while True:
+                ids = (
+                    (
+                        await session.execute(
+                            select(RevokedTokenTable.c.id)
+                            .where(RevokedTokenTable.c.expires_at <= utcnow())
+                            .limit(PURGE_BATCH_SIZE)
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                if not ids:
+                    break
+                await session.execute(
+                    delete(RevokedToken).where(RevokedTokenTable.c.id.in_(ids))
+                )
+                await session.commit()
+                if len(ids) < PURGE_BATCH_SIZE:
+                    break
+
+        now = time.time()
+        self._revoked = {
+            key: expires_at
+            for key, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+        self._users = {
+            user_id: entry for user_id, entry in self._users.items() if entry[1] > now
+        }
+        self._rebuild_bloom()
+
+    async def _run_periodically(self, interval: float, job) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception:
+                logger.exception("令牌吊销列表后台任务异常")
+
+    async def start(self, engine: AsyncEngine) -> None:
+        self._session_factory = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        await self.sync()
+        self._tasks = [
+            asyncio.create_task(
+                self._run_periodically(SYNC_INTERVAL_SECONDS, self.sync)
+            ),
+            asyncio.create_task(
+                self._run_periodically(SWEEP_INTERVAL_SECONDS, self.sweep)
+            ),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+revocation_list = TokenRevocationList()
@@ -0,0 +1,202 @@
+"""邮箱验证码存储
+
+- memory: 进程内 TTL 存储，定期清理过期条目，适合单节点部署
+- database: 存储在 EmailVerificationCode 表中，多节点共享，定期批量清理过期和已使用的记录
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from ..config import get_config
+from ..models import EmailVerificationCode, VerificationScene, utcnow
+
+logger = logging.getLogger(__name__)
+
+verification_config = get_config().get("verification_code", {})
+VERIFICATION_BACKEND = verification_config.get("backend", "database")
+SWEEP_INTERVAL_SECONDS = verification_config.get("sweep_interval_seconds", 60)
+PURGE_BATCH_SIZE = verification_config.get("purge_batch_size", 1000)
+MEMORY_MAX_ENTRIES = verification_config.get("max_entries", 100000)
+
+EmailVerificationTable: Any = getattr(EmailVerificationCode, "__table__", None)
+
+
+class VerificationCodeStore(ABC):
+    """验证码存储接口，同一邮箱和场景只保留最新的一条验证码"""
+
+    @abstractmethod
+    async def save(
+        self,
+        session: AsyncSession,
+        email: str,
+        scene: VerificationScene,
+        code_hash: str,
+        ttl: timedelta,
+    ) -> None: ...
+
+    @abstractmethod
+    async def consume(
+        self,
+        session: AsyncSession,
+        email: str,
+        scene: VerificationScene,
+        code_hash: str,
+    ) -> bool:
+        """校验并作废验证码，成功返回 True"""
+
+    async def sweep(self) -> None:
+        """清理过期数据，由后台任务周期调用"""
+
+    def start(self, engine: AsyncEngine) -> None:
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        sweeper = getattr(self, "_sweeper", None)
+        if sweeper is not None:
+            sweeper.cancel()
+            await asyncio.gather(sweeper, return_exceptions=True)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("验证码清理任务异常")
+
+
+class MemoryVerificationCodeStore(VerificationCodeStore):
+    """进程内验证码存储，不访问数据库"""
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # (email, scene) -> (code_hash, 过期时刻)，按写入顺序排列
+        self._codes: dict[tuple[str, VerificationScene], tuple[str, float]] = {}
+
+    async def save(self, session, email, scene, code_hash, ttl) -> None:
+        key = (email, scene)
+        self._codes.pop(key, None)
+        self._codes[key] = (code_hash, time.monotonic() + ttl.total_seconds())
+        while len(self._codes) > self.max_entries:
+            self._codes.pop(next(iter(self._codes)))
+
+    async def consume(self, session, email, scene, code_hash) -> bool:
+        key = (email, scene)
+        entry = self._codes.get(key)
+        if entry is None:
+            return False
+        stored_hash, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._codes[key]
+            return False
+        if stored_hash != code_hash:
+            return False
+        del self._codes[key]
+        return True
+
+    async def sweep(self) -> None:
+        now = time.monotonic()
+        expired = [
+            key for key, (_, expires_at) in self._codes.items() if expires_at < now
+        ]
+        for key in expired:
+            del self._codes[key]
+
+
+class DatabaseVerificationCodeStore(VerificationCodeStore):
+    """数据库验证码存储，多节点共享"""
+
+    def start(self, engine: AsyncEngine) -> None:
+        self._session_factory = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        super().start(engine)
+
+    async def save(self, session, email, scene, code_hash, ttl) -> None:
+        await session.execute(
+            delete(EmailVerificationCode).where(
+                EmailVerificationTable.c.email == email,
+                EmailVerificationTable.c.scene == scene,
+            )
+        )
+        session.add(
+            EmailVerificationCode(
+                email=email,
+                scene=scene,
+                code_hash=code_hash,
+                expires_at=utcnow() + ttl,
+            )
+        )
+        await session.commit()
+
+    async def consume(self, session, email, scene, code_hash) -> bool:
+        # 每个邮箱和场景最多只有一条有效记录，条件更新一次完成校验与作废
+        result = await session.execute(
+            update(EmailVerificationCode)
+            .where(
+                EmailVerificationTable.c.email == email,
+                EmailVerificationTable.c.scene == scene,
+                EmailVerificationTable.c.code_hash == code_hash,
+                EmailVerificationTable.c.verified == False,
+                EmailVerificationTable.c.expires_at >= utcnow(),
+            )
+            .values(verified=True)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+    async def sweep(self) -> None:
+        """分批删除过期和已使用的记录，避免长事务锁表"""
+        async with self._session_factory() as session:
+            while True:
+                ids = (
+                    (
+                        await session.execute(
+                            select(EmailVerificationTable.c.id)
+                            .where(
+                                or_(
+                                    EmailVerificationTable.c.expires_at < utcnow(),
+                                    EmailVerificationTable.c.verified == True,
+                                )
+                            )
+                            .limit(PURGE_BATCH_SIZE)
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                if not ids:
+                    break
+                await session.execute(
+                    delete(EmailVerificationCode).where(
+                        EmailVerificationTable.c.id.in_(ids)
+                    )
+                )
+                await session.commit()
+                if len(ids) < PURGE_BATCH_SIZE:
+                    break
+
+
+_store: VerificationCodeStore | None = None
+
+
+def get_verification_store() -> VerificationCodeStore:
+    """按配置返回验证码存储（单例）"""
+    global _store
+    if _store is None:
+        if VERIFICATION_BACKEND == "memory":
+            _store = MemoryVerificationCodeStore()
+        elif VERIFICATION_BACKEND == "database":
+            _store = DatabaseVerificationCodeStore()
+        else:
+            raise ValueError(f"未知的验证码存储类型: {VERIFICATION_BACKEND}")
+    return _store
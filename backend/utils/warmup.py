@@ -0,0 +1,141 @@
+"""启动预热与就绪状态
+
+新进程在 lifespan 启动阶段预先建立连接池连接，并在进程内请求一遍热点接口
+（编译并缓存 SQL、构建响应序列化器、把热点数据读入数据库缓冲池），完成后才标记为就绪，
+第一批真实请求不再承担这些冷启动开销。预热失败或超时只记录日志，不阻止启动。
+预热期间执行的请求和语句不计入 HTTP 指标、Server-Timing 和 SQL 执行统计。
+
+生产模式（python start.py --prod）下收到 SIGTERM 后先标记为未就绪，继续处理请求 drain 秒，
+负载均衡摘除该实例后再交给 uvicorn 关闭监听、等待进行中的请求完成。
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+from contextvars import ContextVar
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..config import get_config
+
+logger = logging.getLogger(__name__)
+
+warmup_config = get_config().get("warmup", {})
+WARMUP_ENABLED = warmup_config.get("enabled", True)
+WARMUP_CONNECTIONS = warmup_config.get("connections", 5)
+WARMUP_PATHS = warmup_config.get("paths", ["/store/?limit=20", "/comment/?limit=20"])
+WARMUP_TIMEOUT_SECONDS = warmup_config.get("timeout_seconds", 10)
+# 由生产模式启动脚本按 server.drain_seconds 设置；开发模式（--reload）下为 0，不延迟退出
+DRAIN_SECONDS = float(os.environ.get("ORDER_SYSTEM_DRAIN_SECONDS", "0"))
+
+_ready = False
+# 预热在进程内直接调用应用，请求与预热任务在同一上下文中执行；外部请求无法伪造该标记
+_warming_up: ContextVar[bool] = ContextVar("warming_up", default=False)
+
+
+def is_warming_up() -> bool:
+    """当前代码是否在启动预热中执行（预热请求不计入指标和统计）"""
+    return _warming_up.get()
+
+
+def is_ready() -> bool:
+    """预热完成且尚未开始关闭"""
+    return _ready
+
+
+def set_ready(ready: bool) -> None:
+    global _ready
+    _ready = ready
+
+
+async def _warm_pool(engine: AsyncEngine, count: int) -> int:
+    """同时借出 count 个连接各执行一次 SELECT 1，归还后留在池中供后续请求复用"""
+    # 不限大小的连接池（如 NullPool）没有 size()，只预热一个连接
+    size = getattr(engine.pool, "size", lambda: 1)()
+    count = max(1, min(count, size))
+
+    async def checkout():
+        conn = await engine.connect()
+        await conn.exec_driver_sql("SELECT 1")
+        return conn
+
+    results = await asyncio.gather(
+        *[checkout() for _ in range(count)], return_exceptions=True
+    )
+    opened = 0
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.warning("预热数据库连接失败: %r", result)
+        else:
+            opened += 1
+            await result.close()
+    return opened
+
+
+async def _warm_paths(app: FastAPI) -> None:
+    """在进程内（不经过网络）请求热点接口"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://warmup"
+    ) as client:
+        for path in WARMUP_PATHS:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                logger.warning("预热请求 %s 返回 %s", path, response.status_code)
+
+
+async def warm_up(app: FastAPI, engines: list[AsyncEngine]) -> None:
+    if not WARMUP_ENABLED:
+        return
+    started = time.perf_counter()
+
+    async def run():
+        _warming_up.set(True)
+        opened = await asyncio.gather(
+            *[_warm_pool(engine, WARMUP_CONNECTIONS) for engine in engines]
+        )
+        await _warm_paths(app)
+        return opened
+
+    try:
+        opened = await asyncio.wait_for(run(), WARMUP_TIMEOUT_SECONDS)
+    except Exception as e:  # noqa: BLE001 预热失败不影响启动
+        logger.warning("启动预热未完成: %r", e)
+        return
+    logger.info(
+        "启动预热完成，耗时 %.0f ms，预建连接 %s",
+        (time.perf_counter() - started) * 1000,
+        opened,
+    )
+
+
+def install_drain_handler(drain_seconds: float = DRAIN_SECONDS) -> None:
+    """在 uvicorn 的 SIGTERM 处理函数外包一层：先标记为未就绪，drain_seconds 后再交给 uvicorn 退出
+
+    需在 lifespan 启动阶段调用（此时 uvicorn 已安装信号处理函数），uvicorn 退出时会恢复原处理函数。
+    未就绪期间再次收到 SIGTERM 时立即退出。
+    """
+    if drain_seconds <= 0 or threading.current_thread() is not threading.main_thread():
+        return
+    original = signal.getsignal(signal.SIGTERM)
+    if not callable(original):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle_term(signum, frame):
+        if not is_ready():
+            original(signum, frame)
+            return
+        set_ready(False)
+        logger.info("收到 SIGTERM，%.0f 秒后停止接收新连接", drain_seconds)
+        loop.call_soon_threadsafe(
+            loop.call_later, drain_seconds, original, signum, frame
+        )
+
+    signal.signal(signal.SIGTERM, handle_term)